@@ -13,11 +13,13 @@ if exist "data\token_api.json" (
     del "data\token_api.json"
     echo ✓ ה-token נמחק בהצלחה
     echo.
-    echo בהרצה הבאה של check_stage2.py, תתבקש לאשר מחדש את ההרשאות
-    echo זה ייצור token חדש עם ה-scopes הנכונים
+    echo מאשר מחדש את ההרשאות - ייפתח דפדפן
+    python -m src.credentials api
+    echo זה יצר token חדש עם ה-scopes הנכונים
 ) else (
     echo לא נמצא token ב-data\token_api.json
-    echo זה בסדר - ה-token ייווצר אוטומטית בפעם הראשונה
+    echo יוצר token חדש - ייפתח דפדפן
+    python -m src.credentials api
 )
 
 echo.
@@ -14,10 +14,14 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(BASE_DIR))
 load_dotenv(BASE_DIR / ".env")
 
-from src.main import get_credentials_api, build_calendar_service, list_calendar_events, ISRAEL_TZ
+from src.main import get_credentials_api, build_calendar_service, iter_calendar_events, ISRAEL_TZ
+from src.calendar_batch import batch_list_events
 from src.db import get_db_connection, get_cabin_by_id, save_customer_to_db, save_booking_to_db
 from psycopg2.extras import RealDictCursor
 
+# Event fields the import reads (partial response keeps the 365-day window small)
+IMPORT_EVENT_FIELDS = "id,status,summary,description,start,end,htmlLink"
+
 
 def parse_event_description(description: str) -> dict:
     """
@@ -70,13 +74,14 @@ def parse_event_description(description: str) -> dict:
     return result
 
 
-def import_bookings_from_calendar(days_back: int = 365, days_forward: int = 365):
+def import_bookings_from_calendar(days_back: int = 365, days_forward: int = 365, batch: bool = False):
     """
     Import bookings from Google Calendar to database
     
     Args:
         days_back: How many days back to import (default: 365)
         days_forward: How many days forward to import (default: 365)
+        batch: Fetch all cabin calendars in one batch request instead of one request per cabin
     """
     print("=" * 60)
     print("Importing Bookings from Google Calendar to Database")
@@ -117,6 +122,12 @@ def import_bookings_from_calendar(days_back: int = 365, days_forward: int = 365)
         
         print(f"\n3. Importing events from {time_min[:10]} to {time_max[:10]}...")
         
+        prefetched = {}
+        if batch:
+            prefetched = batch_list_events(
+                service, [c['calendar_id'] for c in cabins], time_min, time_max, fields=IMPORT_EVENT_FIELDS
+            )
+        
         for cabin in cabins:
             cabin_id = cabin['id']
             cabin_name = cabin['name']
@@ -125,11 +136,19 @@ def import_bookings_from_calendar(days_back: int = 365, days_forward: int = 365)
             print(f"\n   Processing cabin: {cabin_name} (Calendar: {calendar_id[:20]}...)")
             
             try:
-                # Get all events from calendar
-                events = list_calendar_events(service, calendar_id, time_min, time_max)
-                print(f"      Found {len(events)} events")
+                if calendar_id in prefetched:
+                    if prefetched[calendar_id]['error'] is not None:
+                        raise prefetched[calendar_id]['error']
+                    events = prefetched[calendar_id]['result']
+                else:
+                    # Stream all events from calendar (every page, only the fields we use)
+                    events = iter_calendar_events(
+                        service, calendar_id, time_min, time_max, fields=IMPORT_EVENT_FIELDS
+                    )
                 
+                found = 0
                 for event in events:
+                    found += 1
                     try:
                         # Skip cancelled events
                         if event.get('status') == 'cancelled':
@@ -236,6 +255,8 @@ def import_bookings_from_calendar(days_back: int = 365, days_forward: int = 365)
                         errors += 1
                         print(f"      ERROR processing event {event.get('id', 'unknown')[:20]}...: {e}")
             
+                print(f"      Found {found} events")
+            
             except Exception as e:
                 errors += 1
                 print(f"   ERROR processing cabin {cabin_name}: {e}")
@@ -264,9 +285,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Import bookings from Google Calendar to database')
     parser.add_argument('--days-back', type=int, default=365, help='Days back to import (default: 365)')
     parser.add_argument('--days-forward', type=int, default=365, help='Days forward to import (default: 365)')
+    parser.add_argument('--batch', action='store_true', help='Fetch all calendars in one batch request')
     
     args = parser.parse_args()
     
-    success = import_bookings_from_calendar(args.days_back, args.days_forward)
+    success = import_bookings_from_calendar(args.days_back, args.days_forward, batch=args.batch)
     sys.exit(0 if success else 1)
 
@@ -0,0 +1,18 @@
+-- Migration: NOTIFY cabins_changed on every change to cabins
+-- The API server keeps the cabin list in memory (src/cabin_catalog.py) and LISTENs on
+-- this channel to reload it; without the trigger it reloads after CABIN_CATALOG_MAX_AGE_SECONDS
+-- or on POST /admin/cabins/reload.
+
+CREATE OR REPLACE FUNCTION notify_cabins_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('cabins_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS cabins_changed_notify ON cabins;
+CREATE TRIGGER cabins_changed_notify
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON cabins
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE notify_cabins_changed();
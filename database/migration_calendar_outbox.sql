@@ -0,0 +1,30 @@
+-- Migration: calendar_mutations - write-behind queue of Google Calendar inserts/deletes
+-- /book, /hold, hold release, cancellations and agent bookings commit their DB row and
+-- enqueue the calendar change here; src/calendar_outbox.py applies it with retries,
+-- one mutation at a time per calendar (in id order).
+
+CREATE TABLE IF NOT EXISTS calendar_mutations (
+    id BIGSERIAL PRIMARY KEY,
+    op VARCHAR(10) NOT NULL CHECK (op IN ('insert', 'delete')),
+    calendar_id TEXT NOT NULL,
+    booking_id UUID REFERENCES bookings(id) ON DELETE SET NULL,
+    hold_id VARCHAR(100),
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,  -- insert: summary, description, start_local, end_local (+ expires_at of a hold); delete: event_id
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'in_progress', 'done', 'failed')),
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    claimed_at TIMESTAMP,
+    event_id VARCHAR(255),
+    event_link TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Head of each calendar's queue
+CREATE INDEX IF NOT EXISTS idx_calendar_mutations_open
+    ON calendar_mutations(calendar_id, id)
+    WHERE status IN ('pending', 'in_progress');
+
+CREATE INDEX IF NOT EXISTS idx_calendar_mutations_booking_id ON calendar_mutations(booking_id);
+CREATE INDEX IF NOT EXISTS idx_calendar_mutations_hold_id ON calendar_mutations(hold_id);
@@ -0,0 +1,16 @@
+-- Migration: calendar_watch_channels - Google Calendar push-notification channels
+-- Shared by every API worker: any worker can resolve a notification's channel, the
+-- worker holding a calendar's advisory lock registers / renews its channel, and
+-- channels left over from earlier processes are found and stopped
+-- (src/calendar_watch.py).
+
+CREATE TABLE IF NOT EXISTS calendar_watch_channels (
+    channel_id VARCHAR(100) PRIMARY KEY,
+    calendar_id TEXT NOT NULL,
+    resource_id TEXT,
+    expiration TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_calendar_watch_channels_calendar
+    ON calendar_watch_channels(calendar_id, expiration DESC);
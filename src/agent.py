@@ -141,6 +141,7 @@ class Agent:
         - "5 למרץ 2026"
         - "15/03/2026"
         - "כל מרץ" / "במהלך מרץ" / "בחודש מרץ" -> entire month
+        - "2 לילות במרץ" / "any 2 nights in March" (month + stay length, no days) -> entire month
         
         Returns: {'check_in': 'YYYY-MM-DD', 'check_out': 'YYYY-MM-DD', 'is_month_range': bool} or None
         """
@@ -169,20 +170,7 @@ class Agent:
                 month = months_he.get(month_he)
                 if month:
                     year = int(year_str) if year_str else current_year
-                    # First day of month
-                    check_in = datetime(year, month, 1)
-                    # Last day of month
-                    if month == 12:
-                        check_out = datetime(year + 1, 1, 1) - timedelta(days=1)
-                    else:
-                        check_out = datetime(year, month + 1, 1) - timedelta(days=1)
-                    return {
-                        'check_in': check_in.strftime('%Y-%m-%d'),
-                        'check_out': check_out.strftime('%Y-%m-%d'),
-                        'is_month_range': True,
-                        'month': month,
-                        'year': year
-                    }
+                    return self._month_range(month, year)
         
         # Hebrew month names
         months_he = {
@@ -275,6 +263,82 @@ class Agent:
             except:
                 pass
         
+        # Month without days plus a stay length: "2 לילות במרץ", "any 2 nights in March"
+        # -> the whole month, searched for free windows of that length
+        if self.extract_stay_nights(message) is not None:
+            months_en = {
+                'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
+                'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12
+            }
+            # Hebrew month as a word of its own, optionally prefixed (במרץ, למרץ)
+            match = re.search(
+                r'(?<![א-ת])(?:ב|ל)?(ינואר|פברואר|מרץ|מרס|מארס|אפריל|מאי|יוני|יולי|אוגוסט|ספטמבר|אוקטובר|נובמבר|דצמבר)(?![א-ת])(?:\s+(\d{4}))?',
+                message_lower
+            )
+            month = months_he.get(match.group(1)) if match else None
+            if not match:
+                # English needs a preposition ("may" alone is usually not the month)
+                match = re.search(
+                    r'\b(?:in|during|throughout|for)\s+(' + '|'.join(months_en) + r')\b(?:\s+(\d{4}))?',
+                    message_lower
+                )
+                month = months_en.get(match.group(1)) if match else None
+            if month:
+                year = int(match.group(2)) if match.group(2) else current_year
+                return self._month_range(month, year)
+        
+        return None
+    
+    @staticmethod
+    def _month_range(month: int, year: int) -> Dict[str, Any]:
+        """First to last day of the month, flagged is_month_range"""
+        # First day of month
+        check_in = datetime(year, month, 1)
+        # Last day of month
+        if month == 12:
+            check_out = datetime(year + 1, 1, 1) - timedelta(days=1)
+        else:
+            check_out = datetime(year, month + 1, 1) - timedelta(days=1)
+        return {
+            'check_in': check_in.strftime('%Y-%m-%d'),
+            'check_out': check_out.strftime('%Y-%m-%d'),
+            'is_month_range': True,
+            'month': month,
+            'year': year
+        }
+    
+    def extract_stay_nights(self, message: str) -> Optional[int]:
+        """
+        Extract stay length from message
+        Supports formats like:
+        - "2 לילות" / "3 nights"
+        - "לילה אחד" / "שני לילות" / "שלושה לילות"
+        - "סופ\"ש" -> 2
+        
+        Returns: number of nights or None
+        """
+        message_lower = message.lower()
+        
+        match = re.search(r'(\d{1,2})\s*(?:לילות|לילה|nights?)', message_lower)
+        if match:
+            nights = int(match.group(1))
+            return nights if nights > 0 else None
+        
+        if re.search(r'לילה\s+אחד|one\s+night', message_lower):
+            return 1
+        
+        number_words = {
+            'שני': 2, 'שתי': 2, 'שלושה': 3, 'שלוש': 3, 'ארבעה': 4, 'ארבע': 4,
+            'חמישה': 5, 'חמש': 5, 'שישה': 6, 'שש': 6, 'שבעה': 7, 'שבע': 7,
+            'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+        }
+        match = re.search(r'(\S+)\s+(?:לילות|nights)', message_lower)
+        if match and match.group(1) in number_words:
+            return number_words[match.group(1)]
+        
+        if 'סופ"ש' in message_lower or 'סופש' in message_lower or 'weekend' in message_lower:
+            return 2
+        
         return None
     
     def extract_cabin_id(self, message: str) -> Optional[str]:
@@ -497,6 +561,27 @@ class Agent:
                 return response
             return "❌ לא מצאתי צימרים זמינים בתאריכים שביקשת."
         
+        # Flexible dates ("2 לילות במרץ")
+        if intent == 'availability' and 'flexible' in tool_results:
+            stays = tool_results['flexible']
+            search = tool_results.get('context', {})
+            nights = search.get('nights', 0)
+            month_name = search.get('month_name', 'החודש')
+            if stays:
+                response = f"✅ מצאתי {len(stays)} צימרים עם {nights} לילות פנויים ב{month_name}:\n\n"
+                for stay in stays:
+                    name = stay.get('name', 'N/A')
+                    cabin_id = stay.get('cabin_id', 'N/A')
+                    area = stay.get('area', 'N/A')
+                    response += f"🏡 {name} ({cabin_id}) - {area}\n"
+                    for window in stay.get('windows', [])[:3]:
+                        response += f"📅 {window['check_in']} → {window['check_out']} | 💰 {window['total_price']:.0f}₪\n"
+                    response += "\n"
+                
+                response += "איזה תאריך ואיזה צימר מתאימים לך? אני יכול לתת הצעת מחיר מפורטת או לשריין."
+                return response
+            return f"❌ לא מצאתי {nights} לילות פנויים ב{month_name}."
+        
         # Quote
         if intent == 'quote' and 'quote' in tool_results:
             quote = tool_results['quote']
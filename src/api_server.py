@@ -3,36 +3,40 @@ API Server for ZimmerBot
 FastAPI-based REST API for cabin booking system
 """
 
+import math
 import os
+import threading
+import time
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field, TypeAdapter
 from fastapi.staticfiles import StaticFiles
 
 from src.main import (
     read_cabins_from_sheet,
     build_calendar_service,
     find_available_cabins,
+    filter_cabin,
     compute_price_for_stay,
-    create_calendar_event,
     parse_datetime_local,
     to_utc,
     parse_features_arg,
-    normalize_text,
     is_cabin_available,
     list_calendar_events,
     ISRAEL_TZ,
     _to_rfc3339_z,
     _event_interval_utc,
+    _thread_calendar_service,
 )
 from datetime import datetime, timedelta
 from src.pricing import PricingEngine
 from src.db import (
-    read_cabins_from_db,
     save_customer_to_db,
     save_booking_to_db,
     get_cabin_by_id,
@@ -57,8 +61,36 @@ from src.db import (
     delete_business_fact,
 )
 from src.hold import get_hold_manager
-from src.payment import get_payment_manager
-from src.email_service import get_email_service
+from src.calendar_mirror import CALENDAR_MIRROR_ENABLED, get_calendar_mirror
+from src.interval_index import IntervalIndex
+from src.occupancy import OccupancyMatrix
+from src.calendar_watch import get_calendar_watch_manager
+from src.calendar_outbox import get_calendar_outbox
+from src.availability_cache import get_availability_cache
+from src.cabin_catalog import CABIN_NAME_ALIASES, get_cabin_catalog
+from src.image_manifest import get_image_manifest
+from src.static_assets import PrecompressedStaticFiles
+from src.fast_responses import GZIP_LEVEL, GZIP_MIN_BYTES, FastJSONResponse, SelectiveGZipMiddleware
+from src.image_variants import (
+    IMMUTABLE_CACHE_CONTROL,
+    SHORT_CACHE_CONTROL,
+    get_image_variants,
+    preferred_format,
+    variant_urls,
+    variant_urls_for_cabin,
+)
+from src.io_pools import run_io, offload, get_io_pools_stats
+from src.calendar_async import CALENDAR_ASYNC_ENABLED, get_async_calendar_client, close_async_calendar_client
+from src.quota import (
+    PRIORITY_BROWSE,
+    PRIORITY_COMMIT,
+    PRIORITY_INTERACTIVE,
+    GoogleQuotaExceeded,
+    get_quota_governor,
+    quota_context,
+)
+from src.resilience import CircuitOpenError, get_circuit_breaker, get_hedged_reader
+from src.credentials import TOKEN_PROFILES, get_credential_manager
 from src.agent import Agent
 from decimal import Decimal
 
@@ -66,14 +98,14 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 load_dotenv(BASE_DIR / ".env")
 
 # scopes רחבים יותר כדי שלא תקבל 403 על פעולות שנראות "קריאה" אבל בפועל דורשות יותר
-REQUIRED_SCOPES = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive.readonly",
-    "https://www.googleapis.com/auth/calendar",
-]
+REQUIRED_SCOPES = TOKEN_PROFILES["api"]["scopes"]
 
 TOKEN_FILE = "data/token_api.json"
 
+# Load credentials, Calendar service and cabins in the background right after startup,
+# so the server accepts connections at once and the first request does not pay for them
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").strip().lower() in ("1", "true", "yes")
+
 # תצורת תיקיות סטטיות
 TOOLS_DIR = BASE_DIR / "tools"
 DATA_DIR = BASE_DIR / "data"
@@ -84,54 +116,11 @@ DATA_DIR.mkdir(exist_ok=True)
 def get_credentials_api():
     """
     API credentials with a dedicated token file: data/token_api.json
-    Always enforces REQUIRED_SCOPES.
+    Always enforces REQUIRED_SCOPES. Loaded once per process; the credential manager
+    refreshes the token in the background, so this never refreshes on the request path.
     """
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-
-    data_dir = BASE_DIR / "data"
-    data_dir.mkdir(exist_ok=True)
-
-    token_path = data_dir / "token_api.json"
-
-    creds = None
-
-    if token_path.exists():
-        try:
-            creds = Credentials.from_authorized_user_file(str(token_path), scopes=REQUIRED_SCOPES)
-        except Exception:
-            creds = None
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-            except Exception:
-                creds = None
-
-        if not creds or not creds.valid:
-            candidates = [
-                BASE_DIR / "data" / "credentials.json",
-                BASE_DIR / "credentials.json",
-            ]
-            cred_file = next((p for p in candidates if p.exists()), None)
-            if not cred_file:
-                raise FileNotFoundError(
-                    "Missing credentials.json. Put it in data/credentials.json or in the project root."
-                )
-
-            flow = InstalledAppFlow.from_client_secrets_file(str(cred_file), scopes=REQUIRED_SCOPES)
-
-            # Force consent so Google actually re-grants scopes
-            try:
-                creds = flow.run_local_server(port=0, prompt="consent")
-            except TypeError:
-                creds = flow.run_local_server(port=0)
-
-        token_path.write_text(creds.to_json(), encoding="utf-8")
+    return get_credential_manager("api").get_credentials()
 
-    return creds
 
 
 app = FastAPI(
@@ -155,11 +144,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Large JSON payloads (admin lists, /cabins) gzipped above GZIP_MIN_BYTES
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=GZIP_LEVEL)
+
+# Google quota priority per route (everything else is browsing)
+QUOTA_PRIORITY_BY_ROUTE = {
+    "/book": PRIORITY_COMMIT,
+    "/hold": PRIORITY_COMMIT,
+    "/hold/{hold_id}": PRIORITY_COMMIT,
+    "/admin/bookings/{booking_id}/cancel": PRIORITY_COMMIT,
+    "/webhooks/stripe": PRIORITY_COMMIT,
+    "/agent/chat": PRIORITY_INTERACTIVE,
+}
+
+
+class QuotaRoute(APIRoute):
+    """
+    Google calls made while serving a request are charged to its route, at the route's priority.
+    Resolved once per route when it is declared; mounts (/zimmers_pic, /tools, /data) never pay for it.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        priority = QUOTA_PRIORITY_BY_ROUTE.get(self.path, PRIORITY_BROWSE)
+
+        async def quota_route_handler(request: Request) -> Response:
+            with quota_context(f"{request.method} {self.path}", priority):
+                return await handler(request)
+
+        return quota_route_handler
+
+
+# Must be set before the first route is declared
+app.router.route_class = QuotaRoute
+
+# Endpoint error handling re-raises these unchanged (everything else becomes a 500)
+PASSTHROUGH_ERRORS = (HTTPException, GoogleQuotaExceeded, CircuitOpenError)
+
+
+@app.exception_handler(GoogleQuotaExceeded)
+@app.exception_handler(CircuitOpenError)
+async def google_unavailable_handler(request: Request, exc: Exception):
+    """Out of Calendar quota / circuit open: 503 with Retry-After, so clients back off"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 # mounts פעילים ומסודרים (פעם אחת בלבד)
 # /tools מגיש HTML כלים
 # /data מגיש קבצי JSON (כמו features_catalog.json)
-app.mount("/tools", StaticFiles(directory=str(TOOLS_DIR), html=True), name="tools")
-app.mount("/data", StaticFiles(directory=str(DATA_DIR)), name="data")
+# Both precompressed (gzip/brotli) with content-hash ETags
+tools_static = PrecompressedStaticFiles(directory=str(TOOLS_DIR), html=True)
+data_static = PrecompressedStaticFiles(directory=str(DATA_DIR))
+app.mount("/tools", tools_static, name="tools")
+app.mount("/data", data_static, name="data")
 app.mount("/zimmers_pic", StaticFiles(directory=str(BASE_DIR / "zimmers_pic")), name="zimmers_pic")
 
 # היה אצלך mount כפול נוסף - משאיר כתיעוד ולא מפעיל
@@ -168,29 +209,201 @@ app.mount("/zimmers_pic", StaticFiles(directory=str(BASE_DIR / "zimmers_pic")),
 
 _creds = None
 _service = None
-_cabins = None
+_service_lock = threading.Lock()
+
+# Searches, calendar views and holds read the local calendar mirror; /book always re-checks Google live
+READ_BACKEND = "mirror" if CALENDAR_MIRROR_ENABLED else None
+
+
+def _cabin_interval_index(service, cal_id: str, start_utc: datetime, end_utc: datetime) -> IntervalIndex:
+    """Interval index of one cabin calendar covering [start_utc, end_utc)"""
+    # The mirror only holds events from its synced window on; older ranges are read live
+    if CALENDAR_MIRROR_ENABLED and get_calendar_mirror().covers(cal_id, start_utc):
+        return get_calendar_mirror().get_index(service, cal_id)
+    events = list_calendar_events(service, cal_id, _to_rfc3339_z(start_utc), _to_rfc3339_z(end_utc))
+    return IntervalIndex.from_events(events)
+
+
+def _occupancy_matrix(service, cal_ids: List[str], start_day, end_day) -> OccupancyMatrix:
+    """Booked nights of the given cabin calendars for nights start_day .. end_day (Israel dates)"""
+    start_utc, end_utc = _local_dates_to_utc_range(start_day, end_day)
+    indexes = {cal_id: _cabin_interval_index(service, cal_id, start_utc, end_utc) for cal_id in cal_ids if cal_id}
+    return OccupancyMatrix.from_indexes(indexes, start_day, end_day, ISRAEL_TZ)
+
+
+def _flexible_stays(
+    service,
+    cabins: List[dict],
+    start_day,
+    end_day,
+    nights: int,
+    adults: Optional[int] = None,
+    kids: Optional[int] = None,
+    area: Optional[str] = None,
+    wanted_features: Optional[List[str]] = None,
+    max_windows_per_cabin: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Free stays of `nights` nights inside nights start_day .. end_day (Israel dates) for every
+    cabin that passes the filters. Each cabin keeps its cheapest windows (earliest first on a tie),
+    cabins are ranked by their cheapest window.
+
+    Returns:
+        [{"cabin": cabin, "windows": [{"check_in", "check_out", "nights", "regular_nights",
+          "weekend_nights", "total_price"}]}]
+    """
+    candidates = []
+    for cabin in cabins:
+        cal_id = cabin.get("calendar_id") or cabin.get("calendarId")
+        if cal_id and filter_cabin(cabin, adults, kids, area, wanted_features or [])[0]:
+            candidates.append((cabin, cal_id))
+    if not candidates:
+        return []
+
+    occupancy = _occupancy_matrix(service, [cal_id for _, cal_id in candidates], start_day, end_day)
+    free_windows = occupancy.free_windows(nights)
+
+    results = []
+    for cabin, cal_id in candidates:
+        windows = []
+        for day in free_windows.get(cal_id, []):
+            check_in_local = datetime(day.year, day.month, day.day, tzinfo=ISRAEL_TZ)
+            check_out_local = check_in_local + timedelta(days=nights)
+            pricing = compute_price_for_stay(cabin, check_in_local, check_out_local)
+            windows.append({
+                "check_in": day.isoformat(),
+                "check_out": check_out_local.date().isoformat(),
+                "nights": pricing["nights"],
+                "regular_nights": pricing["regular"],
+                "weekend_nights": pricing["weekend"],
+                "total_price": pricing["total"],
+            })
+        if not windows:
+            continue
+        windows.sort(key=lambda w: (w["total_price"], w["check_in"]))
+        results.append({"cabin": cabin, "windows": windows[:max_windows_per_cabin]})
+
+    results.sort(key=lambda r: (r["windows"][0]["total_price"], r["windows"][0]["check_in"]))
+    return results
+
+
+def _local_dates_to_utc_range(check_in, check_out) -> tuple:
+    """YYYY-MM-DD (or date) stay -> UTC range covering both whole days"""
+    start_day = datetime.fromisoformat(str(check_in)[:10]).date()
+    end_day = datetime.fromisoformat(str(check_out)[:10]).date() + timedelta(days=1)
+    start_local = datetime(start_day.year, start_day.month, start_day.day, tzinfo=ISRAEL_TZ)
+    end_local = datetime(end_day.year, end_day.month, end_day.day, tzinfo=ISRAEL_TZ)
+    return to_utc(start_local), to_utc(end_local)
+
+
+def _invalidate_calendar(
+    cal_id: Optional[str],
+    start_utc: Optional[datetime] = None,
+    end_utc: Optional[datetime] = None,
+) -> None:
+    """
+    Our own calendar writes must be visible to the next read:
+    marks the cabin's mirror stale and drops cached searches that cover it and overlap the dates.
+    cal_id=None drops overlapping searches of every cabin.
+    """
+    if CALENDAR_MIRROR_ENABLED and cal_id:
+        get_calendar_mirror().invalidate(cal_id)
+    get_availability_cache().invalidate(cal_id, start_utc, end_utc)
+
+
+async def run_google(fn, *args, **kwargs):
+    """
+    Run fn on the Google IO pool. Calendar service arguments are swapped for the worker
+    thread's own service (googleapiclient services are not thread safe).
+    """
+    def own(value):
+        return _thread_calendar_service(value) if hasattr(value, "events") else value
+
+    def call():
+        return fn(*[own(a) for a in args], **{k: own(v) for k, v in kwargs.items()})
+
+    return await run_io("google", call)
+
+
+async def calendar_is_available(service, cal_id: str, start_utc: datetime, end_utc: datetime, backend: Optional[str] = None):
+    """
+    is_cabin_available for hold/book commits; live backends go through the async Calendar client
+    (no thread per call). Inserts still waiting in the calendar outbox count as conflicts too.
+    """
+    if CALENDAR_ASYNC_ENABLED and backend != "mirror":
+        ok, conflicts = await get_async_calendar_client(_creds).is_cabin_available(cal_id, start_utc, end_utc, backend=backend)
+    else:
+        ok, conflicts = await run_google(is_cabin_available, service, cal_id, start_utc, end_utc, backend=backend)
+    if ok:
+        conflicts = await run_io("db", _outbox_pending_conflicts, cal_id, start_utc, end_utc)
+        ok = not conflicts
+    return ok, conflicts
+
+
+def _hold_expires_at(hold_data: dict) -> Optional[datetime]:
+    """Hold expiry as an aware datetime (HoldManager stores naive server-local time)"""
+    if not hold_data.get("expires_at"):
+        return None
+    return datetime.fromisoformat(hold_data["expires_at"]).astimezone()
+
+
+def _outbox_pending_conflicts(cal_id: str, start_utc: datetime, end_utc: datetime) -> list:
+    """Open outbox inserts over the dates; none when the outbox cannot be read (DB down)"""
+    try:
+        return get_calendar_outbox().pending_conflicts(cal_id, start_utc, end_utc)
+    except Exception as e:
+        print(f"Warning: Could not read calendar outbox: {e}")
+        return []
+
+
+def _outbox_busy_calendars(cal_ids: list, start_utc: datetime, end_utc: datetime) -> set:
+    """Calendars with an open outbox insert over the dates; none when the outbox cannot be read"""
+    try:
+        return get_calendar_outbox().busy_calendars(cal_ids, start_utc, end_utc)
+    except Exception as e:
+        print(f"Warning: Could not read calendar outbox: {e}")
+        return set()
+
+
+async def without_pending_inserts(cabins: list, start_utc: datetime, end_utc: datetime) -> list:
+    """
+    Search results minus cabins with an open calendar outbox insert over the dates -
+    booked or held here, but not (or never successfully) written to Google yet
+    """
+    if not cabins:
+        return cabins
+    busy = await run_io(
+        "db",
+        _outbox_busy_calendars,
+        [c.get("calendar_id") or c.get("calendarId") for c in cabins],
+        start_utc,
+        end_utc,
+    )
+    return [c for c in cabins if (c.get("calendar_id") or c.get("calendarId")) not in busy]
 
 
 def get_service():
     """
     Get calendar service and cabins
-    Tries DB first, falls back to Google Sheets if DB unavailable
-    """
-    global _creds, _service, _cabins
-    if _creds is None:
-        _creds = get_credentials_api()
-    if _service is None:
-        _service = build_calendar_service(_creds)
-    if _cabins is None:
-        # Try DB first, fallback to Sheets
-        _cabins = read_cabins_from_db()
-        if not _cabins:
-            # Fallback to Google Sheets
-            _cabins = read_cabins_from_sheet(_creds)
-    # Always reload cabins to ensure we have latest data with cabin_id_string
-    # This ensures cabin_id_string is always available
-    _cabins = read_cabins_from_db() or read_cabins_from_sheet(_creds)
-    return _service, _cabins
+    Cabins come from the cabin catalog: DB first, Google Sheets if the DB has none;
+    loaded once and reloaded only when the cabins table changes (src/cabin_catalog.py)
+    """
+    global _creds, _service
+    # Called from several IO pool threads at once - create credentials/service only once
+    with _service_lock:
+        if _creds is None:
+            _creds = get_credentials_api()
+        if _service is None:
+            _service = build_calendar_service(_creds)
+    return _service, get_cabin_catalog().get_cabins(_creds)
+
+
+def resolve_cabin(cabin_ref: Optional[str]) -> Optional[dict]:
+    """
+    Cabin by cabin_id_string (ZB01), cabin_id (UUID), name, Hebrew alias or calendar_id (tail).
+    Call after get_service(): uses the catalog's resolver index as loaded, no DB access.
+    """
+    return get_cabin_catalog().resolver.resolve(cabin_ref)
 
 
 class AvailabilityRequest(BaseModel):
@@ -202,6 +415,17 @@ class AvailabilityRequest(BaseModel):
     features: Optional[str] = Field(None, description="Comma-separated features (e.g., 'jacuzzi,pool')")
 
 
+class FlexibleAvailabilityRequest(BaseModel):
+    start_date: str = Field(..., description="First night of the window (YYYY-MM-DD)")
+    end_date: str = Field(..., description="Last night of the window (YYYY-MM-DD)")
+    nights: int = Field(..., ge=1, description="Stay length in nights")
+    adults: Optional[int] = Field(None, description="Number of adults")
+    kids: Optional[int] = Field(None, description="Number of kids")
+    area: Optional[str] = Field(None, description="Area filter")
+    features: Optional[str] = Field(None, description="Comma-separated features (e.g., 'jacuzzi,pool')")
+    max_windows_per_cabin: int = Field(3, ge=1, description="Cheapest windows to return per cabin")
+
+
 class AddonItem(BaseModel):
     name: str = Field(..., description="Addon name")
     price: float = Field(..., description="Addon price")
@@ -250,6 +474,24 @@ class AvailabilityResponse(BaseModel):
     max_kids: Optional[int] = None
     features: Optional[str] = None
     images_urls: Optional[List[str]] = None
+    stale: bool = False  # answered from the last calendar snapshot while Google was unavailable
+
+
+class StayWindow(BaseModel):
+    check_in: str
+    check_out: str
+    nights: int
+    regular_nights: int
+    weekend_nights: int
+    total_price: float
+
+
+class FlexibleAvailabilityResponse(BaseModel):
+    cabin_id: str
+    name: Optional[str] = None
+    area: Optional[str] = None
+    best_price: float
+    windows: List[StayWindow]
 
 
 class BookingResponse(BaseModel):
@@ -258,6 +500,7 @@ class BookingResponse(BaseModel):
     booking_id: Optional[str] = None
     event_id: Optional[str] = None
     event_link: Optional[str] = None
+    calendar_mutation_id: Optional[int] = None  # queued calendar insert, see GET /admin/calendar-outbox/{id}
     payment_intent_id: Optional[str] = None
     client_secret: Optional[str] = None
     message: str
@@ -303,6 +546,8 @@ async def root():
             "health": "/health",
             "cabins": "/cabins",
             "availability": "/availability",
+            "availability_heatmap": "/availability/heatmap",
+            "availability_flexible": "/availability/flexible",
             "quote": "/quote",
             "hold": "/hold",
             "book": "/book",
@@ -313,13 +558,32 @@ async def root():
                 "bookings": "/admin/bookings",
                 "booking_by_id": "/admin/bookings/{id}",
                 "audit": "/admin/audit",
+                "calendar_mirror": "/admin/calendar-mirror",
+                "calendar_watch": "/admin/calendar-watch",
+                "availability_cache": "/admin/availability-cache",
+                "io_pools": "/admin/io-pools",
+                "google_quota": "/admin/google-quota",
+                "google_resilience": "/admin/google-resilience",
+                "calendar_outbox": "/admin/calendar-outbox",
+                "calendar_mutation_by_id": "/admin/calendar-outbox/{id}",
+                "calendar_mutation_retry": "/admin/calendar-outbox/{id}/retry",
+                "cabin_catalog": "/admin/cabin-catalog",
+                "cabins_reload": "/admin/cabins/reload",
+                "image_manifest": "/admin/image-manifest",
+                "image_variants": "/admin/image-variants",
+                "static_assets": "/admin/static-assets",
+            },
+            "webhooks": {
+                "stripe": "/webhooks/stripe",
+                "calendar": "/webhooks/calendar",
             },
         },
     }
 
 
 @app.get("/health")
-async def health():
+@offload("google")
+def health():
     # בריאות עם פירוט, כדי להבין בדיוק איפה זה נופל
     resp = {
         "token_file": TOKEN_FILE,
@@ -329,6 +593,7 @@ async def health():
     try:
         creds = get_credentials_api()
         resp["creds_scopes"] = list(getattr(creds, "scopes", []) or [])
+        resp["token"] = get_credential_manager("api").get_stats()
     except Exception as e:
         resp["status"] = "unhealthy"
         resp["error_credentials"] = str(e)
@@ -352,75 +617,113 @@ async def health():
     return resp
 
 
+_cabins_adapter = TypeAdapter(list[CabinInfo])
+
+# (catalog version, validated /cabins body) - rebuilt once per cabin catalog version
+_cabins_json: Optional[tuple] = None
+
+
+def _catalog_number(value: Any, cast) -> Any:
+    """cast(value); None for empty, zero, NaN or infinite (Sheets cells), which JSON has no number for"""
+    if not value:
+        return None
+    number = float(value)
+    return cast(number) if math.isfinite(number) else None
+
+
+def _cabin_infos(cabins: List[dict]) -> List[dict]:
+    """Catalog cabins as CabinInfo dicts"""
+    result = []
+    for cabin in cabins:
+        # Convert features from dict to string if needed
+        features = cabin.get("features")
+        if isinstance(features, dict):
+            # If features is a dict (JSONB), check if it has 'raw' key
+            if 'raw' in features:
+                features = features['raw']
+            else:
+                # Otherwise, convert to comma-separated string from keys
+                features_str = ",".join([k for k, v in features.items() if v])
+                features = features_str if features_str else None
+        elif features and not isinstance(features, str):
+            features = str(features)
+        
+        # Always use cabin_id_string (ZB01, ZB02, etc.) - this is what we want to display
+        # The cabin_id_string should be set from DB (ZB01, ZB02, ZB03, etc.)
+        display_cabin_id = cabin.get("cabin_id_string")
+        
+        # If cabin_id_string is not set, it means the cabin doesn't have one in DB
+        # This shouldn't happen if cabins were imported correctly
+        if not display_cabin_id:
+            # Fallback: use cabin_id (UUID) only if cabin_id_string is truly missing
+            # But this shouldn't happen if cabins were imported correctly
+            display_cabin_id = cabin.get("cabin_id", "UNKNOWN")
+            # Don't print warning for every request - it's too noisy
+            # print(f"Warning: Cabin {cabin.get('name')} missing cabin_id_string. Run: python database/import_cabins_to_db.py")
+        
+        # Ensure images_urls is always a list
+        images_urls = cabin.get("images_urls") or []
+        if isinstance(images_urls, str):
+            # If it's a string, try to parse as JSON or split by comma
+            import json
+            try:
+                images_urls = json.loads(images_urls)
+            except:
+                # If not JSON, split by comma
+                images_urls = [img.strip() for img in images_urls.split(",") if img.strip()]
+        elif not isinstance(images_urls, list):
+            # If it's not a list, convert to list
+            images_urls = [images_urls] if images_urls else []
+        
+        result.append({
+            "cabin_id": str(display_cabin_id),  # Always use cabin_id_string (ZB01) if available
+            "name": cabin.get("name"),
+            "area": cabin.get("area"),
+            "max_adults": _catalog_number(cabin.get("max_adults"), int),
+            "max_kids": _catalog_number(cabin.get("max_kids"), int),
+            "features": features,
+            "base_price_night": _catalog_number(cabin.get("base_price_night"), float),
+            "weekend_price": _catalog_number(cabin.get("weekend_price"), float),
+            "calendar_id": cabin.get("calendar_id") or cabin.get("calendarId"),
+            "images_urls": images_urls,
+        })
+    return result
+
+
+def _cabins_body(catalog_version: int, cabins: List[dict]) -> bytes:
+    """
+    /cabins JSON of a catalog version: validated against CabinInfo and serialized once,
+    then the same bytes are sent until the catalog changes
+    """
+    global _cabins_json
+    cached = _cabins_json
+    if cached is not None and cached[0] == catalog_version:
+        return cached[1]
+    body = _cabins_adapter.dump_json(_cabins_adapter.validate_python(_cabin_infos(cabins)))
+    _cabins_json = (catalog_version, body)
+    return body
+
+
 @app.get("/cabins", response_model=list[CabinInfo])
-async def list_cabins():
+@offload("db")
+def list_cabins():
     try:
+        # Version first: a reload in between rebuilds the body on the next request, never caches old cabins as new
+        catalog_version = get_cabin_catalog().version
         _, cabins = get_service()
-        result = []
-        for cabin in cabins:
-            # Convert features from dict to string if needed
-            features = cabin.get("features")
-            if isinstance(features, dict):
-                # If features is a dict (JSONB), check if it has 'raw' key
-                if 'raw' in features:
-                    features = features['raw']
-                else:
-                    # Otherwise, convert to comma-separated string from keys
-                    features_str = ",".join([k for k, v in features.items() if v])
-                    features = features_str if features_str else None
-            elif features and not isinstance(features, str):
-                features = str(features)
-            
-            # Always use cabin_id_string (ZB01, ZB02, etc.) - this is what we want to display
-            # The cabin_id_string should be set from DB (ZB01, ZB02, ZB03, etc.)
-            display_cabin_id = cabin.get("cabin_id_string")
-            
-            # If cabin_id_string is not set, it means the cabin doesn't have one in DB
-            # This shouldn't happen if cabins were imported correctly
-            if not display_cabin_id:
-                # Fallback: use cabin_id (UUID) only if cabin_id_string is truly missing
-                # But this shouldn't happen if cabins were imported correctly
-                display_cabin_id = cabin.get("cabin_id", "UNKNOWN")
-                # Don't print warning for every request - it's too noisy
-                # print(f"Warning: Cabin {cabin.get('name')} missing cabin_id_string. Run: python database/import_cabins_to_db.py")
-            
-            # Ensure images_urls is always a list
-            images_urls = cabin.get("images_urls") or []
-            if isinstance(images_urls, str):
-                # If it's a string, try to parse as JSON or split by comma
-                import json
-                try:
-                    images_urls = json.loads(images_urls)
-                except:
-                    # If not JSON, split by comma
-                    images_urls = [img.strip() for img in images_urls.split(",") if img.strip()]
-            elif not isinstance(images_urls, list):
-                # If it's not a list, convert to list
-                images_urls = [images_urls] if images_urls else []
-            
-            result.append(
-                CabinInfo(
-                    cabin_id=display_cabin_id,  # Always use cabin_id_string (ZB01) if available
-                    name=cabin.get("name"),
-                    area=cabin.get("area"),
-                    max_adults=int(cabin.get("max_adults", 0)) if cabin.get("max_adults") else None,
-                    max_kids=int(cabin.get("max_kids", 0)) if cabin.get("max_kids") else None,
-                    features=features,
-                    base_price_night=float(cabin.get("base_price_night", 0)) if cabin.get("base_price_night") else None,
-                    weekend_price=float(cabin.get("weekend_price", 0)) if cabin.get("weekend_price") else None,
-                    calendar_id=cabin.get("calendar_id") or cabin.get("calendarId"),
-                    images_urls=images_urls,
-                )
-            )
-        return result
+        return Response(
+            content=_cabins_body(catalog_version, cabins),
+            media_type="application/json",
+            headers={"X-Cabin-Catalog-Version": str(catalog_version)},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading cabins: {str(e)}")
 
 
 @app.post("/availability", response_model=list[AvailabilityResponse])
-async def check_availability(request: AvailabilityRequest):
+async def check_availability(request: AvailabilityRequest, response: Response):
     try:
-        service, cabins = get_service()
+        service, cabins = await run_io("db", get_service)
 
         check_in_local = parse_datetime_local(request.check_in)
         check_out_local = parse_datetime_local(request.check_out)
@@ -429,19 +732,63 @@ async def check_availability(request: AvailabilityRequest):
 
         wanted_features = parse_features_arg(request.features)
 
-        candidates = find_available_cabins(
-            service=service,
-            cabins=cabins,
-            check_in_utc=check_in_utc,
-            check_out_utc=check_out_utc,
-            adults=request.adults,
-            kids=request.kids,
-            area=request.area,
-            wanted_features=wanted_features,
-            verbose=False,
+        # Identical searches are served from the result cache until a write touches them
+        cache = get_availability_cache()
+        cache_key = cache.make_key(
+            check_in_utc, check_out_utc, request.adults, request.kids, request.area, wanted_features
         )
+        # Before the search: a write landing while it runs keeps its result out of the cache
+        cache_generation = cache.generation()
+        result = cache.get(cache_key)
+        cache_hit = result is not None
+
+        candidates = []
+        search_stats = {"external_calls": 0}
+        stale = False
+        if not cache_hit:
+            try:
+                candidates = await run_google(
+                    find_available_cabins,
+                    service=service,
+                    cabins=cabins,
+                    check_in_utc=check_in_utc,
+                    check_out_utc=check_out_utc,
+                    adults=request.adults,
+                    kids=request.kids,
+                    area=request.area,
+                    wanted_features=wanted_features,
+                    verbose=False,
+                    backend=READ_BACKEND,
+                    batch=True,
+                    stats=search_stats,
+                )
+            except (CircuitOpenError, GoogleQuotaExceeded):
+                # Google is degraded: answer from the last mirrored calendars instead of failing, flagged stale
+                snapshot_age = get_calendar_mirror().snapshot_age(
+                    [c.get("calendar_id") or c.get("calendarId") for c in cabins]
+                )
+                if snapshot_age is None:
+                    raise
+                candidates = await run_google(
+                    find_available_cabins,
+                    service=service,
+                    cabins=cabins,
+                    check_in_utc=check_in_utc,
+                    check_out_utc=check_out_utc,
+                    adults=request.adults,
+                    kids=request.kids,
+                    area=request.area,
+                    wanted_features=wanted_features,
+                    verbose=False,
+                    max_workers=1,
+                    backend="snapshot",
+                )
+                stale = True
+                response.headers["X-Availability-Stale"] = "true"
+                response.headers["X-Snapshot-Age"] = str(snapshot_age)
+            candidates = await without_pending_inserts(candidates, check_in_utc, check_out_utc)
+            result = []
 
-        result = []
         for cabin in candidates:
             pricing = compute_price_for_stay(cabin, check_in_local, check_out_local)
             
@@ -461,60 +808,8 @@ async def check_availability(request: AvailabilityRequest):
             # Use cabin_id_string if available (ZB01, ZB02, etc.) for easier booking
             display_cabin_id = cabin.get("cabin_id_string") or cabin.get("cabin_id", "UNKNOWN")
             
-            # Check for local images first, then use images_urls from DB
-            local_images = []
-            import os
-            from pathlib import Path
-            
-            # Get all possible search IDs - try to match by name or find cabin_id_string
-            search_ids = []
-            
-            # 1. Try cabin_id_string if available (ZB01, ZB02, etc.)
-            if cabin.get("cabin_id_string") and len(str(cabin.get("cabin_id_string"))) <= 20:
-                search_ids.append(str(cabin.get("cabin_id_string")))
-            
-            # 2. Try cabin_id if it's a short string (not UUID)
-            cabin_id_val = cabin.get("cabin_id", "")
-            if cabin_id_val and len(str(cabin_id_val)) <= 20 and "-" not in str(cabin_id_val):
-                search_ids.append(str(cabin_id_val))
-            
-            # 3. Try to find by matching name with directory names in zimmers_pic
-            # Map known cabin names to their IDs
-            if not search_ids:
-                cabin_name = cabin.get("name", "")
-                name_to_id_map = {
-                    "יולי": "ZB01",
-                    "אמי": "ZB02", 
-                    "מורן": "ZB03",
-                    "מורני": "ZB03"
-                }
-                for name_key, cabin_id_str in name_to_id_map.items():
-                    if name_key in cabin_name:
-                        search_ids.append(cabin_id_str)
-                        break
-            
-            # 4. If still no match, try all directories in zimmers_pic
-            if not search_ids:
-                pic_base_dir = BASE_DIR / "zimmers_pic"
-                if pic_base_dir.exists():
-                    # Just use the first directory as fallback (not ideal but works)
-                    for pic_dir in sorted(pic_base_dir.iterdir()):
-                        if pic_dir.is_dir() and (any(pic_dir.glob("*.jpg")) or any(pic_dir.glob("*.jpeg")) or any(pic_dir.glob("*.png"))):
-                            search_ids.append(pic_dir.name)
-                            break
-            
-            # Search for images in the found directories
-            for search_id in search_ids:
-                pic_dir = BASE_DIR / "zimmers_pic" / str(search_id)
-                if pic_dir.exists() and pic_dir.is_dir():
-                    for img_file in sorted(pic_dir.glob("*.jpg")):
-                        local_images.append(f"/zimmers_pic/{search_id}/{img_file.name}")
-                    for img_file in sorted(pic_dir.glob("*.jpeg")):
-                        local_images.append(f"/zimmers_pic/{search_id}/{img_file.name}")
-                    for img_file in sorted(pic_dir.glob("*.png")):
-                        local_images.append(f"/zimmers_pic/{search_id}/{img_file.name}")
-                    if local_images:
-                        break  # Found images, no need to check other IDs
+            # Local images first (card-size variants, fingerprinted URLs), then images_urls from DB
+            local_images = variant_urls_for_cabin(cabin, "card", CABIN_NAME_ALIASES)
             
             # Use local images if available, otherwise use images_urls from DB
             final_images = local_images if local_images else (cabin.get("images_urls") or [])
@@ -532,14 +827,28 @@ async def check_availability(request: AvailabilityRequest):
                     max_kids=int(cabin.get("max_kids", 0)) if cabin.get("max_kids") else None,
                     features=features,
                     images_urls=final_images,
+                    stale=stale,
                 )
             )
 
+        if not cache_hit and not stale:
+            considered = [
+                c.get("calendar_id") or c.get("calendarId")
+                for c in cabins
+                if filter_cabin(c, request.adults, request.kids, request.area, wanted_features)[0]
+            ]
+            cache.set(cache_key, result, check_in_utc, check_out_utc, considered, generation=cache_generation)
+
+        response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+        response.headers["X-External-Calls"] = str(search_stats["external_calls"])
+
         # Save audit log for availability search
         try:
             import uuid
             search_id = str(uuid.uuid4())
-            save_audit_log(
+            await run_io(
+                "db",
+                save_audit_log,
                 table_name="availability_search",
                 record_id=search_id,
                 action="INSERT",  # Changed from "SEARCH" to "INSERT" to match schema constraint
@@ -559,6 +868,8 @@ async def check_availability(request: AvailabilityRequest):
             print(f"Warning: Failed to save audit log: {audit_error}")
 
         return result
+    except PASSTHROUGH_ERRORS:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
     except Exception as e:
@@ -572,29 +883,11 @@ async def get_cabin_calendar(cabin_id: str, start_date: Optional[str] = None, en
     Returns booked dates and available dates.
     """
     try:
-        service, cabins = get_service()
+        service, cabins = await run_io("db", get_service)
         
         # Find the cabin
-        chosen = None
-        request_cabin_id_normalized = normalize_text(cabin_id).lower()
-        for cabin in cabins:
-            cabin_id_string = cabin.get("cabin_id_string")
-            if cabin_id_string:
-                cabin_id_string_normalized = normalize_text(str(cabin_id_string)).lower()
-                if cabin_id_string_normalized == request_cabin_id_normalized:
-                    chosen = cabin
-                    break
-            
-            cabin_id_normalized = normalize_text(str(cabin.get("cabin_id", ""))).lower()
-            if cabin_id_normalized == request_cabin_id_normalized:
-                chosen = cabin
-                break
-            
-            cabin_name_normalized = normalize_text(str(cabin.get("name", ""))).lower()
-            if cabin_name_normalized == request_cabin_id_normalized:
-                chosen = cabin
-                break
-        
+        chosen = resolve_cabin(cabin_id)
+
         if not chosen:
             raise HTTPException(status_code=404, detail=f"Cabin not found: {cabin_id}")
         
@@ -615,29 +908,20 @@ async def get_cabin_calendar(cabin_id: str, start_date: Optional[str] = None, en
         # Get events
         start_utc = to_utc(start_dt)
         end_utc = to_utc(end_dt)
-        time_min = _to_rfc3339_z(start_utc)
-        time_max = _to_rfc3339_z(end_utc)
         
-        events = list_calendar_events(service, cal_id, time_min, time_max)
+        index = await run_google(_cabin_interval_index, service, cal_id, start_utc, end_utc)
+        events = index.overlapping(start_utc, end_utc)
         
-        # Convert events to date ranges
-        booked_dates = []
-        for e in events:
-            e_start, e_end = _event_interval_utc(e)
-            e_start_local = e_start.astimezone(ISRAEL_TZ).date()
-            e_end_local = e_end.astimezone(ISRAEL_TZ).date()
-            
-            # Add all dates in the range
-            current = e_start_local
-            while current < e_end_local:
-                booked_dates.append(current.isoformat())
-                current += timedelta(days=1)
+        # Booked nights (Israel dates) from the occupancy row of this cabin
+        last_night = (end_dt - timedelta(days=1)).date()
+        occupancy = OccupancyMatrix.from_indexes({cal_id: index}, start_dt.date(), last_night, ISRAEL_TZ)
+        booked_dates = occupancy.booked_nights(cal_id)
         
         return {
             "cabin_id": cabin_id,
             "start_date": start_date,
             "end_date": end_date,
-            "booked_dates": list(set(booked_dates)),  # Remove duplicates
+            "booked_dates": booked_dates,
             "events": [
                 {
                     "summary": e.get("summary", ""),
@@ -647,7 +931,7 @@ async def get_cabin_calendar(cabin_id: str, start_date: Optional[str] = None, en
                 for e in events
             ]
         }
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
@@ -655,6 +939,92 @@ async def get_cabin_calendar(cabin_id: str, start_date: Optional[str] = None, en
         raise HTTPException(status_code=500, detail=f"Error getting cabin calendar: {str(e)}")
 
 
+@app.get("/availability/heatmap")
+async def get_availability_heatmap(start_date: Optional[str] = None, end_date: Optional[str] = None):
+    """
+    Booked/free nights of all cabins over a date range (default: next 60 days).
+    Returns per-cabin free nights and the share of booked cabins per night.
+    """
+    try:
+        service, cabins = await run_io("db", get_service)
+        
+        start_day = datetime.fromisoformat(start_date).date() if start_date else datetime.now(ISRAEL_TZ).date()
+        end_day = datetime.fromisoformat(end_date).date() if end_date else start_day + timedelta(days=60)
+        if end_day < start_day:
+            raise ValueError("end_date must not be before start_date")
+        
+        cal_by_cabin = {}
+        for cabin in cabins:
+            cal_id = cabin.get("calendar_id") or cabin.get("calendarId")
+            if cal_id:
+                cal_by_cabin[cabin.get("cabin_id_string") or str(cabin.get("cabin_id", ""))] = cal_id
+        
+        occupancy = await run_google(_occupancy_matrix, service, list(cal_by_cabin.values()), start_day, end_day)
+        
+        return {
+            "start_date": start_day.isoformat(),
+            "end_date": end_day.isoformat(),
+            "days": [d.isoformat() for d in occupancy.days()],
+            "occupancy": occupancy.occupancy_by_day(),
+            "cabins": {
+                cabin_id: {"free_nights": occupancy.free_nights(cal_id)}
+                for cabin_id, cal_id in cal_by_cabin.items()
+            },
+        }
+    except PASSTHROUGH_ERRORS:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building availability heatmap: {str(e)}")
+
+
+@app.post("/availability/flexible", response_model=list[FlexibleAvailabilityResponse])
+async def check_flexible_availability(request: FlexibleAvailabilityRequest):
+    """
+    Flexible dates: "any N nights between start_date and end_date".
+    Returns the cheapest free windows per cabin, cabins ranked by their cheapest window.
+    """
+    try:
+        service, cabins = await run_io("db", get_service)
+        
+        start_day = datetime.fromisoformat(request.start_date[:10]).date()
+        end_day = datetime.fromisoformat(request.end_date[:10]).date()
+        if end_day < start_day:
+            raise ValueError("end_date must not be before start_date")
+        
+        stays = await run_google(
+            _flexible_stays,
+            service,
+            cabins,
+            start_day,
+            end_day,
+            request.nights,
+            adults=request.adults,
+            kids=request.kids,
+            area=request.area,
+            wanted_features=parse_features_arg(request.features),
+            max_windows_per_cabin=request.max_windows_per_cabin,
+        )
+        
+        return [
+            FlexibleAvailabilityResponse(
+                cabin_id=stay["cabin"].get("cabin_id_string") or str(stay["cabin"].get("cabin_id", "UNKNOWN")),
+                name=stay["cabin"].get("name"),
+                area=stay["cabin"].get("area"),
+                best_price=stay["windows"][0]["total_price"],
+                windows=[StayWindow(**w) for w in stay["windows"]],
+            )
+            for stay in stays
+        ]
+    except PASSTHROUGH_ERRORS:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error checking flexible availability: {str(e)}")
+
+
 @app.post("/quote", response_model=QuoteResponse)
 async def get_quote(request: QuoteRequest):
     """
@@ -662,40 +1032,11 @@ async def get_quote(request: QuoteRequest):
     כולל: עונות, חגים, הנחות, תוספות
     """
     try:
-        _, cabins = get_service()
+        _, cabins = await run_io("db", get_service)
         
         # מצא את הצימר - חיפוש לפי cabin_id_string (ZB01, ZB02), cabin_id (UUID), name, או calendar_id
-        chosen = None
-        request_cabin_id_normalized = normalize_text(request.cabin_id).lower()
-        for cabin in cabins:
-            # Try matching by cabin_id_string first (ZB01, ZB02, ZB03, etc.)
-            cabin_id_string = cabin.get("cabin_id_string")
-            if cabin_id_string:
-                cabin_id_string_normalized = normalize_text(str(cabin_id_string)).lower()
-                if cabin_id_string_normalized == request_cabin_id_normalized:
-                    chosen = cabin
-                    break
-            
-            # Try matching by cabin_id (UUID)
-            cabin_id_normalized = normalize_text(str(cabin.get("cabin_id", ""))).lower()
-            if cabin_id_normalized == request_cabin_id_normalized:
-                chosen = cabin
-                break
-            
-            # Try matching by name
-            cabin_name_normalized = normalize_text(str(cabin.get("name", ""))).lower()
-            if cabin_name_normalized == request_cabin_id_normalized:
-                chosen = cabin
-                break
-            
-            # Try matching by calendar_id (last 8 chars)
-            calendar_id = cabin.get("calendar_id") or cabin.get("calendarId")
-            if calendar_id:
-                calendar_id_normalized = normalize_text(str(calendar_id)).lower()
-                if calendar_id_normalized == request_cabin_id_normalized or calendar_id_normalized.endswith(request_cabin_id_normalized):
-                    chosen = cabin
-                    break
-        
+        chosen = resolve_cabin(request.cabin_id)
+
         if not chosen:
             # Log available cabin_ids for debugging
             available_ids = []
@@ -751,7 +1092,9 @@ async def get_quote(request: QuoteRequest):
         
         # Optionally save quote to database
         try:
-            save_quote(
+            await run_io(
+                "db",
+                save_quote,
                 cabin_id=request.cabin_id,
                 check_in=request.check_in,
                 check_out=request.check_out,
@@ -765,7 +1108,7 @@ async def get_quote(request: QuoteRequest):
             print(f"Warning: Could not save quote: {e}")
         
         return quote_response
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
@@ -803,36 +1146,11 @@ async def create_hold(request: HoldRequest):
     Prevents double booking while customer completes payment
     """
     try:
-        service, cabins = get_service()
+        service, cabins = await run_io("db", get_service)
         
         # Find cabin
-        chosen = None
-        request_cabin_id_normalized = normalize_text(request.cabin_id).lower()
-        for cabin in cabins:
-            cabin_id_string = cabin.get("cabin_id_string")
-            if cabin_id_string:
-                cabin_id_string_normalized = normalize_text(str(cabin_id_string)).lower()
-                if cabin_id_string_normalized == request_cabin_id_normalized:
-                    chosen = cabin
-                    break
-            
-            cabin_id_normalized = normalize_text(str(cabin.get("cabin_id", ""))).lower()
-            if cabin_id_normalized == request_cabin_id_normalized:
-                chosen = cabin
-                break
-            
-            cabin_name_normalized = normalize_text(str(cabin.get("name", ""))).lower()
-            if cabin_name_normalized == request_cabin_id_normalized:
-                chosen = cabin
-                break
-            
-            calendar_id = cabin.get("calendar_id") or cabin.get("calendarId")
-            if calendar_id:
-                calendar_id_normalized = normalize_text(str(calendar_id)).lower()
-                if calendar_id_normalized == request_cabin_id_normalized or calendar_id_normalized.endswith(request_cabin_id_normalized):
-                    chosen = cabin
-                    break
-        
+        chosen = resolve_cabin(request.cabin_id)
+
         if not chosen:
             raise HTTPException(status_code=404, detail=f"Cabin not found: {request.cabin_id}")
         
@@ -847,7 +1165,9 @@ async def create_hold(request: HoldRequest):
         if not cal_id:
             raise HTTPException(status_code=400, detail=f"Cabin {request.cabin_id} missing calendar_id")
         
-        is_available, conflicts = is_cabin_available(service, cal_id, check_in_utc, check_out_utc)
+        is_available, conflicts = await calendar_is_available(
+            service, cal_id, check_in_utc, check_out_utc, backend=READ_BACKEND
+        )
         if not is_available:
             raise HTTPException(
                 status_code=409,
@@ -861,7 +1181,9 @@ async def create_hold(request: HoldRequest):
         check_in_date = check_in_local.date().isoformat()
         check_out_date = check_out_local.date().isoformat()
         
-        hold_data = hold_manager.create_hold(
+        hold_data = await run_io(
+            "redis",
+            hold_manager.create_hold,
             cabin_id=request.cabin_id,
             check_in=check_in_date,
             check_out=check_out_date,
@@ -869,25 +1191,27 @@ async def create_hold(request: HoldRequest):
             customer_id=request.customer_id
         )
         
-        # Create HOLD event in calendar
+        # Queue the HOLD event (calendar outbox); releasing the hold queues its delete by hold_id
         if hold_manager._is_available():
             customer_name = request.customer_name or "לקוח"
             summary = f"🔒 HOLD | {customer_name}"
             description = f"Hold for cabin {request.cabin_id}\nCustomer: {customer_name}\nHold ID: {hold_data['hold_id']}"
             
             try:
-                hold_event = create_calendar_event(
-                    service=service,
+                await run_io(
+                    "db",
+                    get_calendar_outbox().enqueue_insert,
                     calendar_id=cal_id,
                     summary=summary,
                     start_local=check_in_local,
                     end_local=check_out_local,
                     description=description,
+                    hold_id=hold_data["hold_id"],
+                    expires_at=_hold_expires_at(hold_data),
                 )
-                # Store event_id in hold data (optional, for cleanup later)
-                # Note: We can't modify Redis data, but we can store it separately if needed
+                _invalidate_calendar(cal_id, check_in_utc, check_out_utc)
             except Exception as e:
-                print(f"Warning: Could not create HOLD calendar event: {e}")
+                print(f"Warning: Could not queue HOLD calendar event: {e}")
         
         return HoldResponse(
             hold_id=hold_data["hold_id"],
@@ -899,7 +1223,7 @@ async def create_hold(request: HoldRequest):
             message="Hold created successfully",
             warning=hold_data.get("warning")
         )
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
@@ -908,7 +1232,8 @@ async def create_hold(request: HoldRequest):
 
 
 @app.get("/hold/{hold_id}")
-async def get_hold(hold_id: str):
+@offload("redis")
+def get_hold(hold_id: str):
     """
     Get hold status by hold_id
     """
@@ -930,14 +1255,15 @@ async def get_hold(hold_id: str):
             "customer_id": hold_data.get("customer_id"),
             "created_at": hold_data.get("created_at")
         }
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching hold: {str(e)}")
 
 
 @app.delete("/hold/{hold_id}")
-async def release_hold(hold_id: str):
+@offload("redis")
+def release_hold(hold_id: str):
     """
     Release a hold manually
     """
@@ -954,16 +1280,23 @@ async def release_hold(hold_id: str):
         if not released:
             raise HTTPException(status_code=404, detail="Hold not found or already released")
         
-        # Try to remove calendar event (optional - may not have event_id stored)
-        # For now, we'll leave the calendar event (it will be overwritten by booking or expire)
-        # In production, you might want to store event_id in Redis with the hold
+        # Drop cached searches for this cabin and dates
+        hold_cal_id = get_cabin_catalog().get_resolver(_creds).calendar_id(hold_data.get("cabin_id"))
+        _invalidate_calendar(hold_cal_id, *_local_dates_to_utc_range(hold_data["check_in"], hold_data["check_out"]))
+        
+        # Queue the delete of the HOLD event - the outbox finds its event_id by hold_id
+        if hold_cal_id:
+            try:
+                get_calendar_outbox().enqueue_delete(hold_cal_id, hold_id=hold_id)
+            except Exception as e:
+                print(f"Warning: Could not queue HOLD calendar event delete: {e}")
         
         return {
             "success": True,
             "message": "Hold released successfully",
             "hold_id": hold_id
         }
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error releasing hold: {str(e)}")
@@ -977,7 +1310,7 @@ async def book_cabin(request: BookingRequest):
     Otherwise, creates a new booking (with hold check)
     """
     try:
-        service, cabins = get_service()
+        service, cabins = await run_io("db", get_service)
 
         check_in_local = parse_datetime_local(request.check_in)
         check_out_local = parse_datetime_local(request.check_out)
@@ -985,36 +1318,7 @@ async def book_cabin(request: BookingRequest):
         check_out_utc = to_utc(check_out_local)
 
         # Find cabin - search by cabin_id_string (ZB01, ZB02), cabin_id (UUID), name, or calendar_id
-        chosen = None
-        request_cabin_id_normalized = normalize_text(request.cabin_id).lower()
-        for cabin in cabins:
-            # Try matching by cabin_id_string first (ZB01, ZB02, ZB03, etc.)
-            cabin_id_string = cabin.get("cabin_id_string")
-            if cabin_id_string:
-                cabin_id_string_normalized = normalize_text(str(cabin_id_string)).lower()
-                if cabin_id_string_normalized == request_cabin_id_normalized:
-                    chosen = cabin
-                    break
-            
-            # Try matching by cabin_id (UUID)
-            cabin_id_normalized = normalize_text(str(cabin.get("cabin_id", ""))).lower()
-            if cabin_id_normalized == request_cabin_id_normalized:
-                chosen = cabin
-                break
-            
-            # Try matching by name
-            cabin_name_normalized = normalize_text(str(cabin.get("name", ""))).lower()
-            if cabin_name_normalized == request_cabin_id_normalized:
-                chosen = cabin
-                break
-            
-            # Try matching by calendar_id (last 8 chars)
-            calendar_id = cabin.get("calendar_id") or cabin.get("calendarId")
-            if calendar_id:
-                calendar_id_normalized = normalize_text(str(calendar_id)).lower()
-                if calendar_id_normalized == request_cabin_id_normalized or calendar_id_normalized.endswith(request_cabin_id_normalized):
-                    chosen = cabin
-                    break
+        chosen = resolve_cabin(request.cabin_id)
 
         if not chosen:
             # Log available cabin_ids for debugging
@@ -1035,7 +1339,7 @@ async def book_cabin(request: BookingRequest):
         
         if hold_id:
             # Verify hold exists and matches booking
-            hold_data = hold_manager.get_hold(hold_id)
+            hold_data = await run_io("redis", hold_manager.get_hold, hold_id)
             if not hold_data:
                 raise HTTPException(status_code=404, detail="Hold not found or expired")
             
@@ -1043,17 +1347,17 @@ async def book_cabin(request: BookingRequest):
                 raise HTTPException(status_code=400, detail="Hold cabin_id does not match booking")
             
             # Convert hold to booking
-            hold_manager.convert_hold_to_booking(hold_id)
+            await run_io("redis", hold_manager.convert_hold_to_booking, hold_id)
         else:
             # Check if cabin is on hold
-            if hold_manager.check_hold_exists(request.cabin_id, request.check_in, request.check_out):
+            if await run_io("redis", hold_manager.check_hold_exists, request.cabin_id, request.check_in, request.check_out):
                 raise HTTPException(
                     status_code=409,
                     detail="Cabin is on hold. Please use the hold_id to complete booking.",
                 )
 
-        # Check availability in calendar
-        is_available, conflicts = is_cabin_available(service, cal_id, check_in_utc, check_out_utc)
+        # Check availability in calendar - always live (never the mirror) at booking commit
+        is_available, conflicts = await calendar_is_available(service, cal_id, check_in_utc, check_out_utc)
         if not is_available:
             raise HTTPException(
                 status_code=409,
@@ -1065,13 +1369,15 @@ async def book_cabin(request: BookingRequest):
         notes = request.notes or ""
 
         # Save customer to DB
-        customer_id = save_customer_to_db(
+        customer_id = await run_io(
+            "db",
+            save_customer_to_db,
             name=customer,
             email=request.email,
             phone=phone,
         )
 
-        # Create calendar event first (to get event_id and event_link)
+        # Calendar event is written behind (calendar outbox) once the booking row is committed
         summary = f"הזמנה | {customer}"
         desc_lines = [
             f"Cabin: {request.cabin_id}",
@@ -1084,18 +1390,6 @@ async def book_cabin(request: BookingRequest):
             desc_lines.append(f"Notes: {notes}")
         description = "\n".join(desc_lines)
 
-        created = create_calendar_event(
-            service=service,
-            calendar_id=cal_id,
-            summary=summary,
-            start_local=check_in_local,
-            end_local=check_out_local,
-            description=description,
-        )
-        
-        event_id = created.get("id")
-        event_link = created.get("htmlLink")
-
         # Calculate total_price if not provided
         total_price = request.total_price
         if total_price is None or total_price == 0:
@@ -1110,19 +1404,37 @@ async def book_cabin(request: BookingRequest):
                 addons_total = sum(addon.get("price", 0) for addon in request.addons if isinstance(addon, dict))
                 total_price += addons_total
 
-        # Save booking to DB (with event_id and event_link)
-        booking_id = save_booking_to_db(
-            cabin_id=chosen.get("cabin_id"),
-            customer_id=customer_id,
-            check_in=check_in_local.date().isoformat(),
-            check_out=check_out_local.date().isoformat(),
-            adults=request.adults,
-            kids=request.kids,
-            total_price=total_price,
-            status="confirmed",
-            event_id=event_id,
-            event_link=event_link,
-        )
+        # Booking row and its calendar insert commit together (event_id and event_link
+        # are filled in by the calendar outbox once Google has the event)
+        def save_booking_and_queue_event():
+            from src.db import get_db_connection
+            outbox = get_calendar_outbox()
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                new_booking_id = save_booking_to_db(
+                    cabin_id=chosen.get("cabin_id"),
+                    customer_id=customer_id,
+                    check_in=check_in_local.date().isoformat(),
+                    check_out=check_out_local.date().isoformat(),
+                    adults=request.adults,
+                    kids=request.kids,
+                    total_price=total_price,
+                    status="confirmed",
+                    cursor=cursor,
+                )
+                mutation_id = outbox.enqueue_insert(
+                    calendar_id=cal_id,
+                    summary=summary,
+                    start_local=check_in_local,
+                    end_local=check_out_local,
+                    description=description,
+                    booking_id=new_booking_id,
+                    cursor=cursor,
+                )
+            return new_booking_id, mutation_id
+
+        booking_id, calendar_mutation_id = await run_io("db", save_booking_and_queue_event)
+        _invalidate_calendar(cal_id, check_in_utc, check_out_utc)
         
         # Payment handling (Stage 5)
         payment_intent_id = None
@@ -1131,9 +1443,12 @@ async def book_cabin(request: BookingRequest):
         if request.create_payment and total_price and total_price > 0:
             # Create Payment Intent
             try:
+                from src.payment import get_payment_manager
                 payment_manager = get_payment_manager()
                 if payment_manager.is_available():
-                    payment_result = payment_manager.create_payment_intent(
+                    payment_result = await run_io(
+                        "stripe",
+                        payment_manager.create_payment_intent,
                         amount=Decimal(str(total_price)),
                         currency="ils",
                         booking_id=booking_id,
@@ -1159,7 +1474,9 @@ async def book_cabin(request: BookingRequest):
             # Use "pending" if payment intent exists, otherwise don't save transaction if no payment
             transaction_status = "pending" if payment_intent_id else None
             if transaction_status:  # Only save if there's a payment intent
-                transaction_id = save_transaction(
+                transaction_id = await run_io(
+                    "db",
+                    save_transaction,
                     booking_id=booking_id,
                     payment_id=payment_intent_id or request.payment_intent_id,
                     amount=total_price or 0.0,
@@ -1169,7 +1486,9 @@ async def book_cabin(request: BookingRequest):
         
         # Save audit log for booking
         if booking_id:
-            save_audit_log(
+            await run_io(
+                "db",
+                save_audit_log,
                 table_name="bookings",
                 record_id=booking_id,
                 action="INSERT",
@@ -1182,8 +1501,7 @@ async def book_cabin(request: BookingRequest):
                     "kids": request.kids,
                     "total_price": total_price,
                     "status": "confirmed",
-                    "event_id": event_id,
-                    "event_link": event_link,
+                    "calendar_mutation_id": calendar_mutation_id,
                     "payment_intent_id": payment_intent_id
                 }
             )
@@ -1191,13 +1509,16 @@ async def book_cabin(request: BookingRequest):
         # Send booking confirmation email
         if booking_id and request.email:
             try:
+                from src.email_service import get_email_service
                 email_service = get_email_service()
                 # Get cabin details for email
                 cabin_details = chosen
                 cabin_address = cabin_details.get("address") or cabin_details.get("location")
                 cabin_coordinates = cabin_details.get("coordinates") or cabin_details.get("lat_lon")
                 
-                email_service.send_booking_confirmation(
+                await run_io(
+                    "smtp",
+                    email_service.send_booking_confirmation,
                     customer_email=request.email,
                     customer_name=customer,
                     booking_id=booking_id,
@@ -1208,7 +1529,7 @@ async def book_cabin(request: BookingRequest):
                     adults=request.adults or 0,
                     kids=request.kids or 0,
                     total_price=total_price or 0.0,
-                    event_link=event_link,
+                    event_link=None,  # not created yet (calendar outbox)
                     cabin_address=cabin_address,
                     cabin_coordinates=cabin_coordinates
                 )
@@ -1220,13 +1541,12 @@ async def book_cabin(request: BookingRequest):
             success=True,
             booking_id=booking_id,
             cabin_id=request.cabin_id,
-            event_id=event_id,
-            event_link=event_link,
+            calendar_mutation_id=calendar_mutation_id,
             payment_intent_id=payment_intent_id,
             client_secret=client_secret,
             message="Booking created successfully" + (" - Payment required" if payment_intent_id else ""),
         )
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
@@ -1238,8 +1558,9 @@ async def book_cabin(request: BookingRequest):
 # Admin API Endpoints
 # ============================================
 
-@app.get("/admin/bookings")
-async def get_all_bookings(
+@app.get("/admin/bookings", response_class=FastJSONResponse)
+@offload("db")
+def get_all_bookings(
     status: Optional[str] = None,
     limit: int = 100,
     offset: int = 0
@@ -1353,7 +1674,8 @@ async def get_all_bookings(
                         traceback.print_exc()
                         # Continue without transactions
                 
-                return bookings
+                # DB rows (Decimal, UUID, datetime) encoded by orjson as they are
+                return FastJSONResponse(bookings)
         except psycopg2.OperationalError as db_error:
             # Database not available - return empty list
             print(f"Warning: Database not available for /admin/bookings: {db_error}")
@@ -1369,7 +1691,8 @@ async def get_all_bookings(
 
 
 @app.get("/admin/bookings/{booking_id}")
-async def get_booking_by_id(booking_id: str):
+@offload("db")
+def get_booking_by_id(booking_id: str):
     """
     Get booking by ID (admin endpoint)
     """
@@ -1508,7 +1831,7 @@ async def get_booking_by_id(booking_id: str):
             
             return booking
             
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
         import traceback
@@ -1527,7 +1850,6 @@ async def cancel_booking(booking_id: str):
     """
     try:
         from src.db import get_db_connection
-        from src.main import delete_calendar_event
         from psycopg2.extras import RealDictCursor
         import uuid
         
@@ -1537,92 +1859,103 @@ async def cancel_booking(booking_id: str):
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid booking ID format")
         
-        # Get booking details
-        with get_db_connection() as conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute("""
-                SELECT 
-                    b.id::text as booking_id,
-                    b.cabin_id::text as cabin_id,
-                    b.event_id,
-                    b.status,
-                    c.calendar_id,
-                    c.name as cabin_name
-                FROM bookings b
-                LEFT JOIN cabins c ON b.cabin_id = c.id
-                WHERE b.id = %s::uuid
-            """, (booking_id,))
-            
-            row = cursor.fetchone()
-            if not row:
-                raise HTTPException(status_code=404, detail="Booking not found")
-            
-            booking = dict(row)
-            
-            # Check if already cancelled
-            if booking.get('status') == 'cancelled':
-                raise HTTPException(status_code=400, detail="Booking is already cancelled")
-            
-            # Check if updated_at column exists
-            cursor.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'bookings' AND column_name = 'updated_at'
-            """)
-            has_updated_at = cursor.fetchone() is not None
-            
-            # Update status in DB
-            if has_updated_at:
+        def cancel_in_db() -> dict:
+            with get_db_connection() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                
                 cursor.execute("""
-                    UPDATE bookings
-                    SET status = 'cancelled', updated_at = NOW()
-                    WHERE id = %s::uuid
+                    SELECT 
+                        b.id::text as booking_id,
+                        b.cabin_id::text as cabin_id,
+                        b.event_id,
+                        b.status,
+                        b.check_in,
+                        b.check_out,
+                        c.calendar_id,
+                        c.name as cabin_name
+                    FROM bookings b
+                    LEFT JOIN cabins c ON b.cabin_id = c.id
+                    WHERE b.id = %s::uuid
                 """, (booking_id,))
-            else:
+                
+                row = cursor.fetchone()
+                if not row:
+                    raise HTTPException(status_code=404, detail="Booking not found")
+                
+                booking = dict(row)
+                
+                # Check if already cancelled
+                if booking.get('status') == 'cancelled':
+                    raise HTTPException(status_code=400, detail="Booking is already cancelled")
+                
+                # Check if updated_at column exists
                 cursor.execute("""
-                    UPDATE bookings
-                    SET status = 'cancelled'
-                    WHERE id = %s::uuid
-                """, (booking_id,))
-            
-            # Save audit log
-            try:
-                from src.db import save_audit_log
-                save_audit_log(
-                    'bookings',
-                    booking_id,
-                    'UPDATE',
-                    old_values={'status': booking.get('status')},
-                    new_values={'status': 'cancelled'}
-                )
-            except Exception as audit_error:
-                print(f"Warning: Could not save audit log: {audit_error}")
-            
-            conn.commit()
-            
-            # Delete from Google Calendar if event_id exists
-            calendar_deleted = False
-            if booking.get('event_id') and booking.get('calendar_id'):
-                try:
-                    service, _ = get_service()
-                    calendar_deleted = delete_calendar_event(
-                        service,
+                    SELECT column_name 
+                    FROM information_schema.columns 
+                    WHERE table_name = 'bookings' AND column_name = 'updated_at'
+                """)
+                has_updated_at = cursor.fetchone() is not None
+                
+                # Update status in DB
+                if has_updated_at:
+                    cursor.execute("""
+                        UPDATE bookings
+                        SET status = 'cancelled', updated_at = NOW()
+                        WHERE id = %s::uuid
+                    """, (booking_id,))
+                else:
+                    cursor.execute("""
+                        UPDATE bookings
+                        SET status = 'cancelled'
+                        WHERE id = %s::uuid
+                    """, (booking_id,))
+                
+                # Queue the delete of the Google Calendar event in the same transaction as the
+                # status change. Without an event_id yet, the outbox resolves it from this
+                # booking's queued insert (applied first - same calendar, in order)
+                booking['calendar_mutation_id'] = None
+                if booking.get('calendar_id'):
+                    booking['calendar_mutation_id'] = get_calendar_outbox().enqueue_delete(
                         booking.get('calendar_id'),
-                        booking.get('event_id')
+                        event_id=booking.get('event_id'),
+                        booking_id=booking_id,
+                        cursor=cursor,
                     )
-                except Exception as cal_error:
-                    print(f"Warning: Could not delete calendar event: {cal_error}")
-            
-            return {
-                "success": True,
-                "message": "Booking cancelled successfully",
-                "booking_id": booking_id,
-                "calendar_deleted": calendar_deleted,
-                "cabin_name": booking.get('cabin_name')
-            }
-            
-    except HTTPException:
+                
+                # Save audit log
+                try:
+                    from src.db import save_audit_log
+                    save_audit_log(
+                        'bookings',
+                        booking_id,
+                        'UPDATE',
+                        old_values={'status': booking.get('status')},
+                        new_values={'status': 'cancelled'}
+                    )
+                except Exception as audit_error:
+                    print(f"Warning: Could not save audit log: {audit_error}")
+                
+                conn.commit()
+                return booking
+        
+        # Get booking details, mark it cancelled and queue the calendar delete
+        booking = await run_io("db", cancel_in_db)
+        calendar_mutation_id = booking.get('calendar_mutation_id')
+        if booking.get('calendar_id'):
+            _invalidate_calendar(
+                booking.get('calendar_id'),
+                *_local_dates_to_utc_range(booking.get('check_in'), booking.get('check_out'))
+            )
+        
+        return {
+            "success": True,
+            "message": "Booking cancelled successfully",
+            "booking_id": booking_id,
+            "calendar_mutation_id": calendar_mutation_id,
+            "cabin_name": booking.get('cabin_name')
+        }
+        
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error cancelling booking: {str(e)}")
@@ -1639,7 +1972,7 @@ async def stripe_webhook(request: Request):
     Verifies payment and updates booking status
     """
     import json
-    
+    from src.payment import get_payment_manager
     try:
         payload = await request.body()
         signature = request.headers.get("stripe-signature")
@@ -1654,105 +1987,112 @@ async def stripe_webhook(request: Request):
         # Verify webhook signature
         event = payment_manager.verify_webhook(payload, signature)
         
-        # Handle different event types
-        if event["type"] == "payment_intent.succeeded":
-            payment_intent = event["data"]["object"]
-            payment_intent_id = payment_intent["id"]
-            metadata = payment_intent.get("metadata", {})
-            booking_id = metadata.get("booking_id")
+        def apply_payment_event() -> Optional[Dict[str, Any]]:
+            """DB updates for the event; returns payment receipt email arguments (or None)"""
+            from src.db import get_db_connection, update_transaction_status
+            from psycopg2.extras import RealDictCursor
             
-            if booking_id:
-                # Update transaction by payment_id
-                from src.db import get_db_connection
-                from psycopg2.extras import RealDictCursor
+            # Handle different event types
+            if event["type"] == "payment_intent.succeeded":
+                payment_intent = event["data"]["object"]
+                payment_intent_id = payment_intent["id"]
+                metadata = payment_intent.get("metadata", {})
+                booking_id = metadata.get("booking_id")
                 
-                with get_db_connection() as conn:
-                    cursor = conn.cursor(cursor_factory=RealDictCursor)
-                    
-                    # Find transaction by payment_id
-                    cursor.execute("""
-                        SELECT id::text as transaction_id
-                        FROM transactions
-                        WHERE payment_id = %s
-                        LIMIT 1
-                    """, (payment_intent_id,))
-                    
-                    row = cursor.fetchone()
-                    if row:
-                        transaction_id = row["transaction_id"]
-                        from src.db import update_transaction_status
-                        payment_method = payment_intent.get("payment_method_types", [None])[0] if payment_intent.get("payment_method_types") else None
-                        update_transaction_status(
-                            transaction_id=transaction_id,
-                            status="completed",
-                            payment_method=payment_method
-                        )
-                        print(f"Payment succeeded for booking {booking_id}, transaction {transaction_id}")
+                if booking_id:
+                    # Update transaction by payment_id
+                    with get_db_connection() as conn:
+                        cursor = conn.cursor(cursor_factory=RealDictCursor)
                         
-                        # Send payment receipt email
-                        try:
-                            # Get booking and customer details
-                            cursor.execute("""
-                                SELECT 
-                                    b.id::text as booking_id,
-                                    b.total_price,
-                                    c.name as customer_name,
-                                    c.email as customer_email,
-                                    cab.name as cabin_name
-                                FROM bookings b
-                                LEFT JOIN customers c ON b.customer_id = c.id
-                                LEFT JOIN cabins cab ON b.cabin_id = cab.id
-                                WHERE b.id = %s::uuid
-                            """, (booking_id,))
-                            booking_row = cursor.fetchone()
+                        # Find transaction by payment_id
+                        cursor.execute("""
+                            SELECT id::text as transaction_id
+                            FROM transactions
+                            WHERE payment_id = %s
+                            LIMIT 1
+                        """, (payment_intent_id,))
+                        
+                        row = cursor.fetchone()
+                        if row:
+                            transaction_id = row["transaction_id"]
+                            payment_method = payment_intent.get("payment_method_types", [None])[0] if payment_intent.get("payment_method_types") else None
+                            update_transaction_status(
+                                transaction_id=transaction_id,
+                                status="completed",
+                                payment_method=payment_method
+                            )
+                            print(f"Payment succeeded for booking {booking_id}, transaction {transaction_id}")
                             
-                            if booking_row and booking_row.get("customer_email"):
-                                email_service = get_email_service()
-                                email_service.send_payment_receipt(
-                                    customer_email=booking_row["customer_email"],
-                                    customer_name=booking_row["customer_name"] or "לקוח",
-                                    booking_id=booking_id,
-                                    cabin_name=booking_row["cabin_name"] or "",
-                                    payment_amount=float(booking_row["total_price"] or 0),
-                                    payment_method=payment_method or "כרטיס אשראי",
-                                    transaction_id=payment_intent_id
-                                )
-                        except Exception as email_error:
-                            print(f"Warning: Could not send payment receipt email: {email_error}")
-                    else:
-                        print(f"Warning: Transaction not found for payment_intent_id {payment_intent_id}")
-        
-        elif event["type"] == "payment_intent.payment_failed":
-            payment_intent = event["data"]["object"]
-            payment_intent_id = payment_intent["id"]
-            metadata = payment_intent.get("metadata", {})
-            booking_id = metadata.get("booking_id")
+                            # Booking and customer details for the payment receipt email
+                            try:
+                                cursor.execute("""
+                                    SELECT 
+                                        b.id::text as booking_id,
+                                        b.total_price,
+                                        c.name as customer_name,
+                                        c.email as customer_email,
+                                        cab.name as cabin_name
+                                    FROM bookings b
+                                    LEFT JOIN customers c ON b.customer_id = c.id
+                                    LEFT JOIN cabins cab ON b.cabin_id = cab.id
+                                    WHERE b.id = %s::uuid
+                                """, (booking_id,))
+                                booking_row = cursor.fetchone()
+                                
+                                if booking_row and booking_row.get("customer_email"):
+                                    return {
+                                        "customer_email": booking_row["customer_email"],
+                                        "customer_name": booking_row["customer_name"] or "לקוח",
+                                        "booking_id": booking_id,
+                                        "cabin_name": booking_row["cabin_name"] or "",
+                                        "payment_amount": float(booking_row["total_price"] or 0),
+                                        "payment_method": payment_method or "כרטיס אשראי",
+                                        "transaction_id": payment_intent_id,
+                                    }
+                            except Exception as email_error:
+                                print(f"Warning: Could not send payment receipt email: {email_error}")
+                        else:
+                            print(f"Warning: Transaction not found for payment_intent_id {payment_intent_id}")
             
-            if booking_id:
-                # Update transaction by payment_id
-                from src.db import get_db_connection
-                from psycopg2.extras import RealDictCursor
+            elif event["type"] == "payment_intent.payment_failed":
+                payment_intent = event["data"]["object"]
+                payment_intent_id = payment_intent["id"]
+                metadata = payment_intent.get("metadata", {})
+                booking_id = metadata.get("booking_id")
                 
-                with get_db_connection() as conn:
-                    cursor = conn.cursor(cursor_factory=RealDictCursor)
-                    
-                    cursor.execute("""
-                        SELECT id::text as transaction_id
-                        FROM transactions
-                        WHERE payment_id = %s
-                        LIMIT 1
-                    """, (payment_intent_id,))
-                    
-                    row = cursor.fetchone()
-                    if row:
-                        transaction_id = row["transaction_id"]
-                        from src.db import update_transaction_status
-                        update_transaction_status(
-                            transaction_id=transaction_id,
-                            status="failed",
-                            payment_method=None
-                        )
-                        print(f"Payment failed for booking {booking_id}, transaction {transaction_id}")
+                if booking_id:
+                    # Update transaction by payment_id
+                    with get_db_connection() as conn:
+                        cursor = conn.cursor(cursor_factory=RealDictCursor)
+                        
+                        cursor.execute("""
+                            SELECT id::text as transaction_id
+                            FROM transactions
+                            WHERE payment_id = %s
+                            LIMIT 1
+                        """, (payment_intent_id,))
+                        
+                        row = cursor.fetchone()
+                        if row:
+                            transaction_id = row["transaction_id"]
+                            update_transaction_status(
+                                transaction_id=transaction_id,
+                                status="failed",
+                                payment_method=None
+                            )
+                            print(f"Payment failed for booking {booking_id}, transaction {transaction_id}")
+            
+            return None
+        
+        receipt = await run_io("db", apply_payment_event)
+        
+        # Send payment receipt email
+        if receipt:
+            try:
+                from src.email_service import get_email_service
+                await run_io("smtp", get_email_service().send_payment_receipt, **receipt)
+            except Exception as email_error:
+                print(f"Warning: Could not send payment receipt email: {email_error}")
         
         return {"status": "success"}
         
@@ -1763,7 +2103,8 @@ async def stripe_webhook(request: Request):
 
 
 @app.get("/admin/holds")
-async def get_all_holds():
+@offload("redis")
+def get_all_holds():
     """
     Get all active holds (admin endpoint)
     """
@@ -1780,6 +2121,301 @@ async def get_all_holds():
         raise HTTPException(status_code=500, detail=f"Error fetching holds: {str(e)}")
 
 
+# ============================================
+# Calendar Push Notifications
+# ============================================
+
+def _watch_targets():
+    """(calendar service for the renewal thread, calendar_ids of all cabins)"""
+    _, cabins = get_service()
+    # Own service: googleapiclient services must not be shared across threads
+    service = build_calendar_service(_creds)
+    return service, [c.get("calendar_id") or c.get("calendarId") for c in cabins]
+
+
+@app.on_event("startup")
+async def start_calendar_watch():
+    watch_manager = get_calendar_watch_manager()
+    if CALENDAR_MIRROR_ENABLED:
+        # A notification marks only that cabin's mirror stale
+        watch_manager.add_listener(get_calendar_mirror().invalidate)
+    # ...and drops only the cached searches covering that cabin
+    watch_manager.add_listener(lambda cal_id: get_availability_cache().invalidate(cal_id))
+    watch_manager.start_renewal_loop(_watch_targets)
+
+
+def _outbox_credentials():
+    """Credentials for the calendar outbox workers (each worker thread builds its own service)"""
+    get_service()
+    return _creds
+
+
+@app.on_event("startup")
+async def start_calendar_outbox():
+    # Without Postgres or the calendar_mutations table the server still starts, with write-behind off
+    try:
+        outbox = get_calendar_outbox()
+        # An applied insert/delete changes that cabin's availability
+        outbox.add_listener(_invalidate_calendar)
+        await run_io("db", outbox.start, _outbox_credentials)
+    except Exception as e:
+        print(f"Warning: Could not start calendar outbox: {e}")
+
+
+def _warm_up():
+    started = time.perf_counter()
+    try:
+        get_service()
+        print(f"Warm-up done in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"Warning: Startup warm-up failed: {e}")
+
+
+@app.on_event("startup")
+async def start_cabin_catalog_listener():
+    catalog = get_cabin_catalog()
+    # Cached searches carry cabin names/prices - drop them when the cabins change
+    catalog.add_listener(lambda version: get_availability_cache().clear())
+    catalog.start_listener()
+
+
+@app.on_event("startup")
+async def start_image_manifest():
+    manifest = get_image_manifest()
+    # Cached searches carry image URLs - drop them when a photo changes
+    manifest.add_listener(lambda: get_availability_cache().clear())
+    await run_io("images", manifest.start_watcher)
+
+
+def _precompress_static():
+    for static in (tools_static, data_static):
+        try:
+            static.precompress()
+        except Exception as e:
+            print(f"Warning: Could not precompress static files: {e}")
+
+
+@app.on_event("startup")
+async def start_static_precompress():
+    # Brotli at the top quality takes a moment for the larger pages - off the event loop
+    threading.Thread(target=_precompress_static, name="static-precompress", daemon=True).start()
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    if STARTUP_WARMUP:
+        threading.Thread(target=_warm_up, name="startup-warm-up", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def close_calendar_client():
+    await close_async_calendar_client()
+
+
+@app.post("/webhooks/calendar")
+async def calendar_webhook(request: Request):
+    """
+    Google Calendar push notification receiver
+    Everything is in the X-Goog-* headers; Google only needs a 2xx answer
+    """
+    # Channel lookup and the fan-out to the other workers go through the DB
+    calendar_id = await run_io("db", get_calendar_watch_manager().handle_notification, dict(request.headers))
+    return {"received": True, "changed": calendar_id is not None}
+
+
+@app.get("/admin/calendar-watch")
+@offload("db")
+def get_calendar_watch_status():
+    """
+    Active push-notification channels per cabin calendar (admin endpoint)
+    """
+    try:
+        return get_calendar_watch_manager().get_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching calendar watch status: {str(e)}")
+
+
+@app.post("/admin/calendar-watch/register")
+@offload("google")
+def register_calendar_watch():
+    """
+    Register (or renew) push-notification channels for all cabin calendars now (admin endpoint)
+    """
+    watch_manager = get_calendar_watch_manager()
+    if not watch_manager.is_enabled():
+        raise HTTPException(status_code=400, detail="CALENDAR_WEBHOOK_URL is not set")
+    try:
+        service, calendar_ids = _watch_targets()
+        return watch_manager.ensure_watching(service, calendar_ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error registering calendar watch: {str(e)}")
+
+
+@app.get("/admin/availability-cache")
+async def get_availability_cache_stats():
+    """
+    Availability result cache hit/miss counters (admin endpoint)
+    """
+    return get_availability_cache().get_stats()
+
+
+@app.get("/admin/calendar-mirror")
+async def get_calendar_mirror_status():
+    """
+    Local calendar mirror status: sync counters and age of each mirrored calendar (admin endpoint)
+    """
+    try:
+        return get_calendar_mirror().get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching calendar mirror status: {str(e)}")
+
+
+@app.get("/admin/io-pools")
+async def get_io_pools_status():
+    """
+    Blocking I/O thread pools: queue depth, wait and run times per dependency (admin endpoint)
+    """
+    return get_io_pools_stats()
+
+
+@app.get("/admin/google-quota")
+async def get_google_quota_status():
+    """
+    Google quota governor: current refill rate, bucket level and quota spent per endpoint (admin endpoint)
+    """
+    return get_quota_governor().get_stats()
+
+
+@app.get("/admin/google-resilience")
+async def get_google_resilience_status():
+    """
+    Google Calendar circuit breaker state and hedged read counters / p95 per calendar (admin endpoint)
+    """
+    return {
+        "circuit": get_circuit_breaker().get_stats(),
+        "hedging": get_hedged_reader().get_stats(),
+    }
+
+
+@app.get("/admin/cabin-catalog")
+async def get_cabin_catalog_status():
+    """
+    Cabin catalog version, source and load / notification counters (admin endpoint)
+    """
+    return get_cabin_catalog().get_stats()
+
+
+@app.post("/admin/cabins/reload")
+@offload("db")
+def reload_cabin_catalog():
+    """
+    Reload the cabin catalog now, e.g. after editing the Google Sheet (admin endpoint)
+    """
+    try:
+        get_service()
+        version = get_cabin_catalog().reload(_creds)
+        return {"success": True, "version": version, "catalog": get_cabin_catalog().get_stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading cabins: {str(e)}")
+
+
+@app.get("/admin/image-manifest")
+async def get_image_manifest_status():
+    """
+    Cabin images per directory with size, hash and fingerprinted URL (admin endpoint)
+    """
+    manifest = get_image_manifest()
+    return {**manifest.get_stats(), "images": manifest.to_dict()}
+
+
+@app.get("/img/{variant}/{cabin_dir}/{file_name}")
+async def get_image_variant(
+    variant: str,
+    cabin_dir: str,
+    file_name: str,
+    request: Request,
+    format: Optional[str] = None,
+    v: Optional[str] = None,
+):
+    """
+    Resized cabin photo (thumb / card / full), WebP when the browser accepts it, else JPEG.
+    Rendered on first request and cached on disk. Cached as immutable only when ?v= is the
+    image's current fingerprint and the rendition was actually made (not the original as fallback).
+    """
+    fmt = format or preferred_format(request.headers.get("accept"))
+    try:
+        found = await run_io("images", get_image_variants().get, cabin_dir, file_name, variant, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if found is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path, media_type, fingerprint = found
+    immutable = fingerprint is not None and v == fingerprint
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else SHORT_CACHE_CONTROL, "Vary": "Accept"},
+    )
+
+
+@app.get("/admin/static-assets")
+async def get_static_assets_status():
+    """
+    Precompressed /tools and /data files: sizes per encoding, ETags, 304 counts (admin endpoint)
+    """
+    return {"tools": tools_static.get_stats(), "data": data_static.get_stats()}
+
+
+@app.get("/admin/image-variants")
+async def get_image_variants_status():
+    """
+    Rendered image variant cache (admin endpoint)
+    """
+    return await run_io("images", get_image_variants().get_stats)
+
+
+@app.get("/admin/calendar-outbox")
+@offload("db")
+def get_calendar_outbox_status():
+    """
+    Pending / failed Google Calendar writes of the calendar outbox (admin endpoint)
+    """
+    try:
+        return get_calendar_outbox().get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching calendar outbox: {str(e)}")
+
+
+@app.get("/admin/calendar-outbox/{mutation_id}")
+@offload("db")
+def get_calendar_mutation(mutation_id: int):
+    """
+    One queued calendar write: status, attempts, last error and the created event (admin endpoint)
+    """
+    try:
+        mutation = get_calendar_outbox().get_mutation(mutation_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching calendar mutation: {str(e)}")
+    if not mutation:
+        raise HTTPException(status_code=404, detail=f"Calendar mutation {mutation_id} not found")
+    return mutation
+
+
+@app.post("/admin/calendar-outbox/{mutation_id}/retry")
+@offload("db")
+def retry_calendar_mutation(mutation_id: int):
+    """
+    Re-queue a failed calendar write (admin endpoint)
+    """
+    try:
+        requeued = get_calendar_outbox().retry(mutation_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error re-queueing calendar mutation: {str(e)}")
+    if not requeued:
+        raise HTTPException(status_code=409, detail=f"Calendar mutation {mutation_id} is not a failed mutation that can be retried")
+    return {"success": True, "mutation_id": mutation_id}
+
+
 # ============================================
 # Agent Chat API Endpoints (Stage A2)
 # ============================================
@@ -1842,7 +2478,7 @@ async def agent_chat(request: ChatRequest):
             from src.db import get_db_connection
             from psycopg2.extras import RealDictCursor
             
-            try:
+            def find_or_create_customer() -> Optional[str]:
                 with get_db_connection() as conn:
                     cursor = conn.cursor(cursor_factory=RealDictCursor)
                     cursor.execute("""
@@ -1850,13 +2486,15 @@ async def agent_chat(request: ChatRequest):
                     """, (request.phone,))
                     row = cursor.fetchone()
                     if row:
-                        customer_id = row['id']
-                    else:
-                        # Create new customer with phone only
-                        customer_id = save_customer_to_db(
-                            name="לקוח",
-                            phone=request.phone
-                        )
+                        return row['id']
+                    # Create new customer with phone only
+                    return save_customer_to_db(
+                        name="לקוח",
+                        phone=request.phone
+                    )
+            
+            try:
+                customer_id = await run_io("db", find_or_create_customer)
             except Exception as e:
                 print(f"Warning: Could not find/create customer: {e}")
         
@@ -1866,7 +2504,7 @@ async def agent_chat(request: ChatRequest):
         
         # If conversation_id provided, load previous context
         if conversation_id:
-            conversation = get_conversation(conversation_id)
+            conversation = await run_io("db", get_conversation, conversation_id)
             if conversation:
                 # Extract context from previous messages (assistant messages have the context)
                 messages = conversation.get('messages', [])
@@ -1898,7 +2536,9 @@ async def agent_chat(request: ChatRequest):
         
         # Create new conversation if needed
         if not conversation_id:
-            conversation_id = create_conversation(
+            conversation_id = await run_io(
+                "db",
+                create_conversation,
                 customer_id=customer_id,
                 channel=request.channel,
                 status="active",
@@ -1915,7 +2555,9 @@ async def agent_chat(request: ChatRequest):
                 )
         
         # Save user message
-        user_message_id = save_message(
+        user_message_id = await run_io(
+            "db",
+            save_message,
             conversation_id=conversation_id,
             role="user",
             content=request.message,
@@ -1952,6 +2594,10 @@ async def agent_chat(request: ChatRequest):
                 context_dict['month_name'] = month_names_he.get(month_num, 'החודש')
                 context_dict['is_month_range'] = True
         
+        extracted_nights = agent.extract_stay_nights(request.message)
+        if extracted_nights:
+            context_dict['nights'] = extracted_nights
+        
         extracted_cabin_id = agent.extract_cabin_id(request.message)
         if extracted_cabin_id:
             context_dict['cabin_id'] = context_dict.get('cabin_id') or extracted_cabin_id
@@ -1977,7 +2623,7 @@ async def agent_chat(request: ChatRequest):
         
         answer = None
         faq_match = None
-        faq_match = get_approved_faq(request.message)
+        faq_match = await run_io("db", get_approved_faq, request.message)
         if faq_match:
             # Check if this FAQ should trigger a dynamic action instead of static answer
             faq_answer = faq_match.get('answer', '')
@@ -2043,7 +2689,7 @@ async def agent_chat(request: ChatRequest):
             # Check if message is asking about a business fact
             for fact_key, keywords in business_facts_keywords.items():
                 if any(kw in message_lower for kw in keywords):
-                    fact_value = get_business_fact(fact_key)
+                    fact_value = await run_io("db", get_business_fact, fact_key)
                     if fact_value:
                         answer = fact_value
                         actions_suggested = []
@@ -2057,7 +2703,7 @@ async def agent_chat(request: ChatRequest):
         # Tool 0: List all cabins
         if 'list_cabins' in actions_suggested:
             try:
-                _, cabins = get_service()
+                _, cabins = await run_io("db", get_service)
                 tool_results['list_cabins'] = []
                 for cabin in cabins:
                     cabin_id_str = cabin.get('cabin_id_string') or str(cabin.get('cabin_id', ''))
@@ -2073,7 +2719,7 @@ async def agent_chat(request: ChatRequest):
         # Tool 1: Check Availability
         if 'availability' in actions_suggested and context_dict.get('check_in') and context_dict.get('check_out'):
             try:
-                service, cabins = get_service()
+                service, cabins = await run_io("db", get_service)
                 check_in_local = parse_datetime_local(context_dict['check_in'])
                 check_out_local = parse_datetime_local(context_dict['check_out'])
                 check_in_utc = to_utc(check_in_local)
@@ -2083,52 +2729,57 @@ async def agent_chat(request: ChatRequest):
                 is_month_range = context_dict.get('is_month_range', False)
                 filter_cabin_id = context_dict.get('cabin_id')
                 
+                # Month range + stay length ("2 לילות במרץ"): cheapest free windows (flexible search)
+                if is_month_range and context_dict.get('nights'):
+                    wanted_features = None
+                    if context_dict.get('features'):
+                        wanted_features = parse_features_arg(context_dict['features'])
+                    
+                    search_cabins = cabins
+                    if filter_cabin_id:
+                        target_cabin = resolve_cabin(filter_cabin_id)
+                        search_cabins = [target_cabin] if target_cabin else []
+                    
+                    stays = await run_google(
+                        _flexible_stays,
+                        service,
+                        search_cabins,
+                        check_in_local.date(),
+                        check_out_local.date(),
+                        context_dict['nights'],
+                        adults=context_dict.get('guests'),
+                        wanted_features=wanted_features,
+                    )
+                    
+                    tool_results['flexible'] = [
+                        {
+                            'cabin_id': stay['cabin'].get('cabin_id_string') or str(stay['cabin'].get('cabin_id', '')),
+                            'name': stay['cabin'].get('name'),
+                            'area': stay['cabin'].get('area'),
+                            'windows': stay['windows'],
+                        }
+                        for stay in stays[:5]  # Limit to 5 results
+                    ]
+                    tool_results['context'] = {
+                        'is_month_range': True,
+                        'nights': context_dict['nights'],
+                        'month_name': context_dict.get('month_name', 'החודש')
+                    }
+                
                 # If month range and specific cabin, get available dates list
-                if is_month_range and filter_cabin_id:
+                elif is_month_range and filter_cabin_id:
                     # Find the cabin
-                    target_cabin = None
-                    for cabin in cabins:
-                        cabin_id_str = cabin.get('cabin_id_string') or str(cabin.get('cabin_id', ''))
-                        cabin_name = cabin.get('name', '')
-                        if (cabin_id_str.upper() == filter_cabin_id.upper() or 
-                            normalize_text(cabin_name).lower() == normalize_text(filter_cabin_id).lower()):
-                            target_cabin = cabin
-                            break
+                    target_cabin = resolve_cabin(filter_cabin_id)
                     
                     if target_cabin:
                         calendar_id = target_cabin.get('calendar_id') or target_cabin.get('calendarId')
                         if calendar_id:
-                            # Get all events in the month
-                            from src.main import list_calendar_events
-                            time_min = _to_rfc3339_z(check_in_utc)
-                            time_max = _to_rfc3339_z(check_out_utc)
-                            events = list_calendar_events(service, calendar_id, time_min, time_max)
-                            
-                            # Get all booked dates
-                            booked_dates = set()
-                            for event in events:
-                                start_raw = event.get("start", {}).get("dateTime") or event.get("start", {}).get("date")
-                                end_raw = event.get("end", {}).get("dateTime") or event.get("end", {}).get("date")
-                                if start_raw and end_raw:
-                                    from src.main import _parse_event_dt
-                                    start_dt = _parse_event_dt(start_raw)
-                                    end_dt = _parse_event_dt(end_raw)
-                                    
-                                    # Add all dates in the range
-                                    current = start_dt
-                                    while current < end_dt:
-                                        booked_dates.add(current.strftime('%Y-%m-%d'))
-                                        current += timedelta(days=1)
-                            
-                            # Get all dates in the month
-                            all_dates = []
-                            current = check_in_local
-                            while current <= check_out_local:
-                                all_dates.append(current.strftime('%Y-%m-%d'))
-                                current += timedelta(days=1)
-                            
-                            # Available dates = all dates - booked dates
-                            available_dates = [d for d in all_dates if d not in booked_dates]
+                            # Free nights of the month: one vectorized slice of the occupancy matrix
+                            occupancy = await run_google(
+                                _occupancy_matrix,
+                                service, [calendar_id], check_in_local.date(), check_out_local.date()
+                            )
+                            available_dates = occupancy.free_nights(calendar_id)
                             
                             # Store in tool_results for agent to use
                             tool_results['available_dates'] = available_dates
@@ -2144,7 +2795,7 @@ async def agent_chat(request: ChatRequest):
                             cabin_id_str = target_cabin.get('cabin_id_string') or str(target_cabin.get('cabin_id', ''))
                             images_urls = target_cabin.get('images_urls', [])
                             if not images_urls and cabin_id_str and not '-' in cabin_id_str:
-                                images_urls = [f'/zimmers_pic/{cabin_id_str}/hero-cabin.jpg']
+                                images_urls = variant_urls(cabin_id_str, "thumb")[:1]
                             
                             tool_results['availability'] = [{
                                 'cabin_id': cabin_id_str,
@@ -2164,7 +2815,10 @@ async def agent_chat(request: ChatRequest):
                     if context_dict.get('features'):
                         wanted_features = parse_features_arg(context_dict['features'])
                     
-                    available_cabins = find_available_cabins(
+                    # cabin_id pinning happens before any calendar check; stop after 5 results
+                    search_stats = {}
+                    available_cabins = await run_google(
+                        find_available_cabins,
                         service=service,
                         cabins=cabins,
                         check_in_utc=check_in_utc,
@@ -2174,27 +2828,26 @@ async def agent_chat(request: ChatRequest):
                         area=None,
                         wanted_features=wanted_features,
                         verbose=False,
+                        backend=READ_BACKEND,
+                        batch=True,
+                        cabin_ids=[filter_cabin_id] if filter_cabin_id else None,
+                        limit=5,
+                        stats=search_stats,
                     )
-                    
-                    # If cabin_id specified, filter to that cabin only
-                    if filter_cabin_id:
-                        available_cabins = [
-                            c for c in available_cabins 
-                            if (c.get('cabin_id_string') or str(c.get('cabin_id', ''))).upper() == filter_cabin_id.upper()
-                            or normalize_text(str(c.get('name', ''))).lower() == normalize_text(filter_cabin_id).lower()
-                        ]
+                    available_cabins = await without_pending_inserts(available_cabins, check_in_utc, check_out_utc)
+                    tool_results['availability_stats'] = search_stats
                     
                     # Format results with more details
                     tool_results['availability'] = []
-                    for cabin in available_cabins[:5]:  # Limit to 5 results
+                    for cabin in available_cabins:
                         pricing = compute_price_for_stay(cabin, check_in_local, check_out_local)
                         cabin_id_str = cabin.get('cabin_id_string') or str(cabin.get('cabin_id', ''))
                         
                         # Get images if available
                         images_urls = cabin.get('images_urls', [])
                         if not images_urls and cabin_id_str and not '-' in cabin_id_str:
-                            # Try to construct image path
-                            images_urls = [f'/zimmers_pic/{cabin_id_str}/hero-cabin.jpg']
+                            # First photo of the cabin's image directory, thumbnail size for the chat list
+                            images_urls = variant_urls(cabin_id_str, "thumb")[:1]
                         
                         tool_results['availability'].append({
                             'cabin_id': cabin_id_str,
@@ -2221,37 +2874,19 @@ async def agent_chat(request: ChatRequest):
         # Tool 4: Get Cabin Info (general information) - also used for location requests
         if ('cabin_info' in actions_suggested or intent == 'location') and context_dict.get('cabin_id'):
             try:
-                _, cabins = get_service()
+                _, cabins = await run_io("db", get_service)
                 cabin_id = context_dict['cabin_id']
                 
                 # Find cabin
-                chosen = None
-                request_cabin_id_normalized = normalize_text(cabin_id).lower()
-                for cabin in cabins:
-                    cabin_id_string = cabin.get("cabin_id_string")
-                    if cabin_id_string:
-                        cabin_id_string_normalized = normalize_text(str(cabin_id_string)).lower()
-                        if cabin_id_string_normalized == request_cabin_id_normalized:
-                            chosen = cabin
-                            break
-                    
-                    cabin_id_normalized = normalize_text(str(cabin.get("cabin_id", ""))).lower()
-                    if cabin_id_normalized == request_cabin_id_normalized:
-                        chosen = cabin
-                        break
-                    
-                    cabin_name_normalized = normalize_text(str(cabin.get("name", ""))).lower()
-                    if cabin_name_normalized == request_cabin_id_normalized:
-                        chosen = cabin
-                        break
-                
+                chosen = resolve_cabin(cabin_id)
+
                 if chosen:
                     cabin_id_str = chosen.get('cabin_id_string') or str(chosen.get('cabin_id', ''))
                     
                     # Get images if available
                     images_urls = chosen.get('images_urls', [])
                     if not images_urls and cabin_id_str and not '-' in cabin_id_str:
-                        images_urls = [f'/zimmers_pic/{cabin_id_str}/hero-cabin.jpg']
+                        images_urls = variant_urls(cabin_id_str, "card")[:1]
                     
                     # Get base pricing
                     base_price = chosen.get('base_price', 0) or chosen.get('price', 0)
@@ -2304,30 +2939,12 @@ async def agent_chat(request: ChatRequest):
             try:
                 # Use the existing quote endpoint logic
                 from src.pricing import PricingEngine
-                _, cabins = get_service()
+                _, cabins = await run_io("db", get_service)
                 
                 # Find cabin
-                chosen = None
                 cabin_id = context_dict['cabin_id']
-                request_cabin_id_normalized = normalize_text(cabin_id).lower()
-                for cabin in cabins:
-                    cabin_id_string = cabin.get("cabin_id_string")
-                    if cabin_id_string:
-                        cabin_id_string_normalized = normalize_text(str(cabin_id_string)).lower()
-                        if cabin_id_string_normalized == request_cabin_id_normalized:
-                            chosen = cabin
-                            break
-                    
-                    cabin_id_normalized = normalize_text(str(cabin.get("cabin_id", ""))).lower()
-                    if cabin_id_normalized == request_cabin_id_normalized:
-                        chosen = cabin
-                        break
-                    
-                    cabin_name_normalized = normalize_text(str(cabin.get("name", ""))).lower()
-                    if cabin_name_normalized == request_cabin_id_normalized:
-                        chosen = cabin
-                        break
-                
+                chosen = resolve_cabin(cabin_id)
+
                 if chosen:
                     check_in_local = parse_datetime_local(context_dict['check_in'])
                     check_out_local = parse_datetime_local(context_dict['check_out'])
@@ -2368,7 +2985,9 @@ async def agent_chat(request: ChatRequest):
                 if ' ' in check_out_date:
                     check_out_date = check_out_date.split(' ')[0]
                 
-                hold_data = hold_manager.create_hold(
+                hold_data = await run_io(
+                    "redis",
+                    hold_manager.create_hold,
                     cabin_id=context_dict['cabin_id'],
                     check_in=check_in_date,
                     check_out=check_out_date,
@@ -2410,7 +3029,9 @@ async def agent_chat(request: ChatRequest):
                     # Get customer name from context if available
                     customer_name = context_dict.get('customer_name')
                     
-                    hold_data = hold_manager.create_hold(
+                    hold_data = await run_io(
+                        "redis",
+                        hold_manager.create_hold,
                         cabin_id=cabin_id,
                         check_in=check_in_date,
                         check_out=check_out_date,
@@ -2421,13 +3042,8 @@ async def agent_chat(request: ChatRequest):
                     if hold_data:
                         # Also create calendar event
                         try:
-                            service, cabins = get_service()
-                            chosen_cabin = None
-                            for cabin in cabins:
-                                cabin_id_str = cabin.get('cabin_id_string') or str(cabin.get('cabin_id', ''))
-                                if cabin_id_str.upper() == cabin_id.upper():
-                                    chosen_cabin = cabin
-                                    break
+                            service, cabins = await run_io("db", get_service)
+                            chosen_cabin = resolve_cabin(cabin_id)
                             
                             if chosen_cabin:
                                 check_in_local = parse_datetime_local(f"{check_in_date} 15:00")
@@ -2436,33 +3052,32 @@ async def agent_chat(request: ChatRequest):
                                 # Get customer name from context if available
                                 customer_name_for_event = customer_name or "לקוח"
                                 
-                                event = create_calendar_event(
-                                    service=service,
-                                    cabin=chosen_cabin,
-                                    check_in_local=check_in_local,
-                                    check_out_local=check_out_local,
-                                    customer_name=customer_name_for_event,
-                                    customer_phone=None,
-                                    customer_email=None,
-                                    notes="הזמנה דרך Agent Chat"
+                                chosen_cal_id = chosen_cabin.get('calendar_id') or chosen_cabin.get('calendarId')
+                                # Written to Google Calendar by the calendar outbox (released with the hold)
+                                mutation_id = await run_io(
+                                    "db",
+                                    get_calendar_outbox().enqueue_insert,
+                                    calendar_id=chosen_cal_id,
+                                    summary=f"HOLD | {customer_name_for_event}",
+                                    start_local=check_in_local,
+                                    end_local=check_out_local,
+                                    description=f"hold_id: {hold_data.get('hold_id', '')}\nהזמנה דרך Agent Chat",
+                                    hold_id=hold_data.get('hold_id'),
+                                    expires_at=_hold_expires_at(hold_data),
                                 )
+                                _invalidate_calendar(chosen_cal_id, to_utc(check_in_local), to_utc(check_out_local))
                                 
-                                if event:
-                                    answer = f"✅ **הזמנה נוצרה בהצלחה!**\n\n"
-                                    answer += f"🏡 צימר: {chosen_cabin.get('name', cabin_id)}\n"
-                                    answer += f"📅 תאריכים: {check_in_date} → {check_out_date}\n"
-                                    answer += f"🔒 Hold ID: {hold_data.get('hold_id', '')}\n"
-                                    answer += f"📅 Event ID: {event.get('id', 'N/A')}\n"
-                                    if event.get('htmlLink'):
-                                        answer += f"🔗 [פתח ביומן Google]({event.get('htmlLink')})\n"
-                                    answer += f"\n⏰ השריון תקף עד {hold_data.get('expires_at', '')}\n"
-                                    answer += f"\n💡 להשלמת התשלום, אנא השתמש ב-endpoint /book עם hold_id"
-                                else:
-                                    answer = f"✅ שריינתי לך את הצימר!\n🔒 מספר הזמנה: {hold_data.get('hold_id', '')}\n⏰ השריון תקף עד {hold_data.get('expires_at', '')}\n\n⚠️ לא הצלחתי ליצור אירוע ביומן. להשלמת ההזמנה, אנא השתמש ב-endpoint /book"
+                                answer = f"✅ **הזמנה נוצרה בהצלחה!**\n\n"
+                                answer += f"🏡 צימר: {chosen_cabin.get('name', cabin_id)}\n"
+                                answer += f"📅 תאריכים: {check_in_date} → {check_out_date}\n"
+                                answer += f"🔒 Hold ID: {hold_data.get('hold_id', '')}\n"
+                                answer += f"📅 אירוע ביומן Google נוסף לתור (#{mutation_id})\n"
+                                answer += f"\n⏰ השריון תקף עד {hold_data.get('expires_at', '')}\n"
+                                answer += f"\n💡 להשלמת התשלום, אנא השתמש ב-endpoint /book עם hold_id"
                             else:
                                 answer = f"✅ שריינתי לך את הצימר!\n🔒 מספר הזמנה: {hold_data.get('hold_id', '')}\n⏰ השריון תקף עד {hold_data.get('expires_at', '')}\n\nלהשלמת ההזמנה, אנא השתמש ב-endpoint /book"
                         except Exception as e:
-                            print(f"Warning: Could not create calendar event: {e}")
+                            print(f"Warning: Could not queue calendar event: {e}")
                             answer = f"✅ שריינתי לך את הצימר!\n🔒 מספר הזמנה: {hold_data.get('hold_id', '')}\n⏰ השריון תקף עד {hold_data.get('expires_at', '')}\n\n⚠️ לא הצלחתי ליצור אירוע ביומן. להשלמת ההזמנה, אנא השתמש ב-endpoint /book"
                         
                         tool_results['hold'] = hold_data
@@ -2490,7 +3105,9 @@ async def agent_chat(request: ChatRequest):
                 # A4: If Agent generated an answer and no FAQ was found, suggest it as FAQ
                 if intent not in ['faq', 'business_fact'] and answer and not faq_match:
                     # Suggest this answer as FAQ for Host approval
-                    suggested_faq_id = suggest_faq(
+                    suggested_faq_id = await run_io(
+                        "db",
+                        suggest_faq,
                         question=request.message,
                         answer=answer,
                         customer_id=customer_id
@@ -2517,7 +3134,9 @@ async def agent_chat(request: ChatRequest):
         if 'quote' in tool_results and tool_results['quote']:
             assistant_metadata['quote'] = tool_results['quote']
         
-        assistant_message_id = save_message(
+        assistant_message_id = await run_io(
+            "db",
+            save_message,
             conversation_id=conversation_id,
             role="assistant",
             content=answer,
@@ -2526,7 +3145,9 @@ async def agent_chat(request: ChatRequest):
         
         # Save audit log for conversation
         try:
-            save_audit_log(
+            await run_io(
+                "db",
+                save_audit_log,
                 table_name="conversations",
                 record_id=conversation_id,
                 action="INSERT",
@@ -2553,7 +3174,7 @@ async def agent_chat(request: ChatRequest):
             context=ChatContext(**response_context) if response_context else None
         )
         
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
         import traceback
@@ -2564,8 +3185,9 @@ async def agent_chat(request: ChatRequest):
         )
 
 
-@app.get("/admin/audit")
-async def get_audit_logs(
+@app.get("/admin/audit", response_class=FastJSONResponse)
+@offload("db")
+def get_audit_logs(
     table_name: Optional[str] = None,
     action: Optional[str] = None,
     limit: int = 100,
@@ -2628,7 +3250,7 @@ async def get_audit_logs(
                     cursor.execute(query, params)
                     rows = cursor.fetchall()
                     
-                    return [dict(row) for row in rows]
+                    return FastJSONResponse([dict(row) for row in rows])
                 elif 'entity_type' in columns:
                     # Old schema with entity_type, entity_id, payload
                     query = """
@@ -2664,7 +3286,7 @@ async def get_audit_logs(
                     cursor.execute(query, params)
                     rows = cursor.fetchall()
                     
-                    return [dict(row) for row in rows]
+                    return FastJSONResponse([dict(row) for row in rows])
                 else:
                     # Unknown schema - return empty
                     return []
@@ -2705,7 +3327,8 @@ class BusinessFactRequest(BaseModel):
 
 
 @app.get("/admin/faq/pending")
-async def get_pending_faqs_endpoint():
+@offload("db")
+def get_pending_faqs_endpoint():
     """
     Get all pending FAQs waiting for Host approval
     """
@@ -2720,7 +3343,8 @@ async def get_pending_faqs_endpoint():
 
 
 @app.post("/admin/faq/approve")
-async def approve_faq_endpoint(request: FAQApprovalRequest):
+@offload("db")
+def approve_faq_endpoint(request: FAQApprovalRequest):
     """
     Approve or reject a FAQ (Host only)
     Can optionally update question and answer during approval
@@ -2757,14 +3381,15 @@ async def approve_faq_endpoint(request: FAQApprovalRequest):
                 return {"message": "FAQ rejected successfully", "faq_id": request.faq_id}
             else:
                 raise HTTPException(status_code=404, detail="FAQ not found or already processed")
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing FAQ: {str(e)}")
 
 
 @app.get("/admin/business-facts")
-async def get_business_facts_endpoint(category: Optional[str] = None):
+@offload("db")
+def get_business_facts_endpoint(category: Optional[str] = None):
     """
     Get all business facts (or filtered by category)
     Returns facts as simple key->value dict for backward compatibility
@@ -2784,7 +3409,8 @@ async def get_business_facts_endpoint(category: Optional[str] = None):
 
 
 @app.post("/admin/business-facts")
-async def set_business_fact_endpoint(request: BusinessFactRequest):
+@offload("db")
+def set_business_fact_endpoint(request: BusinessFactRequest):
     """
     Set or update a business fact (Host only)
     """
@@ -2807,20 +3433,22 @@ async def set_business_fact_endpoint(request: BusinessFactRequest):
         raise HTTPException(status_code=500, detail=f"Error setting business fact: {str(e)}")
 
 
-@app.get("/admin/faq/all")
-async def get_all_faqs_endpoint(include_pending: bool = True):
+@app.get("/admin/faq/all", response_class=FastJSONResponse)
+@offload("db")
+def get_all_faqs_endpoint(include_pending: bool = True):
     """
     Get all FAQs (approved and optionally pending)
     """
     try:
         faqs = get_all_faqs(include_pending=include_pending)
-        return {"faqs": faqs, "count": len(faqs)}
+        return FastJSONResponse({"faqs": faqs, "count": len(faqs)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting FAQs: {str(e)}")
 
 
 @app.put("/admin/faq/{faq_id}")
-async def update_faq_endpoint(faq_id: str, request: FAQApprovalRequest):
+@offload("db")
+def update_faq_endpoint(faq_id: str, request: FAQApprovalRequest):
     """
     Update an existing FAQ (approved or pending)
     """
@@ -2834,14 +3462,15 @@ async def update_faq_endpoint(faq_id: str, request: FAQApprovalRequest):
             return {"message": "FAQ updated successfully", "faq_id": faq_id}
         else:
             raise HTTPException(status_code=404, detail="FAQ not found or no changes provided")
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating FAQ: {str(e)}")
 
 
 @app.delete("/admin/faq/{faq_id}")
-async def delete_faq_endpoint(faq_id: str):
+@offload("db")
+def delete_faq_endpoint(faq_id: str):
     """
     Delete a FAQ (approved or pending)
     """
@@ -2851,14 +3480,15 @@ async def delete_faq_endpoint(faq_id: str):
             return {"message": "FAQ deleted successfully", "faq_id": faq_id}
         else:
             raise HTTPException(status_code=404, detail="FAQ not found")
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting FAQ: {str(e)}")
 
 
 @app.delete("/admin/business-facts/{fact_key}")
-async def delete_business_fact_endpoint(fact_key: str):
+@offload("db")
+def delete_business_fact_endpoint(fact_key: str):
     """
     Delete (deactivate) a business fact
     """
@@ -2868,7 +3498,7 @@ async def delete_business_fact_endpoint(fact_key: str):
             return {"message": "Business fact deleted successfully", "fact_key": fact_key}
         else:
             raise HTTPException(status_code=404, detail="Business fact not found")
-    except HTTPException:
+    except PASSTHROUGH_ERRORS:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting business fact: {str(e)}")
@@ -0,0 +1,218 @@
+"""
+Availability Cache - TTL + LRU cache of /availability results
+
+Entries are keyed by the normalized search filters and remember which cabin
+calendars and which date range they cover, so a write (book, hold, cancel,
+calendar notification) drops only the entries it can actually change.
+
+Every invalidation also bumps a generation counter. A search takes generation()
+before it starts and passes it to set(); if a write touched the search's cabins and
+dates in the meantime, the (possibly pre-write) result is not stored.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Tuple
+
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+AVAILABILITY_CACHE_TTL_SECONDS = int(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", "60"))
+AVAILABILITY_CACHE_MAX_ENTRIES = int(os.getenv("AVAILABILITY_CACHE_MAX_ENTRIES", "512"))
+
+# Recent invalidations remembered for set(); a search older than all of them is not cached
+_INVALIDATION_LOG_SIZE = 1024
+
+
+def _norm(value: Any) -> str:
+    return (str(value) if value is not None else "").strip().lower()
+
+
+def _strip(value: Any) -> str:
+    # Same as main.normalize_text - filter_cabin compares areas case-sensitively
+    return (str(value) if value is not None else "").strip()
+
+
+class AvailabilityCache:
+    """
+    Thread safe TTL/LRU cache with range + cabin based invalidation
+    """
+
+    def __init__(self, ttl: int = AVAILABILITY_CACHE_TTL_SECONDS, max_entries: int = AVAILABILITY_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # (generation, calendar_id, start_utc, end_utc) of recent invalidations; None = any
+        self._invalidation_log: deque = deque(maxlen=_INVALIDATION_LOG_SIZE)
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0, "stale_sets": 0}
+
+    @staticmethod
+    def make_key(
+        check_in_utc: datetime,
+        check_out_utc: datetime,
+        adults: Optional[int] = None,
+        kids: Optional[int] = None,
+        area: Optional[str] = None,
+        features: Optional[Iterable[str]] = None,
+        **extra: Any,
+    ) -> Tuple:
+        """Normalized, hashable key - equivalent searches map to the same key"""
+        return (
+            check_in_utc.isoformat(),
+            check_out_utc.isoformat(),
+            adults,
+            kids,
+            _strip(area),
+            tuple(sorted({_norm(f) for f in (features or []) if _norm(f)})),
+            tuple(sorted((k, _norm(v)) for k, v in extra.items())),
+        )
+
+    def generation(self) -> int:
+        """Invalidation counter - read before searching, pass to set()"""
+        with self._lock:
+            return self._generation
+
+    def _invalidated_since(
+        self,
+        generation: int,
+        start_utc: datetime,
+        end_utc: datetime,
+        calendar_ids: frozenset,
+    ) -> bool:
+        if generation >= self._generation:
+            return False
+        if not self._invalidation_log or self._invalidation_log[0][0] > generation + 1:
+            # Older than the log reaches back - cannot tell, so assume it was
+            return True
+        for gen, calendar_id, start, end in self._invalidation_log:
+            if gen <= generation:
+                continue
+            if calendar_id is not None and calendar_id not in calendar_ids:
+                continue
+            if start is not None and end is not None and not (start_utc < end and start < end_utc):
+                continue
+            return True
+        return False
+
+    def _log_invalidation(self, calendar_id, start_utc, end_utc) -> None:
+        self._generation += 1
+        self._invalidation_log.append((self._generation, calendar_id, start_utc, end_utc))
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Cached value or None (miss / expired)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry["expires_at"] <= time.monotonic():
+                del self._entries[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry["value"]
+
+    def set(
+        self,
+        key: Tuple,
+        value: Any,
+        start_utc: datetime,
+        end_utc: datetime,
+        calendar_ids: Iterable[str],
+        generation: Optional[int] = None,
+    ) -> bool:
+        """
+        Store a result
+
+        Args:
+            start_utc/end_utc: searched range
+            calendar_ids: calendars of every cabin the search considered (available or not)
+            generation: generation() taken before the search; the result is dropped if one of
+                its calendars was invalidated for overlapping dates since then
+
+        Returns:
+            False if the result was dropped as possibly stale
+        """
+        calendar_ids = frozenset(c for c in calendar_ids if c)
+        with self._lock:
+            if generation is not None and self._invalidated_since(generation, start_utc, end_utc, calendar_ids):
+                self.stats["stale_sets"] += 1
+                return False
+            self._entries[key] = {
+                "value": value,
+                "expires_at": time.monotonic() + self.ttl,
+                "start": start_utc,
+                "end": end_utc,
+                "calendar_ids": calendar_ids,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return True
+
+    def invalidate(
+        self,
+        calendar_id: Optional[str] = None,
+        start_utc: Optional[datetime] = None,
+        end_utc: Optional[datetime] = None,
+    ) -> int:
+        """
+        Drop entries that cover calendar_id (any cabin if None) and overlap
+        [start_utc, end_utc) (any dates if None)
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            self._log_invalidation(calendar_id, start_utc, end_utc)
+            doomed = []
+            for key, entry in self._entries.items():
+                if calendar_id is not None and calendar_id not in entry["calendar_ids"]:
+                    continue
+                if start_utc is not None and end_utc is not None:
+                    if not (entry["start"] < end_utc and start_utc < entry["end"]):
+                        continue
+                doomed.append(key)
+            for key in doomed:
+                del self._entries[key]
+            self.stats["invalidations"] += len(doomed)
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._log_invalidation(None, None, None)
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for tuning TTL and size"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+
+# Global instance
+_availability_cache = None
+
+
+def get_availability_cache() -> AvailabilityCache:
+    """Get or create global AvailabilityCache instance"""
+    global _availability_cache
+    if _availability_cache is None:
+        _availability_cache = AvailabilityCache()
+    return _availability_cache
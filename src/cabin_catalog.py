@@ -0,0 +1,287 @@
+"""
+Cabin Catalog - the cabin list held in memory, with a version stamp
+
+The cabins are read once (DB, Google Sheets as fallback) and shared by all requests,
+together with a CabinResolver index for finding a cabin by any of its keys.
+A change to the cabins table reaches the catalog through Postgres LISTEN/NOTIFY
+(trigger from database/migration_cabins_notify.sql) or POST /admin/cabins/reload;
+the next caller reloads it and the version goes up. A reload builds a new list and
+swaps it in, so requests holding the previous list keep a consistent snapshot.
+"""
+import os
+import select
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+from dotenv import load_dotenv
+
+from src.db import DB_CONFIG, read_cabins_from_db
+from src.features_utils import get_feature_index
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+# NOTIFY channel of the cabins trigger
+CABINS_NOTIFY_CHANNEL = "cabins_changed"
+
+# Reload anyway after this long - backstop for missed notifications and for the Sheets fallback
+CABIN_CATALOG_MAX_AGE_SECONDS = int(os.getenv("CABIN_CATALOG_MAX_AGE_SECONDS", "3600"))
+
+# Hebrew cabin names guests use -> cabin_id_string
+CABIN_NAME_ALIASES = {
+    "יולי": "ZB01",
+    "אמי": "ZB02",
+    "מורן": "ZB03",
+    "מורני": "ZB03",
+}
+
+# Shortest calendar_id tail accepted as a cabin reference
+CABIN_CALENDAR_SUFFIX_MIN_LENGTH = 4
+
+# Wait before retrying a failed reload, and before reconnecting the LISTEN connection
+CABIN_CATALOG_RETRY_SECONDS = int(os.getenv("CABIN_CATALOG_RETRY_SECONDS", "30"))
+
+
+def _norm(value: Any) -> str:
+    return (str(value) if value is not None else "").strip().lower()
+
+
+class CabinResolver:
+    """
+    Finds a cabin by cabin_id_string (ZB01), DB cabin_id (UUID), name, Hebrew alias,
+    calendar_id or a tail of the calendar_id - one dict lookup instead of a scan.
+    Built once per catalog version.
+    """
+
+    def __init__(self, cabins: List[Dict[str, Any]]):
+        self._by_key: Dict[str, Dict[str, Any]] = {}
+        # calendar_id tail -> cabin; None when the tail is shared by several cabins
+        self._by_suffix: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        def calendar_id(cabin):
+            return cabin.get("calendar_id") or cabin.get("calendarId")
+
+        # Earlier key kinds win when two cabins share a key (ZB01 before a cabin named "ZB01")
+        for key_of in (
+            lambda c: c.get("cabin_id_string"),
+            lambda c: c.get("cabin_id"),
+            lambda c: c.get("name"),
+            calendar_id,
+        ):
+            for cabin in cabins:
+                key = _norm(key_of(cabin))
+                if key:
+                    self._by_key.setdefault(key, cabin)
+
+        for alias, cabin_id_string in CABIN_NAME_ALIASES.items():
+            cabin = self._by_key.get(_norm(cabin_id_string))
+            if cabin is not None:
+                self._by_key.setdefault(_norm(alias), cabin)
+
+        for cabin in cabins:
+            cal_id = _norm(calendar_id(cabin))
+            for start in range(1, len(cal_id) - CABIN_CALENDAR_SUFFIX_MIN_LENGTH + 1):
+                suffix = cal_id[start:]
+                if suffix in self._by_suffix and self._by_suffix[suffix] is not cabin:
+                    self._by_suffix[suffix] = None
+                else:
+                    self._by_suffix[suffix] = cabin
+
+    def resolve(self, cabin_ref: Any) -> Optional[Dict[str, Any]]:
+        """The cabin cabin_ref refers to, or None"""
+        key = _norm(cabin_ref)
+        if not key:
+            return None
+        cabin = self._by_key.get(key)
+        if cabin is None:
+            cabin = self._by_suffix.get(key)
+        return cabin
+
+    def calendar_id(self, cabin_ref: Any) -> Optional[str]:
+        cabin = self.resolve(cabin_ref)
+        if cabin is None:
+            return None
+        return cabin.get("calendar_id") or cabin.get("calendarId")
+
+
+class CabinCatalog:
+    """
+    Shared, versioned cabin list
+    """
+
+    def __init__(self, max_age: int = CABIN_CATALOG_MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._cabins: Optional[List[Dict[str, Any]]] = None
+        self._resolver = CabinResolver([])
+        self._stale = True
+        self._loaded_at = 0.0
+        self._retry_after = 0.0
+        self._loaded_wall: Optional[str] = None
+        self._lock = threading.Lock()
+        self._listener_thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[int], None]] = []
+        self.version = 0
+        self.source: Optional[str] = None
+        self.stats = {"loads": 0, "hits": 0, "notifications": 0, "invalidations": 0, "load_errors": 0}
+
+    def add_listener(self, callback: Callable[[int], None]) -> None:
+        """callback(version) runs after every reload"""
+        self._listeners.append(callback)
+
+    def _needs_load(self) -> bool:
+        if self._cabins is None:
+            return True
+        now = time.monotonic()
+        if now < self._retry_after:
+            return False
+        return self._stale or (self.max_age > 0 and now - self._loaded_at > self.max_age)
+
+    def get_cabins(self, creds=None) -> List[Dict[str, Any]]:
+        """
+        Current cabins (do not modify the returned list or its dicts - they are shared)
+
+        Args:
+            creds: Google credentials for the Sheets fallback when the DB has no cabins
+        """
+        if not self._needs_load():
+            self.stats["hits"] += 1
+            return self._cabins
+        with self._lock:
+            # Another request may have reloaded while we waited
+            if self._needs_load():
+                try:
+                    self._load(creds)
+                except Exception as e:
+                    self.stats["load_errors"] += 1
+                    if self._cabins is None:
+                        raise
+                    # Keep serving the previous version rather than failing requests
+                    print(f"Warning: Could not reload cabin catalog (serving version {self.version}): {e}")
+                    self._retry_after = time.monotonic() + CABIN_CATALOG_RETRY_SECONDS
+        return self._cabins
+
+    def _load(self, creds) -> None:
+        cabins = read_cabins_from_db()
+        source = "db"
+        if not cabins and creds is not None:
+            from src.main import read_cabins_from_sheet
+            cabins = read_cabins_from_sheet(creds)
+            source = "sheets"
+        if not cabins and self._cabins:
+            raise ValueError("no cabins in DB or Sheets")
+
+        cabins = list(cabins or [])
+        # Resolver first: a request that sees the new list also finds its cabins in the index
+        self._resolver = CabinResolver(cabins)
+        self._cabins = cabins
+        self.source = source
+        # An empty catalog (DB and Sheets unavailable) is retried shortly
+        self._stale = not self._cabins
+        self._loaded_at = time.monotonic()
+        self._retry_after = self._loaded_at + CABIN_CATALOG_RETRY_SECONDS if self._stale else 0.0
+        self._loaded_wall = datetime.now().isoformat()
+        self.version += 1
+        self.stats["loads"] += 1
+        # Feature masks of this version, so searches do not parse features per request
+        try:
+            get_feature_index().index_cabins(cabins, self.version)
+        except Exception as e:
+            print(f"Warning: Could not index cabin features: {e}")
+
+        for callback in self._listeners:
+            try:
+                callback(self.version)
+            except Exception as e:
+                print(f"Warning: Cabin catalog listener failed: {e}")
+
+    @property
+    def resolver(self) -> CabinResolver:
+        """Resolver index as of the last load (no DB access - e.g. right after get_cabins())"""
+        return self._resolver
+
+    def get_resolver(self, creds=None) -> CabinResolver:
+        """Resolver index of the current cabins (loads the catalog if needed)"""
+        self.get_cabins(creds)
+        return self._resolver
+
+    def resolve(self, cabin_ref: Any, creds=None) -> Optional[Dict[str, Any]]:
+        """Cabin by cabin_id_string, cabin_id, name, Hebrew alias or calendar_id (tail)"""
+        return self.get_resolver(creds).resolve(cabin_ref)
+
+    def invalidate(self) -> None:
+        """Mark the catalog stale; the next get_cabins() reloads it"""
+        self._stale = True
+        self._retry_after = 0.0
+        self.stats["invalidations"] += 1
+
+    def reload(self, creds=None) -> int:
+        """Reload now (admin); returns the new version"""
+        with self._lock:
+            self._load(creds)
+            return self.version
+
+    # --- Postgres LISTEN/NOTIFY ---
+
+    def start_listener(self) -> None:
+        """Listen for cabins_changed notifications on a dedicated connection (once per process)"""
+        if self._listener_thread and self._listener_thread.is_alive():
+            return
+
+        def loop():
+            while True:
+                conn = None
+                try:
+                    conn = psycopg2.connect(**DB_CONFIG)
+                    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                    conn.cursor().execute(f"LISTEN {CABINS_NOTIFY_CHANNEL}")
+                    # Changes made while we were not listening are unknown
+                    if self._cabins is not None:
+                        self.invalidate()
+                    while True:
+                        if select.select([conn], [], [], 60) == ([], [], []):
+                            continue
+                        conn.poll()
+                        if conn.notifies:
+                            self.stats["notifications"] += len(conn.notifies)
+                            conn.notifies.clear()
+                            self.invalidate()
+                except Exception as e:
+                    print(f"Warning: Cabin catalog LISTEN connection lost: {e}")
+                finally:
+                    if conn is not None:
+                        try:
+                            conn.close()
+                        except Exception:
+                            pass
+                time.sleep(CABIN_CATALOG_RETRY_SECONDS)
+
+        self._listener_thread = threading.Thread(target=loop, name="cabin-catalog-listen", daemon=True)
+        self._listener_thread.start()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "cabins": len(self._cabins or []),
+            "stale": self._needs_load(),
+            "loaded_at": self._loaded_wall,
+            "listening": bool(self._listener_thread and self._listener_thread.is_alive()),
+            **self.stats,
+        }
+
+
+# Global instance
+_cabin_catalog: Optional[CabinCatalog] = None
+
+
+def get_cabin_catalog() -> CabinCatalog:
+    """Get or create the global cabin catalog"""
+    global _cabin_catalog
+    if _cabin_catalog is None:
+        _cabin_catalog = CabinCatalog()
+    return _cabin_catalog
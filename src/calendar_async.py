@@ -0,0 +1,314 @@
+"""
+Async Calendar Client - native asyncio Google Calendar v3 calls over one HTTP/2 pool
+
+Covers the calls the API server makes per request: events list/insert/delete,
+freeBusy and watch. All requests share one httpx.AsyncClient (keep-alive, HTTP/2),
+so many concurrent availability checks are multiplexed on a few connections of the
+event loop instead of taking a thread each. Credentials are the ones from
+get_credentials_api, kept fresh by their background refresh; only the forced refresh
+after a 401 runs here (on the Google IO pool).
+"""
+import asyncio
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+from dotenv import load_dotenv
+from google.auth.transport.requests import Request
+
+from src.calendar_batch import _event_body
+from src.io_pools import run_io
+from src.quota import GoogleQuotaExceeded, get_quota_governor
+from src.resilience import CircuitOpenError, get_circuit_breaker
+from src.main import (
+    AVAILABILITY_BACKEND,
+    CALENDAR_EVENT_FIELDS,
+    CALENDAR_PAGE_SIZE,
+    FREEBUSY_MAX_CALENDARS,
+    _busy_overlaps,
+    _event_interval_utc,
+    _intervals_overlap,
+    _is_busy_event,
+    _parse_event_dt,
+    _to_rfc3339_z,
+)
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+CALENDAR_API_BASE = "https://www.googleapis.com/calendar/v3"
+
+# Use the async client for live calendar calls of the API server (false: googleapiclient on the IO pool)
+CALENDAR_ASYNC_ENABLED = os.getenv("CALENDAR_ASYNC_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+
+# Shared connection pool: one HTTP/2 connection carries many concurrent streams
+CALENDAR_ASYNC_MAX_CONNECTIONS = int(os.getenv("CALENDAR_ASYNC_MAX_CONNECTIONS", "20"))
+CALENDAR_ASYNC_KEEPALIVE_SECONDS = float(os.getenv("CALENDAR_ASYNC_KEEPALIVE_SECONDS", "60"))
+CALENDAR_ASYNC_TIMEOUT_SECONDS = float(os.getenv("CALENDAR_ASYNC_TIMEOUT_SECONDS", "20"))
+
+
+class CalendarAPIError(Exception):
+    """Non-2xx answer from the Calendar API"""
+
+    def __init__(self, status: int, reason: str, message: str):
+        super().__init__(f"Calendar API error {status} ({reason}): {message}")
+        self.status = status
+        self.reason = reason
+        self.message = message
+
+
+class AsyncCalendarClient:
+    """
+    Calendar v3 over a shared httpx.AsyncClient
+    """
+
+    def __init__(self, creds):
+        self.creds = creds
+        self._client = httpx.AsyncClient(
+            base_url=CALENDAR_API_BASE,
+            http2=True,
+            timeout=CALENDAR_ASYNC_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=CALENDAR_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=CALENDAR_ASYNC_MAX_CONNECTIONS,
+                keepalive_expiry=CALENDAR_ASYNC_KEEPALIVE_SECONDS,
+            ),
+        )
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self.stats = {"requests": 0, "errors": 0, "token_refreshes": 0}
+
+    async def _refresh_token(self, force: bool = False) -> None:
+        """Refresh the shared credentials once, however many requests are waiting for it"""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        stale_token = self.creds.token
+        async with self._refresh_lock:
+            if self.creds.token != stale_token:
+                # Another request refreshed while we waited
+                return
+            if force or not self.creds.valid:
+                # google-auth refresh is blocking I/O
+                await run_io("google", self.creds.refresh, Request())
+                self.stats["token_refreshes"] += 1
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        One Calendar call through the circuit breaker (fails fast while Google is degraded)
+        and the quota governor (admission, rate-limit backoff)
+        """
+        breaker = get_circuit_breaker()
+        breaker.before_call()
+        try:
+            result = await get_quota_governor().call_async(lambda: self._send(method, path, params, body))
+        except Exception as e:
+            breaker.record_outcome(e)
+            raise
+        breaker.record_success()
+        return result
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        # No expiry check here: the credential manager refreshes the token in the background,
+        # and a token Google no longer accepts comes back as a 401
+        for attempt in range(2):
+            self.stats["requests"] += 1
+            response = await self._client.request(
+                method,
+                path,
+                params={k: v for k, v in (params or {}).items() if v is not None},
+                json=body,
+                headers={"Authorization": f"Bearer {self.creds.token}"},
+            )
+            if response.status_code == 401 and attempt == 0:
+                # Token revoked or expired early - refresh and retry once
+                await self._refresh_token(force=True)
+                continue
+            break
+
+        if response.status_code >= 400:
+            self.stats["errors"] += 1
+            reason, message = "unknown", response.text
+            try:
+                error = response.json().get("error", {})
+                message = error.get("message", message)
+                reason = (error.get("errors") or [{}])[0].get("reason", reason)
+            except ValueError:
+                pass
+            raise CalendarAPIError(response.status_code, reason, message)
+
+        if response.status_code == 204 or not response.content:
+            return {}
+        return response.json()
+
+    async def list_events(
+        self,
+        calendar_id: str,
+        time_min_iso: str,
+        time_max_iso: str,
+        fields: str = CALENDAR_EVENT_FIELDS,
+    ) -> List[Dict[str, Any]]:
+        """All events of calendar_id in [time_min_iso, time_max_iso), every page (see iter_calendar_events)"""
+        events: List[Dict[str, Any]] = []
+        page_token = None
+        while True:
+            result = await self._request(
+                "GET",
+                f"/calendars/{_quote(calendar_id)}/events",
+                params={
+                    "timeMin": time_min_iso,
+                    "timeMax": time_max_iso,
+                    "singleEvents": "true",
+                    "orderBy": "startTime",
+                    "maxResults": CALENDAR_PAGE_SIZE,
+                    "pageToken": page_token,
+                    "fields": f"nextPageToken,items({fields})",
+                },
+            )
+            events.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return events
+
+    async def insert_event(self, calendar_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request("POST", f"/calendars/{_quote(calendar_id)}/events", body=body)
+
+    async def create_event(
+        self,
+        calendar_id: str,
+        summary: str,
+        start_local: datetime,
+        end_local: datetime,
+        description: str = "",
+    ) -> Dict[str, Any]:
+        """Async create_calendar_event (naive datetimes are Israel time)"""
+        return await self.insert_event(calendar_id, _event_body(summary, start_local, end_local, description))
+
+    async def delete_event(self, calendar_id: str, event_id: str) -> bool:
+        """Async delete_calendar_event: False (and a printed error) when Google refuses"""
+        try:
+            await self._request("DELETE", f"/calendars/{_quote(calendar_id)}/events/{_quote(event_id)}")
+            return True
+        except Exception as e:
+            print(f"Error deleting calendar event {event_id}: {e}")
+            return False
+
+    async def query_freebusy(
+        self,
+        calendar_ids: List[str],
+        time_min_iso: str,
+        time_max_iso: str,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Same answer as main.query_freebusy; chunks of FREEBUSY_MAX_CALENDARS run concurrently"""
+        unique_ids = list(dict.fromkeys(cid for cid in calendar_ids if cid))
+        chunks = [unique_ids[i:i + FREEBUSY_MAX_CALENDARS] for i in range(0, len(unique_ids), FREEBUSY_MAX_CALENDARS)]
+        results = await asyncio.gather(*[
+            self._request("POST", "/freeBusy", body={
+                "timeMin": time_min_iso,
+                "timeMax": time_max_iso,
+                "timeZone": "UTC",
+                "items": [{"id": cid} for cid in chunk],
+            })
+            for chunk in chunks
+        ])
+
+        out: Dict[str, Dict[str, Any]] = {}
+        for chunk, result in zip(chunks, results):
+            calendars = result.get("calendars", {})
+            for cid in chunk:
+                entry = calendars.get(cid)
+                if entry is None:
+                    out[cid] = {"busy": [], "errors": [{"reason": "missing"}]}
+                    continue
+                busy = [
+                    (_parse_event_dt(period["start"]), _parse_event_dt(period["end"]))
+                    for period in entry.get("busy", [])
+                    if period.get("start") and period.get("end")
+                ]
+                out[cid] = {"busy": busy, "errors": entry.get("errors", [])}
+        return out
+
+    async def watch(self, calendar_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """events.watch - body as in CalendarWatchManager.register"""
+        return await self._request("POST", f"/calendars/{_quote(calendar_id)}/events/watch", body=body)
+
+    async def stop_channel(self, channel_id: str, resource_id: str) -> None:
+        await self._request("POST", "/channels/stop", body={"id": channel_id, "resourceId": resource_id})
+
+    async def is_cabin_available(
+        self,
+        calendar_id: str,
+        desired_start_utc: datetime,
+        desired_end_utc: datetime,
+        backend: Optional[str] = None,
+    ) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Async main.is_cabin_available for the live backends ("freebusy", "events");
+        freeBusy answers "free", events.list only runs for conflict details or when freeBusy failed
+        """
+        backend = backend or AVAILABILITY_BACKEND
+        time_min = _to_rfc3339_z(desired_start_utc)
+        time_max = _to_rfc3339_z(desired_end_utc)
+
+        if backend == "freebusy":
+            try:
+                entry = (await self.query_freebusy([calendar_id], time_min, time_max))[calendar_id]
+            except (GoogleQuotaExceeded, CircuitOpenError):
+                raise
+            except Exception:
+                entry = None
+            if entry is not None and not entry["errors"]:
+                if not _busy_overlaps(entry["busy"], desired_start_utc, desired_end_utc):
+                    return True, []
+
+        events = await self.list_events(calendar_id, time_min, time_max)
+        conflicts = [
+            e for e in events
+            if _is_busy_event(e) and _intervals_overlap(desired_start_utc, desired_end_utc, *_event_interval_utc(e))
+        ]
+        return (len(conflicts) == 0), conflicts
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def _quote(value: str) -> str:
+    # Calendar ids contain '@' and '#'
+    return quote(str(value), safe="")
+
+
+# Global instance
+_async_calendar_client: Optional[AsyncCalendarClient] = None
+
+
+def get_async_calendar_client(creds) -> AsyncCalendarClient:
+    """Get or create the shared client (keeps its connection pool when the credentials change)"""
+    global _async_calendar_client
+    if _async_calendar_client is None:
+        _async_calendar_client = AsyncCalendarClient(creds)
+    elif _async_calendar_client.creds is not creds:
+        _async_calendar_client.creds = creds
+    return _async_calendar_client
+
+
+async def close_async_calendar_client() -> None:
+    global _async_calendar_client
+    if _async_calendar_client is not None:
+        await _async_calendar_client.aclose()
+        _async_calendar_client = None
@@ -0,0 +1,185 @@
+"""
+Calendar Batch - group many Google Calendar calls into multipart batch requests
+
+One HTTP round-trip carries up to CALENDAR_BATCH_LIMIT calls. Every call gets its
+own result or error, so one bad calendar does not fail the others.
+Batches go through the circuit breaker and the quota governor like single calls;
+calls that come back rate limited are retried on their own with backoff, and get
+GoogleQuotaExceeded once the retries are used up.
+"""
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.main import (
+    CALENDAR_EVENT_FIELDS,
+    CALENDAR_PAGE_SIZE,
+    ISRAEL_TZ,
+    _calendar_service,
+    list_calendar_events,
+)
+from src.quota import GOOGLE_QUOTA_MAX_RETRIES, GoogleQuotaExceeded, get_quota_governor, is_rate_limit_error
+from src.resilience import CircuitOpenError, get_circuit_breaker, is_degradation_error
+
+# Google recommends at most 50 calls per Calendar batch request
+CALENDAR_BATCH_LIMIT = 50
+
+
+def _execute_chunk(service, chunk: List[Tuple[Hashable, Any]], out: Dict[Hashable, Dict[str, Any]]) -> None:
+    """One batch round-trip; fills out[key] for every call of chunk"""
+    keys = {str(n): key for n, (key, _) in enumerate(chunk)}
+    for key, _ in chunk:
+        out.pop(key, None)
+
+    def callback(request_id, response, exception):
+        out[keys[request_id]] = {"result": response, "error": exception}
+
+    batch = service.new_batch_http_request(callback=callback)
+    for n, (_, request) in enumerate(chunk):
+        batch.add(request, request_id=str(n))
+
+    breaker = get_circuit_breaker()
+    try:
+        breaker.before_call()
+        # Google charges every call of the batch against the quota
+        get_quota_governor().call(batch.execute, units=len(chunk))
+    except Exception as e:
+        if not isinstance(e, CircuitOpenError):
+            breaker.record_outcome(e)
+        # The whole round-trip failed - report it on every call of this chunk
+        for key, _ in chunk:
+            out.setdefault(key, {"result": None, "error": e})
+        return
+
+    errors = [out[key]["error"] for key, _ in chunk if key in out and out[key]["error"] is not None]
+    breaker.record_outcome(next((e for e in errors if is_degradation_error(e)), None))
+
+
+def execute_batch(service, requests: Iterable[Tuple[Hashable, Any]]) -> Dict[Hashable, Dict[str, Any]]:
+    """
+    Execute (key, HttpRequest) pairs in batches of CALENDAR_BATCH_LIMIT
+
+    Returns:
+        {key: {"result": response or None, "error": exception or None}}
+    """
+    pending = list(requests)
+    out: Dict[Hashable, Dict[str, Any]] = {}
+    governor = get_quota_governor()
+
+    for i in range(0, len(pending), CALENDAR_BATCH_LIMIT):
+        chunk = pending[i:i + CALENDAR_BATCH_LIMIT]
+        for attempt in range(GOOGLE_QUOTA_MAX_RETRIES + 1):
+            _execute_chunk(service, chunk, out)
+            # 429 / 403 rateLimitExceeded on single calls: retry only those, as call() retries a request
+            chunk = [(key, request) for key, request in chunk if is_rate_limit_error(out[key]["error"])]
+            if not chunk:
+                break
+            try:
+                governor.retry_rate_limited(out[chunk[0][0]]["error"], attempt)
+            except GoogleQuotaExceeded as e:
+                for key, _ in chunk:
+                    out[key] = {"result": None, "error": e}
+                break
+
+    return out
+
+
+def batch_list_events(
+    creds_or_service,
+    calendar_ids: List[str],
+    time_min_iso: str,
+    time_max_iso: str,
+    fields: str = CALENDAR_EVENT_FIELDS,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    events.list for many calendars at once
+
+    Returns:
+        {calendar_id: {"result": [events], "error": None} or {"result": None, "error": exception}}
+    """
+    service = _calendar_service(creds_or_service)
+    requests = [
+        (
+            cal_id,
+            service.events().list(
+                calendarId=cal_id,
+                timeMin=time_min_iso,
+                timeMax=time_max_iso,
+                singleEvents=True,
+                orderBy="startTime",
+                maxResults=CALENDAR_PAGE_SIZE,
+                fields=f"nextPageToken,items({fields})",
+            ),
+        )
+        for cal_id in dict.fromkeys(c for c in calendar_ids if c)
+    ]
+
+    out = {}
+    for cal_id, item in execute_batch(service, requests).items():
+        if item["error"] is not None:
+            out[cal_id] = item
+            continue
+        response = item["result"] or {}
+        if response.get("nextPageToken"):
+            # Rare: more than one page - read that calendar fully on its own
+            try:
+                events = list_calendar_events(service, cal_id, time_min_iso, time_max_iso, fields=fields)
+                out[cal_id] = {"result": events, "error": None}
+            except Exception as e:
+                out[cal_id] = {"result": None, "error": e}
+        else:
+            out[cal_id] = {"result": response.get("items", []), "error": None}
+    return out
+
+
+def _event_body(summary: str, start_local: datetime, end_local: datetime, description: str = "") -> Dict[str, Any]:
+    if start_local.tzinfo is None:
+        start_local = start_local.replace(tzinfo=ISRAEL_TZ)
+    if end_local.tzinfo is None:
+        end_local = end_local.replace(tzinfo=ISRAEL_TZ)
+    return {
+        "summary": summary,
+        "description": description or "",
+        "start": {"dateTime": start_local.isoformat(), "timeZone": "Asia/Jerusalem"},
+        "end": {"dateTime": end_local.isoformat(), "timeZone": "Asia/Jerusalem"},
+    }
+
+
+def batch_insert_events(creds_or_service, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Create many events (bulk holds/bookings)
+
+    Args:
+        items: dicts with calendar_id, summary, start_local, end_local and optional description
+
+    Returns:
+        One {"result": created event or None, "error": exception or None} per item, same order
+    """
+    service = _calendar_service(creds_or_service)
+    requests = [
+        (
+            n,
+            service.events().insert(
+                calendarId=item["calendar_id"],
+                body=_event_body(item["summary"], item["start_local"], item["end_local"], item.get("description", "")),
+            ),
+        )
+        for n, item in enumerate(items)
+    ]
+    results = execute_batch(service, requests)
+    return [results.get(n, {"result": None, "error": None}) for n in range(len(items))]
+
+
+def batch_delete_events(creds_or_service, items: List[Tuple[str, str]]) -> List[Optional[Exception]]:
+    """
+    Delete many events given (calendar_id, event_id) pairs
+
+    Returns:
+        One error (None on success) per pair, same order
+    """
+    service = _calendar_service(creds_or_service)
+    requests = [
+        (n, service.events().delete(calendarId=calendar_id, eventId=event_id))
+        for n, (calendar_id, event_id) in enumerate(items)
+    ]
+    results = execute_batch(service, requests)
+    return [results.get(n, {}).get("error") for n in range(len(items))]
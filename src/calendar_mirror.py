@@ -0,0 +1,314 @@
+"""
+Calendar Mirror - local copy of each cabin calendar, kept fresh with incremental sync
+
+The first read of a calendar does a full events.list and keeps the returned
+nextSyncToken. Later reads only ask Google for what changed since that token
+(syncToken), and a full resync happens only when Google expires the token (410 Gone).
+Reads are answered from memory while the mirror is younger than the staleness bound.
+The mirror holds events from CALENDAR_MIRROR_DAYS_BACK before its full sync onwards;
+reads of ranges starting earlier go to Google (events.list).
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from dotenv import load_dotenv
+
+from src.main import (
+    _calendar_service,
+    _is_busy_event,
+    _thread_calendar_service,
+    _to_rfc3339_z,
+    is_cabin_available,
+    list_calendar_events,
+)
+from src.resilience import hedged_read
+from src.interval_index import IntervalIndex
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+CALENDAR_MIRROR_ENABLED = os.getenv("CALENDAR_MIRROR_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+
+# How old (seconds) the mirror may be before a read triggers an incremental sync
+CALENDAR_MIRROR_MAX_STALENESS = int(os.getenv("CALENDAR_MIRROR_MAX_STALENESS_SECONDS", "60"))
+
+# Full sync window starts this many days in the past (future events are always included)
+CALENDAR_MIRROR_DAYS_BACK = int(os.getenv("CALENDAR_MIRROR_DAYS_BACK", "30"))
+
+# Only the fields availability code needs
+_EVENT_FIELDS = "id,status,summary,start,end,transparency"
+
+
+def _window_start() -> datetime:
+    """timeMin of a full sync started now"""
+    return datetime.now(timezone.utc) - timedelta(days=CALENDAR_MIRROR_DAYS_BACK)
+
+
+def _is_sync_token_expired(error: Exception) -> bool:
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return str(status) == "410"
+
+
+class CalendarMirror:
+    """
+    In-memory mirror of Google Calendar events per calendar_id
+    """
+
+    def __init__(self, max_staleness: int = CALENDAR_MIRROR_MAX_STALENESS):
+        self.max_staleness = max_staleness
+        # calendar_id -> {"events": {event_id: event}, "sync_token": str, "synced_at": float,
+        #                 "index": IntervalIndex, "window_start": datetime (timeMin of the full sync)}
+        self._calendars: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {"full_syncs": 0, "incremental_syncs": 0, "local_reads": 0, "token_expired": 0, "outside_window": 0}
+
+    def _lock_for(self, calendar_id: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(calendar_id)
+            if lock is None:
+                lock = self._locks[calendar_id] = threading.Lock()
+            return lock
+
+    def is_fresh(self, calendar_id: str, max_staleness: Optional[int] = None) -> bool:
+        """Check if the mirror of calendar_id is younger than max_staleness seconds"""
+        state = self._calendars.get(calendar_id)
+        if not state or not state.get("sync_token"):
+            return False
+        bound = self.max_staleness if max_staleness is None else max_staleness
+        return (time.monotonic() - state["synced_at"]) <= bound
+
+    def covers(self, calendar_id: str, start_utc: datetime) -> bool:
+        """
+        Check if a range starting at start_utc lies inside the synced window of calendar_id
+        (a calendar not synced yet gets the window its first full sync will have)
+        """
+        if start_utc.tzinfo is None:
+            start_utc = start_utc.replace(tzinfo=timezone.utc)
+        state = self._calendars.get(calendar_id)
+        window_start = state["window_start"] if state else _window_start()
+        return start_utc >= window_start
+
+    def invalidate(self, calendar_id: str) -> None:
+        """Mark a calendar stale so the next read syncs it (the sync token is kept)"""
+        state = self._calendars.get(calendar_id)
+        if state:
+            state["synced_at"] = float("-inf")
+
+    def _list_all(self, service, **params) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Follow all pages of events.list, return (items, nextSyncToken) - every page is a hedged read"""
+        items: List[Dict[str, Any]] = []
+        page_token = None
+        while True:
+            def read_page(page_token=page_token):
+                return (
+                    _thread_calendar_service(service).events()
+                    .list(
+                        pageToken=page_token,
+                        singleEvents=True,
+                        maxResults=2500,
+                        fields=f"nextPageToken,nextSyncToken,items({_EVENT_FIELDS})",
+                        **params,
+                    )
+                    .execute()
+                )
+
+            result = hedged_read(params.get("calendarId", "mirror"), read_page)
+            items.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return items, result.get("nextSyncToken")
+
+    def _full_sync(self, service, calendar_id: str) -> int:
+        time_min = _window_start()
+        items, sync_token = self._list_all(service, calendarId=calendar_id, timeMin=_to_rfc3339_z(time_min))
+
+        events = {e["id"]: e for e in items if e.get("id") and e.get("status") != "cancelled"}
+        self._calendars[calendar_id] = {
+            "events": events,
+            "sync_token": sync_token,
+            "synced_at": time.monotonic(),
+            "index": IntervalIndex.from_events(events.values()),
+            # Incremental syncs keep this query's timeMin, so the window starts here until the next full sync
+            "window_start": time_min,
+        }
+        self.stats["full_syncs"] += 1
+        return len(events)
+
+    def _incremental_sync(self, service, calendar_id: str) -> int:
+        state = self._calendars[calendar_id]
+        items, sync_token = self._list_all(service, calendarId=calendar_id, syncToken=state["sync_token"])
+
+        events = state["events"]
+        for e in items:
+            event_id = e.get("id")
+            if not event_id:
+                continue
+            if e.get("status") == "cancelled":
+                events.pop(event_id, None)
+            else:
+                events[event_id] = e
+
+        if items:
+            state["index"] = IntervalIndex.from_events(events.values())
+        state["sync_token"] = sync_token or state["sync_token"]
+        state["synced_at"] = time.monotonic()
+        self.stats["incremental_syncs"] += 1
+        return len(items)
+
+    def _sync_locked(self, service, calendar_id: str, force_full: bool = False) -> int:
+        state = self._calendars.get(calendar_id)
+        if force_full or not state or not state.get("sync_token"):
+            return self._full_sync(service, calendar_id)
+        try:
+            return self._incremental_sync(service, calendar_id)
+        except Exception as e:
+            if not _is_sync_token_expired(e):
+                raise
+            # Google expired the sync token - start over
+            self.stats["token_expired"] += 1
+            return self._full_sync(service, calendar_id)
+
+    def sync(self, creds_or_service, calendar_id: str, force_full: bool = False) -> int:
+        """
+        Bring the mirror of calendar_id up to date
+
+        Returns:
+            Number of events received from Google
+        """
+        service = _calendar_service(creds_or_service)
+        with self._lock_for(calendar_id):
+            return self._sync_locked(service, calendar_id, force_full)
+
+    def ensure_fresh(self, creds_or_service, calendar_id: str, max_staleness: Optional[int] = None) -> bool:
+        """
+        Sync calendar_id if it is stale
+
+        Returns:
+            True if Google was called, False if the mirror was fresh
+        """
+        if self.is_fresh(calendar_id, max_staleness):
+            return False
+        with self._lock_for(calendar_id):
+            # Another request may have synced while we waited for the lock
+            if self.is_fresh(calendar_id, max_staleness):
+                return False
+            self._sync_locked(_calendar_service(creds_or_service), calendar_id)
+            return True
+
+    def get_index(
+        self,
+        creds_or_service,
+        calendar_id: str,
+        max_staleness: Optional[int] = None,
+    ) -> IntervalIndex:
+        """
+        Interval index of calendar_id (rebuilt only when a sync changed something)
+        """
+        self.ensure_fresh(creds_or_service, calendar_id, max_staleness)
+        self.stats["local_reads"] += 1
+        state = self._calendars.get(calendar_id)
+        return state["index"] if state else IntervalIndex()
+
+    def list_events(
+        self,
+        creds_or_service,
+        calendar_id: str,
+        time_min_utc: datetime,
+        time_max_utc: datetime,
+        max_staleness: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Busy events overlapping [time_min_utc, time_max_utc), ordered by start - same shape as list_calendar_events
+        """
+        if not self.covers(calendar_id, time_min_utc):
+            self.stats["outside_window"] += 1
+            events = list_calendar_events(
+                creds_or_service, calendar_id, _to_rfc3339_z(time_min_utc), _to_rfc3339_z(time_max_utc)
+            )
+            return [e for e in events if _is_busy_event(e)]
+        index = self.get_index(creds_or_service, calendar_id, max_staleness)
+        return index.overlapping(time_min_utc, time_max_utc)
+
+    def is_cabin_available(
+        self,
+        creds_or_service,
+        calendar_id: str,
+        desired_start_utc: datetime,
+        desired_end_utc: datetime,
+        max_staleness: Optional[int] = None,
+    ) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Same contract as src.main.is_cabin_available, answered from the mirror;
+        a range starting before the synced window is checked live (events.list)
+        """
+        if not self.covers(calendar_id, desired_start_utc):
+            self.stats["outside_window"] += 1
+            return is_cabin_available(
+                creds_or_service, calendar_id, desired_start_utc, desired_end_utc, backend="events"
+            )
+        index = self.get_index(creds_or_service, calendar_id, max_staleness)
+        if not index.overlaps(desired_start_utc, desired_end_utc):
+            return True, []
+        return False, index.overlapping(desired_start_utc, desired_end_utc)
+
+    def is_cabin_available_snapshot(
+        self,
+        calendar_id: str,
+        desired_start_utc: datetime,
+        desired_end_utc: datetime,
+    ) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Same contract as is_cabin_available, from whatever the mirror holds (no sync, however old).
+        Stale fallback while Google is down; raises LookupError for a calendar never mirrored
+        or a range starting before the mirrored window.
+        """
+        state = self._calendars.get(calendar_id)
+        if not state:
+            raise LookupError(f"No mirrored snapshot of calendar {calendar_id}")
+        if not self.covers(calendar_id, desired_start_utc):
+            raise LookupError(f"Mirrored snapshot of calendar {calendar_id} starts after {desired_start_utc.isoformat()}")
+        index = state["index"]
+        if not index.overlaps(desired_start_utc, desired_end_utc):
+            return True, []
+        return False, index.overlapping(desired_start_utc, desired_end_utc)
+
+    def snapshot_age(self, calendar_ids: List[str]) -> Optional[float]:
+        """Age in seconds of the oldest mirrored calendar among calendar_ids (None if unknown)"""
+        now = time.monotonic()
+        ages = [now - self._calendars[c]["synced_at"] for c in calendar_ids if c in self._calendars]
+        ages = [a for a in ages if a != float("inf")]
+        return round(max(ages), 1) if ages else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sync counters and per-calendar mirror age (for admin)"""
+        now = time.monotonic()
+        calendars = {}
+        for calendar_id, state in list(self._calendars.items()):
+            age = now - state["synced_at"]
+            calendars[calendar_id] = {
+                "events": len(state["events"]),
+                "age_seconds": round(age, 1) if age != float("inf") else None,
+            }
+        return {
+            "enabled": CALENDAR_MIRROR_ENABLED,
+            "max_staleness_seconds": self.max_staleness,
+            **self.stats,
+            "calendars": calendars,
+        }
+
+
+# Global instance
+_calendar_mirror = None
+
+
+def get_calendar_mirror() -> CalendarMirror:
+    """Get or create global CalendarMirror instance"""
+    global _calendar_mirror
+    if _calendar_mirror is None:
+        _calendar_mirror = CalendarMirror()
+    return _calendar_mirror
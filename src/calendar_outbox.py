@@ -0,0 +1,563 @@
+"""
+Calendar Outbox - write-behind queue of Google Calendar inserts and deletes
+
+Requests write their DB row and the calendar change in one transaction (pass the
+request's cursor to enqueue_*) and return. A worker pool applies the queue with retries
+(exponential backoff), writes the created event_id / event_link back to the booking, and
+tells the listeners (mirror, availability cache) which calendar changed. Mutations of
+one calendar are applied one at a time in the order they were enqueued, so "insert then
+delete" of a booking never runs backwards.
+
+Inserts carry an event id derived from the mutation, so a retry after a timeout (or a
+reclaimed stale claim) finds the event Google already created instead of duplicating it.
+Inserts not yet applied - and inserts that failed for good - count as conflicts for
+availability until a delete of the same booking / hold supersedes them, or (HOLD events)
+until the hold expires. An insert whose hold expired before it was applied is dropped.
+
+Stored in the calendar_mutations table (database/migration_calendar_outbox.sql). Without
+the table (or the DB) write-behind is off: nothing can be enqueued, availability checks see
+no pending inserts, and the table is looked for again every _TABLE_RECHECK_SECONDS.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+from dotenv import load_dotenv
+from psycopg2.extras import RealDictCursor
+
+from src.db import get_db_connection
+from src.main import create_calendar_event, _intervals_overlap, _thread_calendar_service, to_utc
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+CALENDAR_OUTBOX_WORKERS = int(os.getenv("CALENDAR_OUTBOX_WORKERS", "4"))
+CALENDAR_OUTBOX_POLL_SECONDS = float(os.getenv("CALENDAR_OUTBOX_POLL_SECONDS", "2"))
+CALENDAR_OUTBOX_MAX_ATTEMPTS = int(os.getenv("CALENDAR_OUTBOX_MAX_ATTEMPTS", "8"))
+CALENDAR_OUTBOX_BACKOFF_CAP_SECONDS = int(os.getenv("CALENDAR_OUTBOX_BACKOFF_CAP_SECONDS", "300"))
+
+# A mutation claimed longer ago than this belongs to a dead worker and is retried
+_CLAIM_TIMEOUT_SECONDS = 300
+
+# How long a missing calendar_mutations table is remembered before probing again
+_TABLE_RECHECK_SECONDS = 60
+
+
+def _http_status(error: Exception) -> str:
+    return str(getattr(getattr(error, "resp", None), "status", None))
+
+
+def _is_gone(error: Exception) -> bool:
+    """404/410 on delete: the event is already gone"""
+    return _http_status(error) in ("404", "410")
+
+
+def _expired(payload: Dict[str, Any]) -> bool:
+    """Check if the hold of an insert has expired"""
+    expires_at = payload.get("expires_at")
+    return bool(expires_at) and datetime.fromisoformat(expires_at) <= datetime.now(timezone.utc)
+
+
+def _event_id_for(mutation: Dict[str, Any]) -> str:
+    """
+    Google event id of an insert: the same on every attempt, unique per mutation.
+    Hex digits are valid base32hex; created_at keeps ids distinct if the table is ever recreated.
+    """
+    seed = f"calendar-mutation:{mutation['id']}:{mutation.get('created_at')}"
+    return hashlib.sha1(seed.encode("utf-8")).hexdigest()
+
+
+# Open inserts: not applied yet, or failed for good - unless a later delete of the same
+# booking / hold made them moot (cancelled booking, released hold) or the hold expired
+_OPEN_INSERT_SQL = """
+    m.op = 'insert' AND m.status IN ('pending', 'in_progress', 'failed')
+    AND (m.payload->>'expires_at' IS NULL OR (m.payload->>'expires_at')::timestamptz > NOW())
+    AND NOT EXISTS (
+        SELECT 1 FROM calendar_mutations d
+        WHERE d.op = 'delete' AND d.id > m.id
+          AND ((m.booking_id IS NOT NULL AND d.booking_id = m.booking_id)
+               OR (m.hold_id IS NOT NULL AND d.hold_id = m.hold_id))
+    )
+"""
+
+
+class CalendarOutbox:
+    """
+    Durable calendar mutation queue with per-calendar ordering
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        # Calendars with a mutation being applied by this process
+        self._in_flight: set = set()
+        self._listeners: List[Callable[[str, Optional[datetime], Optional[datetime]], None]] = []
+        self._service_provider: Optional[Callable[[], Any]] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self.stats = {"enqueued": 0, "applied": 0, "retried": 0, "failed": 0, "duplicates_avoided": 0, "expired": 0}
+        # Result of the last calendar_mutations probe: (available, error, monotonic time)
+        self._table_state = (False, "not checked yet", float("-inf"))
+
+    def is_enabled(self) -> bool:
+        """Check if calendar_mutations is reachable (probed at most every _TABLE_RECHECK_SECONDS)"""
+        enabled, _, checked_at = self._table_state
+        if time.monotonic() - checked_at < _TABLE_RECHECK_SECONDS:
+            return enabled
+        try:
+            with get_db_connection() as conn:
+                conn.cursor().execute("SELECT 1 FROM calendar_mutations LIMIT 1")
+            self._table_state = (True, None, time.monotonic())
+        except Exception as e:
+            if enabled or checked_at == float("-inf"):
+                print(
+                    f"Warning: Calendar outbox disabled - calendar_mutations table not available ({e}). "
+                    f"Run database/run_migration_calendar_outbox.py."
+                )
+            self._table_state = (False, str(e), time.monotonic())
+        return self._table_state[0]
+
+    def _require_table(self) -> None:
+        """
+        Raises:
+            RuntimeError: calendar_mutations is missing or the DB is unreachable - calendar
+                writes cannot be queued durably, so bookings must not be accepted
+        """
+        if not self.is_enabled():
+            raise RuntimeError(
+                f"Calendar outbox disabled: calendar_mutations table not available ({self._table_state[1]}). "
+                f"Run database/run_migration_calendar_outbox.py."
+            )
+
+    def add_listener(self, callback: Callable[[str, Optional[datetime], Optional[datetime]], None]) -> None:
+        """callback(calendar_id, start_utc, end_utc) runs after every applied mutation"""
+        self._listeners.append(callback)
+
+    # --- enqueue ---
+
+    def enqueue_insert(
+        self,
+        calendar_id: str,
+        summary: str,
+        start_local: datetime,
+        end_local: datetime,
+        description: str = "",
+        booking_id: Optional[str] = None,
+        hold_id: Optional[str] = None,
+        expires_at: Optional[datetime] = None,
+        cursor=None,
+    ) -> int:
+        """
+        Queue create_calendar_event; the event_id/event_link are written to the booking once applied
+
+        Args:
+            expires_at: when the hold expires (timezone-aware); after that the insert no longer
+                blocks the slot, and is dropped if it has not been applied yet
+            cursor: cursor of the caller's transaction (e.g. the one that inserted the booking);
+                the mutation commits or rolls back with it. Without it, committed on its own.
+
+        Returns:
+            Mutation id
+        """
+        payload = {
+            "summary": summary,
+            "description": description or "",
+            "start_local": start_local.isoformat(),
+            "end_local": end_local.isoformat(),
+        }
+        if expires_at is not None:
+            payload["expires_at"] = expires_at.astimezone(timezone.utc).isoformat()
+        return self._enqueue("insert", calendar_id, payload, booking_id, hold_id, cursor)
+
+    def enqueue_delete(
+        self,
+        calendar_id: str,
+        event_id: Optional[str] = None,
+        booking_id: Optional[str] = None,
+        hold_id: Optional[str] = None,
+        start_local: Optional[datetime] = None,
+        end_local: Optional[datetime] = None,
+        cursor=None,
+    ) -> int:
+        """
+        Queue the delete of an event - by event_id, or the event a queued insert of
+        the same booking_id / hold_id created (resolved when the delete is applied)
+
+        Args:
+            cursor: cursor of the caller's transaction, as in enqueue_insert
+
+        Returns:
+            Mutation id
+        """
+        payload = {"event_id": event_id}
+        if start_local and end_local:
+            payload["start_local"] = start_local.isoformat()
+            payload["end_local"] = end_local.isoformat()
+        return self._enqueue("delete", calendar_id, payload, booking_id, hold_id, cursor)
+
+    def _enqueue(
+        self,
+        op: str,
+        calendar_id: str,
+        payload: Dict[str, Any],
+        booking_id: Optional[str],
+        hold_id: Optional[str],
+        cursor=None,
+    ) -> int:
+        if not calendar_id:
+            raise ValueError("calendar_id is required")
+        self._require_table()
+        sql = """
+            INSERT INTO calendar_mutations (op, calendar_id, booking_id, hold_id, payload)
+            VALUES (%s, %s, %s::uuid, %s, %s::jsonb)
+            RETURNING id
+        """
+        params = (op, calendar_id, booking_id, hold_id, json.dumps(payload))
+        if cursor is not None:
+            # A plain cursor on the caller's connection: same transaction, whatever its cursor_factory
+            own_cursor = cursor.connection.cursor()
+            own_cursor.execute(sql, params)
+            mutation_id = own_cursor.fetchone()[0]
+        else:
+            with get_db_connection() as conn:
+                own_cursor = conn.cursor()
+                own_cursor.execute(sql, params)
+                mutation_id = own_cursor.fetchone()[0]
+        self.stats["enqueued"] += 1
+        # Not visible to the dispatcher before the caller commits - the poll picks it up then
+        self._wake.set()
+        return mutation_id
+
+    # --- reads ---
+
+    def _open_inserts(self, calendar_ids: List[str]) -> List[Dict[str, Any]]:
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"""
+                SELECT m.id, m.calendar_id, m.status, m.payload FROM calendar_mutations m
+                WHERE m.calendar_id = ANY(%s) AND {_OPEN_INSERT_SQL}
+            """, (list(calendar_ids),))
+            return [dict(r) for r in cursor.fetchall()]
+
+    def _overlapping_inserts(self, calendar_ids: List[str], start_utc: datetime, end_utc: datetime) -> List[Dict[str, Any]]:
+        overlapping = []
+        for m in self._open_inserts(calendar_ids):
+            payload = m["payload"]
+            m_start = to_utc(datetime.fromisoformat(payload["start_local"]))
+            m_end = to_utc(datetime.fromisoformat(payload["end_local"]))
+            if _intervals_overlap(start_utc, end_utc, m_start, m_end):
+                overlapping.append(m)
+        return overlapping
+
+    def pending_conflicts(self, calendar_id: str, start_utc: datetime, end_utc: datetime) -> List[Dict[str, Any]]:
+        """
+        Open inserts of calendar_id overlapping [start_utc, end_utc): queued ones Google does
+        not know yet, and failed ones whose booking still holds the slot. Availability checks
+        at commit time add them. None while write-behind is off.
+        """
+        if not self.is_enabled():
+            return []
+        return [
+            {
+                "mutation_id": m["id"],
+                "status": m["status"],
+                "summary": m["payload"].get("summary"),
+                "start": m["payload"]["start_local"],
+                "end": m["payload"]["end_local"],
+            }
+            for m in self._overlapping_inserts([calendar_id], start_utc, end_utc)
+        ]
+
+    def busy_calendars(self, calendar_ids: List[str], start_utc: datetime, end_utc: datetime) -> set:
+        """Calendars among calendar_ids with an open insert overlapping the range (one query, for searches)"""
+        calendar_ids = [c for c in calendar_ids if c]
+        if not calendar_ids or not self.is_enabled():
+            return set()
+        return {m["calendar_id"] for m in self._overlapping_inserts(calendar_ids, start_utc, end_utc)}
+
+    def _due_heads(self) -> List[Dict[str, Any]]:
+        """Oldest open mutation of every calendar, if it is pending and due"""
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT * FROM (
+                    SELECT DISTINCT ON (calendar_id)
+                        id, op, calendar_id, booking_id::text AS booking_id, hold_id, payload,
+                        status, attempts, next_attempt_at, created_at
+                    FROM calendar_mutations
+                    WHERE status IN ('pending', 'in_progress')
+                    ORDER BY calendar_id, id
+                ) heads
+                WHERE status = 'pending' AND next_attempt_at <= NOW()
+            """)
+            return [dict(r) for r in cursor.fetchall()]
+
+    def _claim(self, mutation_id: int) -> bool:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE calendar_mutations
+                SET status = 'in_progress', claimed_at = NOW(), updated_at = NOW()
+                WHERE id = %s AND status = 'pending'
+            """, (mutation_id,))
+            return cursor.rowcount == 1
+
+    def _release_stale_claims(self) -> None:
+        with get_db_connection() as conn:
+            conn.cursor().execute("""
+                UPDATE calendar_mutations
+                SET status = 'pending', updated_at = NOW()
+                WHERE status = 'in_progress' AND claimed_at < NOW() - make_interval(secs => %s)
+            """, (_CLAIM_TIMEOUT_SECONDS,))
+
+    # --- apply ---
+
+    def _created_event_id(self, mutation: Dict[str, Any]) -> Optional[str]:
+        """
+        event_id created by the insert of the same booking / hold. A failed insert may still
+        have reached Google (timeouts), so its fixed event id is tried too (404 = never created).
+        """
+        if not mutation.get("booking_id") and not mutation.get("hold_id"):
+            return None
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT id, status, event_id, created_at FROM calendar_mutations
+                WHERE op = 'insert' AND status IN ('done', 'failed') AND id < %s
+                  AND ((%s::uuid IS NOT NULL AND booking_id = %s::uuid) OR (%s::text IS NOT NULL AND hold_id = %s))
+                ORDER BY id DESC
+                LIMIT 1
+            """, (mutation["id"], mutation.get("booking_id"), mutation.get("booking_id"), mutation.get("hold_id"), mutation.get("hold_id")))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        if row["status"] == "done":
+            return row["event_id"]
+        return _event_id_for(row)
+
+    def _insert_event(self, service, mutation: Dict[str, Any]) -> Dict[str, Any]:
+        """events.insert with the mutation's fixed event id; 409 means an earlier attempt already created it"""
+        payload = mutation["payload"]
+        event_id = _event_id_for(mutation)
+        try:
+            return create_calendar_event(
+                service,
+                mutation["calendar_id"],
+                payload["summary"],
+                datetime.fromisoformat(payload["start_local"]),
+                datetime.fromisoformat(payload["end_local"]),
+                payload.get("description", ""),
+                event_id=event_id,
+            )
+        except Exception as e:
+            if _http_status(e) != "409":
+                raise
+        self.stats["duplicates_avoided"] += 1
+        return service.events().get(calendarId=mutation["calendar_id"], eventId=event_id).execute()
+
+    def _apply(self, mutation: Dict[str, Any]) -> None:
+        service = _thread_calendar_service(self._service_provider())
+        payload = mutation["payload"]
+        calendar_id = mutation["calendar_id"]
+
+        if mutation["op"] == "insert" and _expired(payload):
+            # The hold ran out before its event was written - nothing left to show or block
+            self.stats["expired"] += 1
+            self._finish(mutation, None, None)
+            return
+        if mutation["op"] == "insert":
+            created = self._insert_event(service, mutation)
+            self._finish(mutation, created.get("id"), created.get("htmlLink"))
+        else:
+            event_id = payload.get("event_id") or self._created_event_id(mutation)
+            if event_id:
+                try:
+                    service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+                except Exception as e:
+                    if not _is_gone(e):
+                        raise
+            # No event_id: the insert never succeeded, nothing to delete
+            self._finish(mutation, event_id, None)
+
+        start_utc = end_utc = None
+        if payload.get("start_local") and payload.get("end_local"):
+            start_utc = to_utc(datetime.fromisoformat(payload["start_local"]))
+            end_utc = to_utc(datetime.fromisoformat(payload["end_local"]))
+        for listener in self._listeners:
+            try:
+                listener(calendar_id, start_utc, end_utc)
+            except Exception as e:
+                print(f"Warning: Calendar outbox listener failed: {e}")
+
+    def _finish(self, mutation: Dict[str, Any], event_id: Optional[str], event_link: Optional[str]) -> None:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE calendar_mutations
+                SET status = 'done', event_id = %s, event_link = %s, last_error = NULL, updated_at = NOW()
+                WHERE id = %s
+            """, (event_id, event_link, mutation["id"]))
+
+        if mutation["op"] == "insert" and mutation.get("booking_id"):
+            try:
+                with get_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("""
+                        UPDATE bookings SET event_id = %s, event_link = %s WHERE id = %s::uuid
+                    """, (event_id, event_link, mutation["booking_id"]))
+            except Exception as e:
+                print(f"Warning: Could not store event_id on booking {mutation['booking_id']}: {e}")
+        self.stats["applied"] += 1
+
+    def _retry_or_fail(self, mutation: Dict[str, Any], error: Exception) -> None:
+        attempts = mutation["attempts"] + 1
+        failed = attempts >= CALENDAR_OUTBOX_MAX_ATTEMPTS
+        # Full jitter, so mutations that failed together do not retry together
+        delay = random.uniform(1, min(CALENDAR_OUTBOX_BACKOFF_CAP_SECONDS, 2 ** attempts))
+        status = "failed" if failed else "pending"
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE calendar_mutations
+                SET status = %s, attempts = %s, last_error = %s,
+                    next_attempt_at = NOW() + make_interval(secs => %s), updated_at = NOW()
+                WHERE id = %s
+            """, (status, attempts, str(error)[:1000], delay, mutation["id"]))
+        if failed:
+            self.stats["failed"] += 1
+            # A failed insert keeps blocking its slot (pending_conflicts) until retried or superseded
+            print(
+                f"ALERT: Calendar {mutation['op']} {mutation['id']} ({mutation['calendar_id']}) failed after "
+                f"{attempts} attempts: {error}. Retry with POST /admin/calendar-outbox/{mutation['id']}/retry"
+            )
+        else:
+            self.stats["retried"] += 1
+
+    def _run(self, mutation: Dict[str, Any]) -> None:
+        try:
+            self._apply(mutation)
+        except Exception as e:
+            try:
+                self._retry_or_fail(mutation, e)
+            except Exception as store_error:
+                print(f"Warning: Could not record calendar mutation {mutation['id']} failure: {store_error}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(mutation["calendar_id"])
+            # The next mutation of this calendar may be due now
+            self._wake.set()
+
+    # --- workers ---
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            self._wake.wait(CALENDAR_OUTBOX_POLL_SECONDS)
+            self._wake.clear()
+            try:
+                if not self.is_enabled():
+                    continue
+                for mutation in self._due_heads():
+                    calendar_id = mutation["calendar_id"]
+                    with self._lock:
+                        if calendar_id in self._in_flight:
+                            continue
+                    if not self._claim(mutation["id"]):
+                        continue
+                    with self._lock:
+                        self._in_flight.add(calendar_id)
+                    self._executor.submit(self._run, mutation)
+            except Exception as e:
+                print(f"Warning: Calendar outbox dispatch failed: {e}")
+
+    def start(self, service_provider: Callable[[], Any]) -> None:
+        """
+        Start the worker pool (once per process)
+
+        Args:
+            service_provider: returns Credentials or a Calendar service; each worker thread builds its own service from it
+        """
+        if self._dispatcher and self._dispatcher.is_alive():
+            return
+        self._service_provider = service_provider
+        if self.is_enabled():
+            try:
+                self._release_stale_claims()
+            except Exception as e:
+                print(f"Warning: Could not release stale calendar mutations: {e}")
+        self._executor = ThreadPoolExecutor(max_workers=CALENDAR_OUTBOX_WORKERS, thread_name_prefix="calendar-outbox")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="calendar-outbox-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def retry(self, mutation_id: int) -> bool:
+        """
+        Re-queue a failed mutation (admin); returns False if it is not failed, or is a
+        failed insert a later delete of its booking / hold already superseded
+        """
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE calendar_mutations m
+                SET status = 'pending', attempts = 0, next_attempt_at = NOW(), updated_at = NOW()
+                WHERE m.id = %s AND m.status = 'failed' AND (m.op = 'delete' OR ({_OPEN_INSERT_SQL}))
+            """, (mutation_id,))
+            requeued = cursor.rowcount == 1
+        if requeued:
+            self._wake.set()
+        return requeued
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue size per status, failed inserts still blocking a slot, and counters (for admin)"""
+        if not self.is_enabled():
+            return {"enabled": False, "error": self._table_state[1], **self.stats}
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT status, COUNT(*) FROM calendar_mutations GROUP BY status")
+            by_status = {status: count for status, count in cursor.fetchall()}
+            cursor.execute(f"""
+                SELECT m.id FROM calendar_mutations m
+                WHERE m.status = 'failed' AND {_OPEN_INSERT_SQL}
+                ORDER BY m.id
+            """)
+            failed_inserts = [row[0] for row in cursor.fetchall()]
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {
+            "enabled": True,
+            "by_status": by_status,
+            "failed_inserts_blocking": failed_inserts,
+            "in_flight_calendars": in_flight,
+            **self.stats,
+        }
+
+    def get_mutation(self, mutation_id: int) -> Optional[Dict[str, Any]]:
+        """One mutation (status, attempts, last_error, event_id/event_link)"""
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT id, op, calendar_id, booking_id::text AS booking_id, hold_id, status, attempts,
+                       last_error, event_id, event_link, created_at, updated_at
+                FROM calendar_mutations WHERE id = %s
+            """, (mutation_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+
+# Global instance
+_calendar_outbox = None
+
+
+def get_calendar_outbox() -> CalendarOutbox:
+    """
+    Get or create global CalendarOutbox instance (no DB access - see is_enabled)
+    """
+    global _calendar_outbox
+    if _calendar_outbox is None:
+        _calendar_outbox = CalendarOutbox()
+    return _calendar_outbox
@@ -0,0 +1,413 @@
+"""
+Calendar Watch - Google Calendar push notifications for cabin calendars
+
+Registers an events.watch channel per cabin calendar, renews channels before they
+expire, and on every notification tells the listeners (calendar mirror, availability
+caches) that only that calendar changed.
+
+Channels live in the calendar_watch_channels table (database/migration_calendar_watch.sql),
+so every API worker can resolve a notification, whichever worker Google's request lands on:
+  * one owner per calendar: the worker holding the calendar's advisory lock registers or
+    renews its channel, the other workers skip it
+  * extra channels of a calendar (a renewal that could not stop its predecessor, a
+    worker that died mid-renewal) are stopped on the next renewal run, startup included
+  * channels Google still notifies but no worker knows (earlier deployments) are stopped too
+  * a notification is fanned out to every worker with Postgres NOTIFY, so each worker's
+    mirror and caches drop that calendar, not only the worker that received it
+"""
+import json
+import os
+import select
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+from dotenv import load_dotenv
+from psycopg2.extras import RealDictCursor
+
+from src.db import get_db_connection
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+# Public HTTPS address of POST /webhooks/calendar (push notifications are disabled when empty)
+CALENDAR_WEBHOOK_URL = os.getenv("CALENDAR_WEBHOOK_URL", "").strip()
+
+# Shared secret Google echoes back in X-Goog-Channel-Token
+CALENDAR_WEBHOOK_TOKEN = os.getenv("CALENDAR_WEBHOOK_TOKEN", "").strip()
+
+# Requested channel lifetime (Google may shorten it) and how early to renew
+CALENDAR_WATCH_TTL_SECONDS = int(os.getenv("CALENDAR_WATCH_TTL_SECONDS", str(7 * 24 * 3600)))
+CALENDAR_WATCH_RENEW_MARGIN_SECONDS = int(os.getenv("CALENDAR_WATCH_RENEW_MARGIN_SECONDS", "3600"))
+CALENDAR_WATCH_CHECK_INTERVAL_SECONDS = int(os.getenv("CALENDAR_WATCH_CHECK_INTERVAL_SECONDS", "600"))
+
+# Postgres NOTIFY channel carrying "calendar changed" to every worker
+CALENDAR_WATCH_NOTIFY_CHANNEL = "calendar_watch_changes"
+
+# Pause before the fan-out listener reconnects after losing its DB connection
+_FANOUT_RECONNECT_SECONDS = 5
+
+
+class CalendarWatchManager:
+    """
+    Keeps one push-notification channel per calendar_id, shared by all workers
+    """
+
+    def __init__(self):
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        # Channels Google notified that no worker registered: channel_id -> resource_id
+        self._orphans: Dict[str, str] = {}
+        # Tells this process's own fan-out messages apart from other workers'
+        self._origin = uuid.uuid4().hex
+        self._renewal_thread: Optional[threading.Thread] = None
+        self._fanout_thread: Optional[threading.Thread] = None
+        self.stats = {
+            "notifications": 0,
+            "sync_messages": 0,
+            "ignored": 0,
+            "registered": 0,
+            "renewed": 0,
+            "stale_stopped": 0,
+            "orphans_stopped": 0,
+            "fanout_received": 0,
+        }
+        if self.is_enabled():
+            self._check_table()
+
+    def is_enabled(self) -> bool:
+        """Check if a webhook address is configured"""
+        return bool(CALENDAR_WEBHOOK_URL)
+
+    @staticmethod
+    def _check_table() -> None:
+        """
+        Raises:
+            RuntimeError: calendar_watch_channels is missing or the DB is unreachable -
+                channels kept per process would leak and miss other workers' notifications
+        """
+        try:
+            with get_db_connection() as conn:
+                conn.cursor().execute("SELECT 1 FROM calendar_watch_channels LIMIT 1")
+        except Exception as e:
+            raise RuntimeError(
+                f"calendar_watch_channels table not available ({e}). Run database/run_migration_calendar_watch.py."
+            ) from e
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """callback(calendar_id) runs in every worker for every change notification of that calendar"""
+        self._listeners.append(callback)
+
+    # --- channels ---
+
+    @staticmethod
+    def _calendar_channels(cursor, calendar_id: str) -> List[Dict[str, Any]]:
+        """Stored channels of calendar_id, latest expiration first"""
+        cursor.execute("""
+            SELECT channel_id, resource_id, calendar_id, EXTRACT(EPOCH FROM expiration)::float AS expiration
+            FROM calendar_watch_channels
+            WHERE calendar_id = %s
+            ORDER BY expiration DESC
+        """, (calendar_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _calendar_for_channel(channel_id: str) -> Optional[str]:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT calendar_id FROM calendar_watch_channels WHERE channel_id = %s", (channel_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def register(self, service, calendar_id: str, cursor=None) -> Dict[str, Any]:
+        """
+        Open a new watch channel on calendar_id and store it
+
+        Args:
+            cursor: store it in the caller's transaction (renewal holds the calendar's lock in it)
+
+        Returns:
+            Channel data (channel_id, resource_id, calendar_id, expiration)
+        """
+        if not self.is_enabled():
+            raise ValueError("CALENDAR_WEBHOOK_URL is not set")
+
+        body = {
+            "id": str(uuid.uuid4()),
+            "type": "web_hook",
+            "address": CALENDAR_WEBHOOK_URL,
+            "params": {"ttl": str(CALENDAR_WATCH_TTL_SECONDS)},
+        }
+        if CALENDAR_WEBHOOK_TOKEN:
+            body["token"] = CALENDAR_WEBHOOK_TOKEN
+
+        result = service.events().watch(calendarId=calendar_id, body=body).execute()
+
+        expiration_ms = result.get("expiration")
+        channel = {
+            "channel_id": result.get("id", body["id"]),
+            "resource_id": result.get("resourceId"),
+            "calendar_id": calendar_id,
+            "expiration": int(expiration_ms) / 1000 if expiration_ms else time.time() + CALENDAR_WATCH_TTL_SECONDS,
+        }
+        insert_sql = """
+            INSERT INTO calendar_watch_channels (channel_id, calendar_id, resource_id, expiration)
+            VALUES (%s, %s, %s, to_timestamp(%s))
+        """
+        params = (channel["channel_id"], calendar_id, channel["resource_id"], channel["expiration"])
+        try:
+            if cursor is not None:
+                cursor.execute(insert_sql, params)
+            else:
+                with get_db_connection() as conn:
+                    conn.cursor().execute(insert_sql, params)
+        except Exception:
+            # A channel nobody can resolve would only leak
+            self._stop_at_google(service, channel["channel_id"], channel["resource_id"])
+            raise
+        self.stats["registered"] += 1
+        return channel
+
+    @staticmethod
+    def _stop_at_google(service, channel_id: str, resource_id: Optional[str]) -> None:
+        try:
+            service.channels().stop(body={"id": channel_id, "resourceId": resource_id}).execute()
+        except Exception as e:
+            # 404: already expired or stopped
+            print(f"Warning: Could not stop calendar watch channel {channel_id}: {e}")
+
+    def stop(self, service, channel_id: str) -> bool:
+        """Stop a channel (Google stops sending notifications for it) and forget it"""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM calendar_watch_channels WHERE channel_id = %s RETURNING resource_id",
+                (channel_id,),
+            )
+            row = cursor.fetchone()
+        if not row:
+            return False
+        self._stop_at_google(service, channel_id, row[0])
+        return True
+
+    def _ensure_calendar(self, service, calendar_id: str) -> Optional[str]:
+        """
+        Register / renew the channel of one calendar and stop its extra channels
+
+        Returns:
+            "registered", "renewed", "skipped" (another worker owns it right now) or None
+        """
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            # One owner per calendar: held until this transaction ends
+            cursor.execute(
+                "SELECT pg_try_advisory_xact_lock(hashtext(%s)) AS locked",
+                (f"calendar_watch:{calendar_id}",),
+            )
+            if not cursor.fetchone()["locked"]:
+                return "skipped"
+
+            now = time.time()
+            channels = self._calendar_channels(cursor, calendar_id)
+            # Google already dropped expired channels - only the rows are left
+            expired = [c["channel_id"] for c in channels if c["expiration"] <= now]
+            if expired:
+                cursor.execute("DELETE FROM calendar_watch_channels WHERE channel_id = ANY(%s)", (expired,))
+            live = [c for c in channels if c["expiration"] > now]
+
+            outcome = None
+            stale = live[1:]
+            if not live:
+                self.register(service, calendar_id, cursor=cursor)
+                outcome = "registered"
+            elif live[0]["expiration"] - now <= CALENDAR_WATCH_RENEW_MARGIN_SECONDS:
+                # New channel first, so there is no window without notifications
+                self.register(service, calendar_id, cursor=cursor)
+                self.stats["renewed"] += 1
+                outcome = "renewed"
+                stale = live
+
+            for channel in stale:
+                cursor.execute("DELETE FROM calendar_watch_channels WHERE channel_id = %s", (channel["channel_id"],))
+                self._stop_at_google(service, channel["channel_id"], channel["resource_id"])
+            self.stats["stale_stopped"] += len(live[1:])
+            return outcome
+
+    def _stop_orphans(self, service) -> int:
+        """Stop channels Google notified that are not in the table (left by earlier processes)"""
+        with self._lock:
+            orphans, self._orphans = self._orphans, {}
+        stopped = 0
+        for channel_id, resource_id in orphans.items():
+            # Registered meanwhile (its sync message can arrive before the row is committed)
+            if self._calendar_for_channel(channel_id) is not None:
+                continue
+            self._stop_at_google(service, channel_id, resource_id)
+            stopped += 1
+        self.stats["orphans_stopped"] += stopped
+        return stopped
+
+    def ensure_watching(self, service, calendar_ids: List[str]) -> Dict[str, Any]:
+        """
+        Register channels for calendars without one, renew channels close to expiry and
+        stop superseded / unknown channels
+
+        Returns:
+            {"registered": n, "renewed": n, "skipped": n, "orphans_stopped": n, "errors": {calendar_id: error}}
+        """
+        summary = {"registered": 0, "renewed": 0, "skipped": 0, "orphans_stopped": 0, "errors": {}}
+
+        for calendar_id in dict.fromkeys(c for c in calendar_ids if c):
+            try:
+                outcome = self._ensure_calendar(service, calendar_id)
+                if outcome:
+                    summary[outcome] += 1
+            except Exception as e:
+                summary["errors"][calendar_id] = str(e)
+
+        try:
+            summary["orphans_stopped"] = self._stop_orphans(service)
+        except Exception as e:
+            summary["errors"]["orphans"] = str(e)
+        return summary
+
+    # --- notifications ---
+
+    def _notify_listeners(self, calendar_id: str) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(calendar_id)
+            except Exception as e:
+                print(f"Warning: Calendar watch listener failed for {calendar_id}: {e}")
+
+    def handle_notification(self, headers: Dict[str, str]) -> Optional[str]:
+        """
+        Process one push notification (the request headers carry everything).
+        Blocking (DB lookup and fan-out) - call it from the DB pool.
+
+        Returns:
+            calendar_id that changed, or None for sync/unknown/unauthorized messages
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+
+        if CALENDAR_WEBHOOK_TOKEN and headers.get("x-goog-channel-token") != CALENDAR_WEBHOOK_TOKEN:
+            self.stats["ignored"] += 1
+            return None
+
+        channel_id = headers.get("x-goog-channel-id", "")
+        state = headers.get("x-goog-resource-state", "")
+        calendar_id = self._calendar_for_channel(channel_id) if channel_id else None
+        if calendar_id is None:
+            # Nobody owns it: stopped on the next renewal run. A sync message may belong to a
+            # channel whose row is not committed yet, so only change messages mark orphans
+            resource_id = headers.get("x-goog-resource-id")
+            if channel_id and resource_id and state != "sync":
+                with self._lock:
+                    self._orphans[channel_id] = resource_id
+            self.stats["ignored"] += 1
+            return None
+
+        if state == "sync":
+            # First message after registration, nothing changed
+            self.stats["sync_messages"] += 1
+            return None
+
+        self.stats["notifications"] += 1
+        self._notify_listeners(calendar_id)
+        try:
+            payload = json.dumps({"calendar_id": calendar_id, "origin": self._origin})
+            with get_db_connection() as conn:
+                conn.cursor().execute("SELECT pg_notify(%s, %s)", (CALENDAR_WATCH_NOTIFY_CHANNEL, payload))
+        except Exception as e:
+            print(f"Warning: Could not fan out calendar change of {calendar_id}: {e}")
+        return calendar_id
+
+    def _receive(self, payload: str) -> None:
+        """A change another worker received"""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("origin") == self._origin or not message.get("calendar_id"):
+            return
+        self.stats["fanout_received"] += 1
+        self._notify_listeners(message["calendar_id"])
+
+    def _fanout_loop(self) -> None:
+        while True:
+            try:
+                with get_db_connection() as conn:
+                    conn.autocommit = True
+                    conn.cursor().execute(f"LISTEN {CALENDAR_WATCH_NOTIFY_CHANNEL}")
+                    while True:
+                        if select.select([conn], [], [], 60) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            self._receive(conn.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"Warning: Calendar watch fan-out listener failed: {e}")
+            time.sleep(_FANOUT_RECONNECT_SECONDS)
+
+    def start_renewal_loop(self, get_service_and_calendar_ids: Callable[[], tuple]) -> None:
+        """
+        Background threads: keep every cabin calendar watched, and receive other workers' notifications.
+        Every worker runs them; the per-calendar locks leave each calendar to one of them.
+
+        Args:
+            get_service_and_calendar_ids: returns (calendar service, list of calendar_ids)
+        """
+        if not self.is_enabled() or self._renewal_thread is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    service, calendar_ids = get_service_and_calendar_ids()
+                    summary = self.ensure_watching(service, calendar_ids)
+                    if summary["errors"]:
+                        print(f"Warning: Calendar watch errors: {summary['errors']}")
+                except Exception as e:
+                    print(f"Warning: Calendar watch renewal failed: {e}")
+                time.sleep(CALENDAR_WATCH_CHECK_INTERVAL_SECONDS)
+
+        self._fanout_thread = threading.Thread(target=self._fanout_loop, name="calendar-watch-fanout", daemon=True)
+        self._fanout_thread.start()
+        self._renewal_thread = threading.Thread(target=loop, name="calendar-watch", daemon=True)
+        self._renewal_thread.start()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Stored channels and this worker's counters (for admin)"""
+        status = {"enabled": self.is_enabled(), **self.stats, "channels": []}
+        if not self.is_enabled():
+            return status
+        with get_db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT calendar_id, channel_id, EXTRACT(EPOCH FROM expiration - NOW())::int AS expires_in_seconds
+                FROM calendar_watch_channels
+                ORDER BY calendar_id, expiration DESC
+            """)
+            status["channels"] = [dict(row) for row in cursor.fetchall()]
+        with self._lock:
+            status["orphans_pending"] = len(self._orphans)
+        return status
+
+
+# Global instance
+_calendar_watch_manager = None
+
+
+def get_calendar_watch_manager() -> CalendarWatchManager:
+    """
+    Get or create global CalendarWatchManager instance
+
+    Raises:
+        RuntimeError: push notifications are enabled but calendar_watch_channels is not available
+    """
+    global _calendar_watch_manager
+    if _calendar_watch_manager is None:
+        _calendar_watch_manager = CalendarWatchManager()
+    return _calendar_watch_manager
@@ -0,0 +1,302 @@
+"""
+Credential Manager - one Google OAuth credentials object per token file and process
+
+The token file is read once; a background thread refreshes the access token a few
+minutes before it expires, so requests never wait for a refresh. Several workers
+(uvicorn processes, CLI scripts) share the token file through a file lock: the first
+one due refreshes and writes the file, the others pick the new token up from it.
+The API profile never opens the interactive consent flow (a server has no browser);
+authorize it once with `python -m src.credentials api`.
+The Credentials object is updated in place, so Calendar services, gspread clients
+and the async Calendar client built from it keep working.
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+load_dotenv(BASE_DIR / ".env")
+
+# Refresh this long before the access token expires (google-auth itself treats a token
+# as expired ~4 minutes early, so stay above that to keep the request path refresh-free)
+GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS", "600"))
+
+# Wait before trying again after a failed background refresh
+GOOGLE_TOKEN_RETRY_SECONDS = int(os.getenv("GOOGLE_TOKEN_RETRY_SECONDS", "60"))
+
+# Token profiles: API server (data/token_api.json) and CLI scripts (data/token.json)
+TOKEN_PROFILES: Dict[str, Dict[str, Any]] = {
+    "api": {
+        "token_path": DATA_DIR / "token_api.json",
+        "scopes": [
+            "https://www.googleapis.com/auth/spreadsheets",
+            "https://www.googleapis.com/auth/drive.readonly",
+            "https://www.googleapis.com/auth/calendar",
+        ],
+        # Force consent so Google actually re-grants scopes
+        "consent_prompt": True,
+        # Loaded by the API server: fail instead of waiting for a browser
+        "interactive": False,
+    },
+    "cli": {
+        "token_path": DATA_DIR / "token.json",
+        "scopes": [
+            "https://www.googleapis.com/auth/spreadsheets.readonly",
+            "https://www.googleapis.com/auth/calendar",
+        ],
+        "consent_prompt": False,
+        "interactive": True,
+    },
+}
+
+CLIENT_SECRET_CANDIDATES = [
+    DATA_DIR / "credentials.json",
+    BASE_DIR / "credentials.json",
+]
+
+
+@contextmanager
+def _file_lock(lock_path: Path):
+    """Exclusive lock shared by all processes using the same token file"""
+    lock_path.parent.mkdir(exist_ok=True)
+    with open(lock_path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10 seconds
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _utcnow() -> datetime:
+    # google-auth keeps expiry as naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CredentialManager:
+    """
+    Shared credentials for one token file, refreshed in the background
+    """
+
+    def __init__(self, token_path: Path, scopes: List[str], consent_prompt: bool = False, interactive: bool = True):
+        self.token_path = Path(token_path)
+        self.lock_path = self.token_path.with_name(self.token_path.name + ".lock")
+        self.scopes = list(scopes)
+        self.consent_prompt = consent_prompt
+        self.interactive = interactive
+        self._creds: Optional[Credentials] = None
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.stats = {"loads": 0, "refreshes": 0, "adopted": 0, "refresh_errors": 0, "last_error": None}
+
+    def get_credentials(self) -> Credentials:
+        """The shared credentials; loads (or authorizes) them on the first call only"""
+        if self._creds is None:
+            with self._lock:
+                if self._creds is None:
+                    self._creds = self._load()
+                    self._start_refresh_loop()
+        return self._creds
+
+    # --- token file ---
+
+    def _read_token_file(self) -> Optional[Credentials]:
+        if not self.token_path.exists():
+            return None
+        try:
+            return Credentials.from_authorized_user_file(str(self.token_path), scopes=self.scopes)
+        except Exception as e:
+            print(f"Warning: Could not read {self.token_path.name}: {e}")
+            return None
+
+    def _write_token_file(self, creds: Credentials) -> None:
+        # Write-then-rename: other workers never read a half-written token
+        tmp_path = self.token_path.with_name(self.token_path.name + f".{os.getpid()}.tmp")
+        tmp_path.write_text(creds.to_json(), encoding="utf-8")
+        os.replace(tmp_path, self.token_path)
+
+    def _load(self) -> Credentials:
+        with _file_lock(self.lock_path):
+            creds = self._read_token_file()
+            self.stats["loads"] += 1
+            if creds and creds.valid:
+                return creds
+
+            if creds and creds.expired and creds.refresh_token:
+                try:
+                    creds.refresh(Request())
+                    self.stats["refreshes"] += 1
+                    self._write_token_file(creds)
+                    return creds
+                except Exception as e:
+                    print(f"Warning: Could not refresh {self.token_path.name}: {e}")
+
+        # No usable token: first run, or the refresh token was revoked
+        if not self.interactive:
+            raise RuntimeError(
+                f"{self.token_path.name} is missing or can no longer be refreshed. "
+                f"Authorize it once with: python -m src.credentials {self._profile_name()}"
+            )
+        return self.authorize()
+
+    def _profile_name(self) -> str:
+        return next((name for name, p in TOKEN_PROFILES.items() if p["token_path"] == self.token_path), "api")
+
+    def authorize(self) -> Credentials:
+        """
+        Interactive OAuth consent, then write the token file. The consent flow waits for
+        a browser, so it runs without the file lock (other workers keep refreshing).
+        """
+        creds = self._run_consent_flow()
+        with _file_lock(self.lock_path):
+            self._write_token_file(creds)
+        return creds
+
+    def _run_consent_flow(self) -> Credentials:
+        cred_file = next((p for p in CLIENT_SECRET_CANDIDATES if p.exists()), None)
+        if not cred_file:
+            raise FileNotFoundError(
+                "Missing credentials.json. Put it in data/credentials.json or in the project root."
+            )
+
+        flow = InstalledAppFlow.from_client_secrets_file(str(cred_file), scopes=self.scopes)
+        if not self.consent_prompt:
+            return flow.run_local_server(port=0)
+        try:
+            return flow.run_local_server(port=0, prompt="consent")
+        except TypeError:
+            return flow.run_local_server(port=0)
+
+    # --- background refresh ---
+
+    def seconds_until_expiry(self) -> Optional[float]:
+        creds = self._creds
+        if creds is None or creds.expiry is None:
+            return None
+        return (creds.expiry - _utcnow()).total_seconds()
+
+    def refresh(self) -> None:
+        """
+        Refresh the shared credentials in place. Under the file lock, a token another
+        worker already refreshed is taken from the file instead of refreshing again.
+        """
+        creds = self.get_credentials()
+        with _file_lock(self.lock_path):
+            on_disk = self._read_token_file()
+            if (
+                on_disk is not None
+                and on_disk.token
+                and on_disk.expiry is not None
+                and (creds.expiry is None or on_disk.expiry > creds.expiry)
+                and (on_disk.expiry - _utcnow()).total_seconds() > GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS
+            ):
+                creds.token = on_disk.token
+                creds.expiry = on_disk.expiry
+                self.stats["adopted"] += 1
+                return
+
+            creds.refresh(Request())
+            self.stats["refreshes"] += 1
+            self._write_token_file(creds)
+
+    def _next_refresh_delay(self) -> float:
+        remaining = self.seconds_until_expiry()
+        if remaining is None:
+            # No expiry known - check again later
+            return GOOGLE_TOKEN_RETRY_SECONDS * 10
+        # Small jitter so several workers do not all wake at the same moment
+        return max(0.0, remaining - GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS) + random.uniform(0, 5)
+
+    def _start_refresh_loop(self) -> None:
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        def loop():
+            delay = self._next_refresh_delay()
+            while True:
+                time.sleep(delay)
+                remaining = self.seconds_until_expiry()
+                if remaining is not None and remaining > GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS:
+                    delay = self._next_refresh_delay()
+                    continue
+                try:
+                    self.refresh()
+                    self.stats["last_error"] = None
+                    delay = self._next_refresh_delay()
+                except Exception as e:
+                    # Keep the current token until it expires; google-auth still refreshes on demand after that
+                    self.stats["refresh_errors"] += 1
+                    self.stats["last_error"] = str(e)
+                    print(f"Warning: Background token refresh failed ({self.token_path.name}): {e}")
+                    delay = GOOGLE_TOKEN_RETRY_SECONDS
+
+        self._refresh_thread = threading.Thread(target=loop, name=f"token-refresh-{self.token_path.stem}", daemon=True)
+        self._refresh_thread.start()
+
+    def get_stats(self) -> Dict[str, Any]:
+        remaining = self.seconds_until_expiry()
+        return {
+            "token_file": self.token_path.name,
+            "loaded": self._creds is not None,
+            "expires_in_seconds": round(remaining) if remaining is not None else None,
+            "refresh_thread_alive": bool(self._refresh_thread and self._refresh_thread.is_alive()),
+            **self.stats,
+        }
+
+
+# Global instances (one per token profile)
+_credential_managers: Dict[str, CredentialManager] = {}
+_credential_managers_lock = threading.Lock()
+
+
+def get_credential_manager(profile: str = "api") -> CredentialManager:
+    """Get or create the credential manager of a token profile ("api" or "cli")"""
+    if profile not in _credential_managers:
+        with _credential_managers_lock:
+            if profile not in _credential_managers:
+                _credential_managers[profile] = CredentialManager(**TOKEN_PROFILES[profile])
+    return _credential_managers[profile]
+
+
+if __name__ == "__main__":
+    # Authorize a token profile (opens a browser)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Authorize a Google token profile")
+    parser.add_argument("profile", nargs="?", default="api", choices=sorted(TOKEN_PROFILES))
+    args = parser.parse_args()
+
+    manager = get_credential_manager(args.profile)
+    manager.authorize()
+    print(f"OK: saved {manager.token_path}")
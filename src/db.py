@@ -197,7 +197,8 @@ def save_booking_to_db(
     total_price: Optional[float] = None,
     status: str = "confirmed",
     event_id: Optional[str] = None,
-    event_link: Optional[str] = None
+    event_link: Optional[str] = None,
+    cursor=None,
 ) -> Optional[str]:
     """
     Save booking to database
@@ -205,64 +206,16 @@ def save_booking_to_db(
     
     Note: cabin_id should be a UUID string (from DB) or a cabin_id from Sheets
     If it's from Sheets, we need to find the UUID in DB first
+
+    cursor: insert in the caller's transaction (nothing is committed here, and errors
+    are raised instead of returning None, so the caller's transaction rolls back)
     """
+    params = (cabin_id, customer_id, check_in, check_out, adults, kids, total_price, status, event_id, event_link)
+    if cursor is not None:
+        return _insert_booking(cursor, *params)
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Try to find cabin by cabin_id (could be UUID or original ID)
-            # First, try as UUID
-            try:
-                import uuid as uuid_lib
-                uuid_lib.UUID(cabin_id)  # Validate UUID format
-                # It's a valid UUID, use it directly
-                cabin_uuid = cabin_id
-            except (ValueError, AttributeError):
-                # Not a UUID, might be original cabin_id from Sheets
-                # Try to find by calendar_id or name (we'll need to add a lookup)
-                # For now, assume it's already a UUID from DB
-                cabin_uuid = cabin_id
-            
-            # Convert customer_id to UUID if provided
-            customer_uuid = None
-            if customer_id:
-                try:
-                    import uuid as uuid_lib
-                    uuid_lib.UUID(customer_id)  # Validate UUID format
-                    customer_uuid = customer_id
-                except (ValueError, AttributeError):
-                    # Not a UUID, skip customer_id
-                    customer_uuid = None
-            
-            # Generate UUID for booking
-            import uuid as uuid_lib
-            booking_uuid = str(uuid_lib.uuid4())
-            
-            cursor.execute("""
-                INSERT INTO bookings (
-                    id, cabin_id, customer_id, check_in, check_out,
-                    adults, kids, total_price, status, event_id, event_link
-                )
-                VALUES (
-                    %s::uuid, %s::uuid, %s::uuid, %s::date, %s::date,
-                    %s, %s, %s, %s, %s, %s
-                )
-                RETURNING id::text
-            """, (
-                booking_uuid,
-                cabin_uuid,
-                customer_uuid,
-                check_in,
-                check_out,
-                adults,
-                kids,
-                total_price,
-                status,
-                event_id,
-                event_link
-            ))
-            
-            booking_id = cursor.fetchone()[0]
+            booking_id = _insert_booking(conn.cursor(), *params)
             conn.commit()
             return booking_id
             
@@ -273,6 +226,74 @@ def save_booking_to_db(
         return None
 
 
+def _insert_booking(
+    cursor,
+    cabin_id: str,
+    customer_id: Optional[str],
+    check_in: str,
+    check_out: str,
+    adults: Optional[int],
+    kids: Optional[int],
+    total_price: Optional[float],
+    status: str,
+    event_id: Optional[str],
+    event_link: Optional[str],
+) -> str:
+    # Try to find cabin by cabin_id (could be UUID or original ID)
+    # First, try as UUID
+    try:
+        import uuid as uuid_lib
+        uuid_lib.UUID(cabin_id)  # Validate UUID format
+        # It's a valid UUID, use it directly
+        cabin_uuid = cabin_id
+    except (ValueError, AttributeError):
+        # Not a UUID, might be original cabin_id from Sheets
+        # Try to find by calendar_id or name (we'll need to add a lookup)
+        # For now, assume it's already a UUID from DB
+        cabin_uuid = cabin_id
+    
+    # Convert customer_id to UUID if provided
+    customer_uuid = None
+    if customer_id:
+        try:
+            import uuid as uuid_lib
+            uuid_lib.UUID(customer_id)  # Validate UUID format
+            customer_uuid = customer_id
+        except (ValueError, AttributeError):
+            # Not a UUID, skip customer_id
+            customer_uuid = None
+    
+    # Generate UUID for booking
+    import uuid as uuid_lib
+    booking_uuid = str(uuid_lib.uuid4())
+    
+    cursor.execute("""
+        INSERT INTO bookings (
+            id, cabin_id, customer_id, check_in, check_out,
+            adults, kids, total_price, status, event_id, event_link
+        )
+        VALUES (
+            %s::uuid, %s::uuid, %s::uuid, %s::date, %s::date,
+            %s, %s, %s, %s, %s, %s
+        )
+        RETURNING id::text
+    """, (
+        booking_uuid,
+        cabin_uuid,
+        customer_uuid,
+        check_in,
+        check_out,
+        adults,
+        kids,
+        total_price,
+        status,
+        event_id,
+        event_link
+    ))
+    
+    return cursor.fetchone()[0]
+
+
 def get_cabin_by_id(cabin_id: str) -> Optional[Dict[str, Any]]:
     """
     Get cabin by ID from database
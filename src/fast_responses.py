@@ -0,0 +1,99 @@
+"""
+Fast Responses - orjson JSON responses and gzip for large payloads
+
+FastJSONResponse is opt-in for endpoints that return big lists of trusted internal data
+(DB rows, the cabin catalog). Returning it directly skips FastAPI's jsonable_encoder pass
+and response_model re-validation; Decimal, UUID, date/datetime and Pydantic models are
+encoded the same way jsonable_encoder would. Without orjson it falls back to json.dumps.
+
+SelectiveGZipMiddleware gzips responses above GZIP_MIN_BYTES, except paths that serve
+already compressed content (images, precompressed static files).
+"""
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from dotenv import load_dotenv
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import orjson
+except ImportError:  # json.dumps fallback
+    orjson = None
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+# Responses smaller than this are sent uncompressed
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+
+# Compression level: 6 is zlib's default balance of CPU and size
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+# Images are already compressed; /tools and /data carry their own gzip/brotli variants
+GZIP_EXCLUDED_PATH_PREFIXES = ("/img/", "/zimmers_pic/", "/tools", "/data/")
+
+
+def _default(obj: Any) -> Any:
+    """Types orjson / json do not encode themselves, as jsonable_encoder encodes them"""
+    if isinstance(obj, Decimal):
+        # jsonable_encoder: whole numbers stay int (e.g. NUMERIC(10,0) prices)
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON (the same bytes Starlette's JSONResponse produces)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson. Return it from an endpoint only for trusted data:
+    FastAPI does not validate or re-encode a Response it is handed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves already compressed paths alone
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(GZIP_EXCLUDED_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
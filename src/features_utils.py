@@ -1,6 +1,7 @@
 import json
+import re
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 
 def _project_root() -> Path:
@@ -209,6 +210,205 @@ def all_feature_keys(catalog: Dict[str, Any]) -> set:
     return keys
 
 
+# Extra spellings of catalog keys (catalog keys and Hebrew labels are indexed automatically)
+FEATURE_ALIASES = {
+    "wifi": "internet",
+    "wi-fi": "internet",
+    "ווייפיי": "internet",
+    "jacuzzi": "jacuzzi",
+    "ג'קוזי": "jacuzzi",
+    "ג׳קוזי": "jacuzzi",
+    "hot tub": "hot_tub",
+    "barbecue": "bbq",
+    "grill": "bbq",
+    "air conditioning": "ac",
+    "מזגן": "ac",
+    "ממד": "safe_room",
+    "pets": "pets_allowed",
+    "pet friendly": "pets_allowed",
+    "כשר": "kosher_kitchen",
+    "kosher": "kosher_kitchen",
+    "tv": "smart_tv",
+    "טלוויזיה": "smart_tv",
+}
+
+_FEATURE_SEPARATORS = re.compile(r"[,;|\n]+")
+_QUOTES = str.maketrans("", "", "'\"׳״`")
+
+
+def normalize_feature_token(value: Any) -> str:
+    """Lowercase, no quotes/geresh, spaces and hyphens -> underscore (so 'Hot Tub' == 'hot_tub')"""
+    s = str(value if value is not None else "").strip().lower().translate(_QUOTES)
+    return re.sub(r"[\s\-]+", "_", s).strip("_")
+
+
+# Wanted-token lookups kept per FeatureIndex (search input is unbounded, so the cache is cleared when full)
+_WANTED_CACHE_SIZE = 1024
+
+
+def _words(norm: str) -> Tuple[str, ...]:
+    return tuple(w for w in norm.split("_") if w)
+
+
+def _contains_words(haystack: Tuple[str, ...], needle: Tuple[str, ...]) -> bool:
+    """needle appears in haystack as consecutive whole words ("pool" in kids_pool, not "ac" in blackout)"""
+    n = len(needle)
+    return n > 0 and any(haystack[i:i + n] == needle for i in range(len(haystack) - n + 1))
+
+
+class FeatureIndex:
+    """
+    Features as bitmasks: one bit per canonical catalog key.
+
+    A wanted feature matches a cabin feature that names it as whole words, like the old
+    substring check but without matching inside words: "pool" matches kids_pool,
+    heated_pool and private_pool, "jacuzzi" matches a cabin's "private jacuzzi", "wifi"
+    matches fast_wifi, but "ac" no longer matches blackout_curtains. Keys, Hebrew labels
+    and aliases resolve to the canonical key first ("ג'קוזי" -> jacuzzi).
+
+    Cabin masks are computed once per cabin catalog version (index_cabins); a wanted token
+    becomes one mask of every key that names it, so each cabin costs one AND per token.
+    """
+
+    def __init__(self, catalog: Dict[str, Any]):
+        self.keys = sorted(all_feature_keys(catalog))
+        self.bits = {k: 1 << i for i, k in enumerate(self.keys)}
+
+        # normalized spelling -> canonical key
+        self._lookup: Dict[str, str] = {}
+        for k in self.keys:
+            self._lookup[normalize_feature_token(k)] = k
+        for cat in catalog.get("categories", []):
+            for item in cat.get("items", []):
+                k = str(item.get("key", "")).strip()
+                label = item.get("label_he")
+                if k in self.bits and label:
+                    self._lookup.setdefault(normalize_feature_token(label), k)
+        for alias, k in FEATURE_ALIASES.items():
+            if k in self.bits:
+                self._lookup.setdefault(normalize_feature_token(alias), k)
+
+        self._key_words = {k: _words(normalize_feature_token(k)) for k in self.keys}
+        # normalized wanted token -> (mask of keys naming it, word sequences for cabin tokens outside the catalog)
+        self._wanted: Dict[str, Tuple[int, Tuple[Tuple[str, ...], ...]]] = {}
+        # Precomputed per cabin of the current cabin catalog: id(cabin) -> (cabin, compiled)
+        self._cabins: Dict[int, Tuple[Dict[str, Any], Tuple[int, frozenset]]] = {}
+        self.cabins_version: Optional[int] = None
+
+    def canonical(self, token: Any) -> Optional[str]:
+        """Catalog key for a key, label or alias (None if unknown)"""
+        return self._lookup.get(normalize_feature_token(token))
+
+    @staticmethod
+    def _tokens(features: Any) -> List[str]:
+        if not features:
+            return []
+        if isinstance(features, dict):
+            if "raw" in features:
+                return FeatureIndex._tokens(features["raw"])
+            return [k for k, v in features.items() if v]
+        if isinstance(features, (list, tuple, set)):
+            return [str(f) for f in features]
+        return _FEATURE_SEPARATORS.split(str(features))
+
+    def compile(self, features: Any) -> Tuple[int, frozenset]:
+        """
+        Cabin features (comma string, {key: bool} dict or list) -> (bitmask, word sequences of unknown tokens)
+        """
+        mask = 0
+        unknown = set()
+        for token in self._tokens(features):
+            norm = normalize_feature_token(token)
+            if not norm:
+                continue
+            k = self._lookup.get(norm)
+            if k is None:
+                unknown.add(_words(norm))
+            else:
+                mask |= self.bits[k]
+        return mask, frozenset(unknown)
+
+    def index_cabins(self, cabins: List[Dict[str, Any]], version: Optional[int] = None) -> None:
+        """Precompute the masks of a cabin catalog version (replaces the previous version's)"""
+        self._cabins = {id(cabin): (cabin, self.compile(cabin.get("features", ""))) for cabin in cabins}
+        self.cabins_version = version
+
+    def _compiled_cabin(self, cabin: Dict[str, Any]) -> Tuple[int, frozenset]:
+        entry = self._cabins.get(id(cabin))
+        if entry is not None and entry[0] is cabin:
+            return entry[1]
+        # Not from the current catalog version (Sheets read, older snapshot) - compiled, not cached
+        return self.compile(cabin.get("features", ""))
+
+    def _wanted_token(self, norm: str) -> Tuple[int, Tuple[Tuple[str, ...], ...]]:
+        wanted = self._wanted.get(norm)
+        if wanted is not None:
+            return wanted
+        needles = [_words(norm)]
+        k = self._lookup.get(norm)
+        if k is not None and self._key_words[k] not in needles:
+            # A label or alias also matches what names its key ("ג'קוזי": private_jacuzzi)
+            needles.append(self._key_words[k])
+        mask = self.bits[k] if k is not None else 0
+        for key, words in self._key_words.items():
+            if any(_contains_words(words, needle) for needle in needles):
+                mask |= self.bits[key]
+        wanted = (mask, tuple(needles))
+        if len(self._wanted) >= _WANTED_CACHE_SIZE:
+            self._wanted.clear()
+        self._wanted[norm] = wanted
+        return wanted
+
+    def _missing(self, compiled: Tuple[int, frozenset], wanted: List[str]) -> List[str]:
+        cabin_mask, cabin_unknown = compiled
+        missing = []
+        for w in wanted:
+            norm = normalize_feature_token(w)
+            if not norm:
+                continue
+            mask, needles = self._wanted_token(norm)
+            if cabin_mask & mask:
+                continue
+            if not any(_contains_words(token, needle) for token in cabin_unknown for needle in needles):
+                missing.append(w)
+        return missing
+
+    def has_features(self, cabin_features: Any, wanted: List[str]) -> Tuple[bool, List[str]]:
+        """Same contract as src.main.cabin_has_features"""
+        if not wanted:
+            return True, []
+        missing = self._missing(self.compile(cabin_features), wanted)
+        return len(missing) == 0, missing
+
+    def cabin_has_features(self, cabin: Dict[str, Any], wanted: List[str]) -> Tuple[bool, List[str]]:
+        """has_features for a catalog cabin, using its precomputed mask"""
+        if not wanted:
+            return True, []
+        missing = self._missing(self._compiled_cabin(cabin), wanted)
+        return len(missing) == 0, missing
+
+
+_feature_index = None
+
+
+def get_feature_index() -> FeatureIndex:
+    """Get or create global FeatureIndex (built from data/features_catalog.json)"""
+    global _feature_index
+    if _feature_index is None:
+        _feature_index = FeatureIndex(load_catalog())
+    return _feature_index
+
+
+def reload_feature_index() -> FeatureIndex:
+    """Rebuild after the catalog file changed (keeps the indexed cabin catalog version)"""
+    global _feature_index
+    previous = _feature_index
+    _feature_index = FeatureIndex(load_catalog())
+    if previous is not None:
+        _feature_index.index_cabins([cabin for cabin, _ in previous._cabins.values()], previous.cabins_version)
+    return _feature_index
+
+
 def build_features_string(selected_keys: List[str], json_path: str = "data/features_catalog.json") -> str:
     catalog = load_catalog(json_path)
     valid = all_feature_keys(catalog)
@@ -0,0 +1,270 @@
+"""
+Image Manifest - cabin photos under zimmers_pic/, indexed once instead of globbed per request
+
+Maps every zimmers_pic/<cabin id>/ directory to its ordered images (.jpg, .jpeg, .png)
+with pixel size and a content hash. Image URLs carry the hash as ?v=<fingerprint>, so
+browsers and CDNs can cache them forever and still see a replaced photo at once.
+A background thread polls file mtimes and rebuilds the manifest when photos change.
+"""
+import hashlib
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+IMAGES_DIR = BASE_DIR / "zimmers_pic"
+IMAGES_URL_PREFIX = "/zimmers_pic"
+
+# Served image types, in the order they are listed per cabin
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# How often the watcher compares file mtimes (0 disables it)
+IMAGE_MANIFEST_POLL_SECONDS = int(os.getenv("IMAGE_MANIFEST_POLL_SECONDS", "10"))
+
+# Hex digits of the content hash used in ?v=
+IMAGE_FINGERPRINT_LENGTH = 12
+
+# Longest cabin_id that can name an image directory (longer ones are UUIDs)
+IMAGE_DIR_ID_MAX_LENGTH = 20
+
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_size(f) -> Optional[Tuple[int, int]]:
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in _JPEG_SOF_MARKERS:
+            # length (2), precision (1), height (2), width (2)
+            data = f.read(7)
+            if len(data) < 7:
+                return None
+            height, width = struct.unpack(">HH", data[3:7])
+            return width, height
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            # Markers without a length field
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        f.seek(struct.unpack(">H", length)[0] - 2, os.SEEK_CUR)
+
+
+def _png_size(f) -> Optional[Tuple[int, int]]:
+    header = f.read(24)
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n" or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def image_size(path: Path) -> Optional[Tuple[int, int]]:
+    """(width, height) read from the JPEG/PNG header, None if it cannot be parsed"""
+    try:
+        with open(path, "rb") as f:
+            if path.suffix.lower() == ".png":
+                return _png_size(f)
+            return _jpeg_size(f)
+    except (OSError, struct.error):
+        return None
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImageManifest:
+    """
+    cabin image directory -> ordered image entries (url, width, height, hash, bytes)
+    """
+
+    def __init__(self, images_dir: Path = IMAGES_DIR, url_prefix: str = IMAGES_URL_PREFIX):
+        self.images_dir = Path(images_dir)
+        self.url_prefix = url_prefix
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._signature: Optional[Tuple] = None
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[], None]] = []
+        self.version = 0
+        self.stats = {"builds": 0, "hashed": 0, "errors": 0}
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """callback() runs after every rebuild that changed the manifest"""
+        self._listeners.append(callback)
+
+    # --- scanning ---
+
+    def _scan(self) -> Dict[str, List[Tuple[Path, os.stat_result]]]:
+        found: Dict[str, List[Tuple[Path, os.stat_result]]] = {}
+        if not self.images_dir.is_dir():
+            return found
+        for cabin_dir in sorted(p for p in self.images_dir.iterdir() if p.is_dir()):
+            files = [p for p in cabin_dir.iterdir() if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS]
+            # Same order /availability always used: all .jpg, then .jpeg, then .png, by name
+            files.sort(key=lambda p: (IMAGE_EXTENSIONS.index(p.suffix.lower()), p.name))
+            if files:
+                found[cabin_dir.name] = [(p, p.stat()) for p in files]
+        return found
+
+    @staticmethod
+    def _signature_of(scan: Dict[str, List[Tuple[Path, os.stat_result]]]) -> Tuple:
+        return tuple(
+            (dir_name, path.name, st.st_size, st.st_mtime_ns)
+            for dir_name, files in scan.items()
+            for path, st in files
+        )
+
+    def refresh(self) -> bool:
+        """Rebuild if any image was added, removed or changed; returns True when it did"""
+        with self._lock:
+            scan = self._scan()
+            signature = self._signature_of(scan)
+            if signature == self._signature:
+                return False
+
+            # Unchanged files keep their hash and size
+            previous = {
+                (dir_name, entry["file"]): entry
+                for dir_name, entries in self._entries.items()
+                for entry in entries
+            }
+            entries: Dict[str, List[Dict[str, Any]]] = {}
+            for dir_name, files in scan.items():
+                for path, st in files:
+                    entry = previous.get((dir_name, path.name))
+                    if entry is None or entry["bytes"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+                        try:
+                            content_hash = _file_hash(path)
+                        except OSError as e:
+                            self.stats["errors"] += 1
+                            print(f"Warning: Could not read image {path}: {e}")
+                            continue
+                        self.stats["hashed"] += 1
+                        size = image_size(path)
+                        entry = {
+                            "file": path.name,
+                            "url": f"{self.url_prefix}/{dir_name}/{path.name}?v={content_hash[:IMAGE_FINGERPRINT_LENGTH]}",
+                            "width": size[0] if size else None,
+                            "height": size[1] if size else None,
+                            "hash": content_hash,
+                            "bytes": st.st_size,
+                            "mtime_ns": st.st_mtime_ns,
+                        }
+                    entries.setdefault(dir_name, []).append(entry)
+
+            self._entries = entries
+            self._signature = signature
+            self.version += 1
+            self.stats["builds"] += 1
+
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Warning: Image manifest listener failed: {e}")
+        return True
+
+    def start_watcher(self, interval: int = IMAGE_MANIFEST_POLL_SECONDS) -> None:
+        """Build now and poll for changes in the background (once per process)"""
+        self.refresh()
+        if interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"Warning: Image manifest refresh failed: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="image-manifest", daemon=True)
+        self._watcher.start()
+
+    # --- lookups ---
+
+    def entries(self, dir_name: str) -> List[Dict[str, Any]]:
+        return self._entries.get(str(dir_name), [])
+
+    def urls(self, dir_name: str) -> List[str]:
+        """Fingerprinted URLs of one image directory, in order"""
+        return [entry["url"] for entry in self.entries(dir_name)]
+
+    def image_dir_for(self, cabin: Dict[str, Any], aliases: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        Image directory of a cabin: cabin_id_string, a short (non-UUID) cabin_id,
+        a Hebrew alias contained in the name, else the first directory with images
+        """
+        if self._signature is None:
+            self.refresh()
+        entries = self._entries
+
+        search_ids = []
+        cabin_id_string = cabin.get("cabin_id_string")
+        if cabin_id_string and len(str(cabin_id_string)) <= IMAGE_DIR_ID_MAX_LENGTH:
+            search_ids.append(str(cabin_id_string))
+        cabin_id = cabin.get("cabin_id", "")
+        if cabin_id and len(str(cabin_id)) <= IMAGE_DIR_ID_MAX_LENGTH and "-" not in str(cabin_id):
+            search_ids.append(str(cabin_id))
+        if not search_ids:
+            cabin_name = cabin.get("name", "") or ""
+            for name_key, alias_id in (aliases or {}).items():
+                if name_key in cabin_name:
+                    search_ids.append(alias_id)
+                    break
+            if not search_ids and entries:
+                # Not ideal but what /availability always did: the first directory with images
+                search_ids.append(next(iter(entries)))
+
+        return next((search_id for search_id in search_ids if search_id in entries), None)
+
+    def urls_for_cabin(self, cabin: Dict[str, Any], aliases: Optional[Dict[str, str]] = None) -> List[str]:
+        dir_name = self.image_dir_for(cabin, aliases)
+        return self.urls(dir_name) if dir_name else []
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "directories": {name: len(entries) for name, entries in self._entries.items()},
+            "watching": bool(self._watcher and self._watcher.is_alive()),
+            **self.stats,
+        }
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """The manifest itself (admin)"""
+        return {
+            name: [{k: v for k, v in entry.items() if k != "mtime_ns"} for entry in entries]
+            for name, entries in self._entries.items()
+        }
+
+
+# Global instance
+_image_manifest: Optional[ImageManifest] = None
+
+
+def get_image_manifest() -> ImageManifest:
+    """Get or create the global image manifest"""
+    global _image_manifest
+    if _image_manifest is None:
+        _image_manifest = ImageManifest()
+    return _image_manifest
@@ -0,0 +1,167 @@
+"""
+Image Variants - resized, recompressed cabin photos, rendered on demand and cached on disk
+
+GET /img/{variant}/{cabin dir}/{file} serves a thumb / card / full rendition of an image
+from the image manifest, as WebP when the browser accepts it, else JPEG. Renditions are
+stored under IMAGE_CACHE_DIR keyed by the source's content hash, so a replaced photo
+gets new files and the old ones are never served for it. URLs carry ?v=<fingerprint>:
+a rendition whose fingerprint matches ?v= is cached as immutable, anything else
+(missing or old ?v=, the original served because rendering failed) only briefly.
+Pillow is imported on the first render; without it the original file is served.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.image_manifest import IMAGE_FINGERPRINT_LENGTH, get_image_manifest
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+IMAGE_VARIANTS_URL_PREFIX = "/img"
+
+# Rendered files (safe to delete - they are rebuilt on demand)
+IMAGE_CACHE_DIR = Path(os.getenv("IMAGE_CACHE_DIR", str(BASE_DIR / "data" / "image_cache")))
+
+# variant -> longest side in pixels (never upscaled)
+IMAGE_VARIANTS = {
+    "thumb": 320,
+    "card": 800,
+    "full": 1920,
+}
+
+IMAGE_FORMATS = {
+    "webp": {"media_type": "image/webp", "save": {"format": "WEBP", "quality": 78, "method": 4}},
+    "jpeg": {"media_type": "image/jpeg", "save": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}},
+}
+
+# Fingerprinted URLs never change content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Unversioned requests and the original served in place of a rendition (retried once Pillow works)
+SHORT_CACHE_CONTROL = "public, max-age=300"
+
+
+class ImageVariants:
+    """
+    Renders and caches image variants
+    """
+
+    def __init__(self, cache_dir: Path = IMAGE_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.stats = {"hits": 0, "rendered": 0, "originals": 0, "errors": 0}
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, dir_name: str, file_name: str, variant: str, fmt: str) -> Optional[Tuple[Path, str, Optional[str]]]:
+        """
+        (path, media type, fingerprint) of the rendition, None if the image is not in the manifest.
+        The fingerprint is None when the original is served because the rendition could not be made.
+        Only manifest images are rendered, so request paths never reach the filesystem.
+
+        Raises:
+            ValueError: unknown variant or format
+        """
+        if variant not in IMAGE_VARIANTS:
+            raise ValueError(f"Unknown image variant: {variant}")
+        if fmt not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format: {fmt}")
+
+        manifest = get_image_manifest()
+        entry = next((e for e in manifest.entries(dir_name) if e["file"] == file_name), None)
+        if entry is None:
+            return None
+        source = manifest.images_dir / dir_name / file_name
+        fingerprint = entry["hash"][:IMAGE_FINGERPRINT_LENGTH]
+
+        target = self.cache_dir / f"{entry['hash'][:32]}-{variant}.{fmt}"
+        if target.exists():
+            self.stats["hits"] += 1
+            return target, IMAGE_FORMATS[fmt]["media_type"], fingerprint
+
+        with self._lock_for(target.name):
+            if target.exists():
+                self.stats["hits"] += 1
+                return target, IMAGE_FORMATS[fmt]["media_type"], fingerprint
+            try:
+                self._render(source, target, IMAGE_VARIANTS[variant], fmt)
+            except Exception as e:
+                # No Pillow or an unreadable image: the original is still a valid answer
+                if isinstance(e, ImportError):
+                    self.stats["originals"] += 1
+                else:
+                    self.stats["errors"] += 1
+                    print(f"Warning: Could not render {variant} of {dir_name}/{file_name}: {e}")
+                return source, "image/png" if source.suffix.lower() == ".png" else "image/jpeg", None
+        self.stats["rendered"] += 1
+        return target, IMAGE_FORMATS[fmt]["media_type"], fingerprint
+
+    def _render(self, source: Path, target: Path, max_side: int, fmt: str) -> None:
+        # Pillow only loads when a variant is actually rendered
+        from PIL import Image, ImageOps
+
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            elif img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGBA")
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(target.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+            img.save(tmp_path, **IMAGE_FORMATS[fmt]["save"])
+        os.replace(tmp_path, target)
+
+    def get_stats(self) -> Dict[str, Any]:
+        files = list(self.cache_dir.glob("*.*")) if self.cache_dir.is_dir() else []
+        return {
+            "cache_dir": str(self.cache_dir),
+            "cached_files": len(files),
+            "cached_bytes": sum(f.stat().st_size for f in files),
+            **self.stats,
+        }
+
+
+def variant_url(dir_name: str, entry: Dict[str, Any], variant: str) -> str:
+    """/img/<variant>/<dir>/<file>?v=<fingerprint>"""
+    return (
+        f"{IMAGE_VARIANTS_URL_PREFIX}/{variant}/{dir_name}/{entry['file']}"
+        f"?v={entry['hash'][:IMAGE_FINGERPRINT_LENGTH]}"
+    )
+
+
+def variant_urls(dir_name: Optional[str], variant: str) -> List[str]:
+    """Variant URLs of one image directory of the manifest, in order"""
+    if not dir_name:
+        return []
+    return [variant_url(dir_name, entry, variant) for entry in get_image_manifest().entries(dir_name)]
+
+
+def variant_urls_for_cabin(cabin: Dict[str, Any], variant: str, aliases: Optional[Dict[str, str]] = None) -> List[str]:
+    """Variant URLs of a cabin's photos (same directory lookup as ImageManifest.urls_for_cabin)"""
+    return variant_urls(get_image_manifest().image_dir_for(cabin, aliases), variant)
+
+
+def preferred_format(accept: Optional[str]) -> str:
+    """WebP when the Accept header allows it, else JPEG"""
+    return "webp" if accept and "image/webp" in accept else "jpeg"
+
+
+# Global instance
+_image_variants: Optional[ImageVariants] = None
+
+
+def get_image_variants() -> ImageVariants:
+    """Get or create the global image variant renderer"""
+    global _image_variants
+    if _image_variants is None:
+        _image_variants = ImageVariants()
+    return _image_variants
@@ -0,0 +1,150 @@
+"""
+Interval Index - sorted busy intervals of one calendar for fast overlap queries
+
+Event times are parsed once into UTC epoch seconds. Queries use bisect over
+sorted arrays instead of scanning and re-parsing every event:
+- overlaps / count_overlapping / overlapping: O(log n + k)
+- next_free_slot: O(log n + k) where k is the number of busy blocks skipped
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from src.main import _event_interval_utc, _is_busy_event
+
+TimeLike = Union[datetime, int, float]
+
+
+def to_epoch(value: TimeLike) -> int:
+    """datetime (naive = UTC) or epoch seconds -> int epoch seconds"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+def from_epoch(value: int) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+class IntervalIndex:
+    """
+    Busy intervals [start, end) of one calendar, as UTC epoch seconds
+    """
+
+    __slots__ = ("_starts", "_ends", "_prefix_max_end", "_payloads", "_sorted_ends", "_merged_starts", "_merged_ends")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, Any]] = ()):
+        """
+        Args:
+            intervals: (start_epoch, end_epoch, payload) tuples; payload is usually the event dict
+        """
+        items = sorted(
+            ((int(s), int(e), p) for s, e, p in intervals if int(e) > int(s)),
+            key=lambda item: (item[0], item[1]),
+        )
+
+        self._starts: List[int] = [s for s, _, _ in items]
+        self._ends: List[int] = [e for _, e, _ in items]
+        self._payloads: List[Any] = [p for _, _, p in items]
+        self._sorted_ends: List[int] = sorted(self._ends)
+
+        # Running max of ends (monotonic) - lets overlapping() skip everything that ended before the query
+        self._prefix_max_end: List[int] = []
+        running = None
+        for e in self._ends:
+            running = e if running is None or e > running else running
+            self._prefix_max_end.append(running)
+
+        # Merged (non overlapping) busy blocks for boolean and free slot queries
+        self._merged_starts: List[int] = []
+        self._merged_ends: List[int] = []
+        for s, e in zip(self._starts, self._ends):
+            if self._merged_ends and s <= self._merged_ends[-1]:
+                if e > self._merged_ends[-1]:
+                    self._merged_ends[-1] = e
+            else:
+                self._merged_starts.append(s)
+                self._merged_ends.append(e)
+
+    @classmethod
+    def from_events(cls, events: Iterable[Dict[str, Any]]) -> "IntervalIndex":
+        """Build from Google Calendar event dicts (parses each event once; free / cancelled events are skipped)"""
+        intervals = []
+        for e in events:
+            if not _is_busy_event(e):
+                continue
+            start_dt, end_dt = _event_interval_utc(e)
+            intervals.append((to_epoch(start_dt), to_epoch(end_dt), e))
+        return cls(intervals)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlaps(self, start: TimeLike, end: TimeLike) -> bool:
+        """Check if anything is busy inside [start, end)"""
+        start, end = to_epoch(start), to_epoch(end)
+        j = bisect_right(self._merged_ends, start)
+        return j < len(self._merged_starts) and self._merged_starts[j] < end
+
+    def count_overlapping(self, start: TimeLike, end: TimeLike) -> int:
+        """Number of intervals intersecting [start, end)"""
+        start, end = to_epoch(start), to_epoch(end)
+        if end <= start:
+            return 0
+        # started before end, minus those that also ended by start
+        return bisect_left(self._starts, end) - bisect_right(self._sorted_ends, start)
+
+    def overlapping(self, start: TimeLike, end: TimeLike) -> List[Any]:
+        """Payloads of intervals intersecting [start, end), ordered by start"""
+        start, end = to_epoch(start), to_epoch(end)
+        lo = bisect_right(self._prefix_max_end, start)
+        hi = bisect_left(self._starts, end)
+        return [self._payloads[i] for i in range(lo, hi) if self._ends[i] > start]
+
+    def busy_blocks(self, start: TimeLike, end: TimeLike) -> List[Tuple[int, int]]:
+        """Merged busy blocks clipped to [start, end)"""
+        start, end = to_epoch(start), to_epoch(end)
+        out = []
+        j = bisect_right(self._merged_ends, start)
+        while j < len(self._merged_starts) and self._merged_starts[j] < end:
+            out.append((max(self._merged_starts[j], start), min(self._merged_ends[j], end)))
+            j += 1
+        return out
+
+    def next_free_slot(
+        self,
+        after: TimeLike,
+        duration_seconds: int,
+        before: Optional[TimeLike] = None,
+    ) -> Optional[int]:
+        """
+        Earliest start >= after where [start, start + duration) is free
+
+        Returns:
+            Epoch seconds, or None if no slot ends by `before`
+        """
+        candidate = to_epoch(after)
+        limit = to_epoch(before) if before is not None else None
+        j = bisect_right(self._merged_ends, candidate)
+        while j < len(self._merged_starts) and self._merged_starts[j] < candidate + duration_seconds:
+            candidate = max(candidate, self._merged_ends[j])
+            j += 1
+        if limit is not None and candidate + duration_seconds > limit:
+            return None
+        return candidate
+
+    def booked_nights(self, start: TimeLike, end: TimeLike, tz: tzinfo = timezone.utc) -> Set[str]:
+        """
+        ISO dates (in tz) whose night is taken by a busy block inside [start, end):
+        every date from the block's start date up to, not including, its end date.
+        """
+        nights: Set[str] = set()
+        for s, e in self.busy_blocks(start, end):
+            day = from_epoch(s).astimezone(tz).date()
+            last = from_epoch(e).astimezone(tz).date()
+            while day < last:
+                nights.add(day.isoformat())
+                day += timedelta(days=1)
+        return nights
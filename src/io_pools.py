@@ -0,0 +1,170 @@
+"""
+IO Pools - bounded thread pools per blocking dependency
+
+async endpoints hand blocking calls (googleapiclient, gspread, psycopg2, redis-py,
+smtplib, stripe, Pillow) to the pool of that dependency. A slow Google call then waits for a
+Google worker only, and the event loop keeps serving other requests.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+# Workers per dependency
+IO_POOL_SIZES = {
+    "google": int(os.getenv("IO_POOL_GOOGLE_WORKERS", "16")),
+    "db": int(os.getenv("IO_POOL_DB_WORKERS", "10")),
+    "redis": int(os.getenv("IO_POOL_REDIS_WORKERS", "8")),
+    "smtp": int(os.getenv("IO_POOL_SMTP_WORKERS", "2")),
+    "stripe": int(os.getenv("IO_POOL_STRIPE_WORKERS", "4")),
+    # Pillow resizing is CPU-bound - keep it small
+    "images": int(os.getenv("IO_POOL_IMAGES_WORKERS", "2")),
+}
+
+# Recent waits/run times kept per pool for the percentiles
+_SAMPLE_SIZE = 1000
+
+
+def _percentile(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class IOPool:
+    """
+    ThreadPoolExecutor with queue depth and wait time accounting
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(int(max_workers), 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"io-{name}")
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=_SAMPLE_SIZE)
+        self._run_times = deque(maxlen=_SAMPLE_SIZE)
+        self.stats = {"queued": 0, "active": 0, "completed": 0, "failed": 0, "max_queued": 0, "max_wait": 0.0}
+
+    def _task(self, fn: Callable, args: tuple, kwargs: dict) -> Callable[[], Any]:
+        submitted = time.monotonic()
+
+        def run():
+            started = time.monotonic()
+            wait = started - submitted
+            with self._lock:
+                self.stats["queued"] -= 1
+                self.stats["active"] += 1
+                self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+                self._waits.append(wait)
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self.stats["active"] -= 1
+                    self.stats["completed"] += 1
+                    if failed:
+                        self.stats["failed"] += 1
+                    self._run_times.append(time.monotonic() - started)
+
+        return run
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on this pool and await the result"""
+        with self._lock:
+            self.stats["queued"] += 1
+            self.stats["max_queued"] = max(self.stats["max_queued"], self.stats["queued"])
+        # The worker sees the caller's context variables (e.g. which endpoint spends Google quota)
+        future = self._executor.submit(contextvars.copy_context().run, self._task(fn, args, kwargs))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Client went away before a worker picked the call up - it never runs
+            if future.cancel():
+                with self._lock:
+                    self.stats["queued"] -= 1
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = list(self._waits)
+            run_times = list(self._run_times)
+            stats = dict(self.stats)
+        return {
+            "max_workers": self.max_workers,
+            "queued": stats["queued"],
+            "active": stats["active"],
+            "completed": stats["completed"],
+            "failed": stats["failed"],
+            "max_queued": stats["max_queued"],
+            "wait_ms_avg": _ms(sum(waits) / len(waits)) if waits else None,
+            "wait_ms_p95": _ms(_percentile(waits, 0.95)),
+            "wait_ms_max": _ms(stats["max_wait"]),
+            "run_ms_avg": _ms(sum(run_times) / len(run_times)) if run_times else None,
+            "run_ms_p95": _ms(_percentile(run_times, 0.95)),
+        }
+
+
+# Global instances
+_io_pools: Dict[str, IOPool] = {}
+_io_pools_lock = threading.Lock()
+
+
+def get_io_pool(name: str) -> IOPool:
+    """Get or create the pool of one dependency (google, db, redis, smtp, stripe, images)"""
+    pool = _io_pools.get(name)
+    if pool is None:
+        if name not in IO_POOL_SIZES:
+            raise ValueError(f"Unknown IO pool: {name}")
+        with _io_pools_lock:
+            pool = _io_pools.get(name)
+            if pool is None:
+                pool = _io_pools[name] = IOPool(name, IO_POOL_SIZES[name])
+    return pool
+
+
+async def run_io(name: str, fn: Callable, *args, **kwargs) -> Any:
+    """await run_io("db", save_audit_log, ...) - blocking call on the pool of its dependency"""
+    return await get_io_pool(name).run(fn, *args, **kwargs)
+
+
+def offload(name: str) -> Callable[[Callable], Callable]:
+    """
+    Turn a blocking endpoint function into an async one that runs on the named pool:
+
+        @app.get("/admin/bookings")
+        @offload("db")
+        def get_all_bookings(...): ...
+
+    functools.wraps keeps the signature, so FastAPI still sees the real parameters.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await run_io(name, fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_io_pools_stats() -> Dict[str, Dict[str, Any]]:
+    """Queue depth and wait/run times per pool (for admin)"""
+    return {name: get_io_pool(name).get_stats() for name in IO_POOL_SIZES}
@@ -1,16 +1,21 @@
+import contextvars
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
 from dotenv import load_dotenv
-import gspread
 
-from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+
+from src.credentials import get_credential_manager
+from src.features_utils import get_feature_index
+from src.quota import GoogleQuotaExceeded, GovernedHttpRequest
+from src.resilience import CircuitOpenError, hedged_read
 
 
 def configure_utf8_console() -> None:
@@ -57,59 +62,17 @@ ISRAEL_TZ = get_israel_tzinfo()
 
 
 def get_credentials():
-    import os
-    from pathlib import Path
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-
-    BASE_DIR = Path(__file__).resolve().parents[1]
-    data_dir = BASE_DIR / "data"
-    data_dir.mkdir(exist_ok=True)
-
-    # Scopes for: read Google Sheets + read/write Google Calendar
-    SCOPES = [
-        "https://www.googleapis.com/auth/spreadsheets.readonly",
-        "https://www.googleapis.com/auth/calendar",
-    ]
-
-    token_path = data_dir / "token.json"
-    creds_path = data_dir / "credentials.json"
-
-    # fallback if credentials.json is in project root
-    if not creds_path.exists():
-        alt = BASE_DIR / "credentials.json"
-        if alt.exists():
-            creds_path = alt
-
-    if not creds_path.exists():
-        raise FileNotFoundError(
-            "Missing credentials.json. Put it in data/credentials.json or in project root."
-        )
-
-    creds = None
-
-    if token_path.exists():
-        try:
-            creds = Credentials.from_authorized_user_file(str(token_path), SCOPES)
-        except Exception:
-            creds = None
-
-    if creds and creds.expired and creds.refresh_token:
-        try:
-            creds.refresh(Request())
-        except Exception:
-            creds = None
-
-    if not creds or not creds.valid:
-        flow = InstalledAppFlow.from_client_secrets_file(str(creds_path), SCOPES)
-        creds = flow.run_local_server(port=0)
-        token_path.write_text(creds.to_json(), encoding="utf-8")
-
-    return creds
+    """
+    CLI credentials (data/token.json), loaded once per process and refreshed in the background.
+    See src/credentials.py.
+    """
+    return get_credential_manager("cli").get_credentials()
 
 
 def read_cabins_from_sheet(creds: Credentials) -> list[dict]:
+    # Sheets is only a fallback for the DB - imported on first use to keep startup fast
+    import gspread
+
     load_dotenv(BASE_DIR / ".env")
 
     sheet_id = os.getenv("SHEET_ID")
@@ -132,37 +95,154 @@ def read_cabins_from_sheet(creds: Credentials) -> list[dict]:
 
 
 
+# Pinned Calendar v3 discovery document (JSON file); empty: the copy bundled with google-api-python-client
+CALENDAR_DISCOVERY_PATH = os.getenv("CALENDAR_DISCOVERY_PATH", "").strip()
+
+_calendar_discovery_doc = None
+_calendar_discovery_lock = threading.Lock()
+
+
+def _calendar_discovery_document():
+    """
+    Calendar v3 discovery document, read once per process.
+    build() would look it up and read it again for every service (one per worker thread).
+    """
+    global _calendar_discovery_doc
+    if _calendar_discovery_doc is None:
+        with _calendar_discovery_lock:
+            if _calendar_discovery_doc is None:
+                doc = None
+                if CALENDAR_DISCOVERY_PATH:
+                    try:
+                        doc = Path(CALENDAR_DISCOVERY_PATH).read_text(encoding="utf-8")
+                    except OSError as e:
+                        print(f"Warning: Could not read CALENDAR_DISCOVERY_PATH: {e}")
+                if doc is None:
+                    from googleapiclient.discovery_cache import get_static_doc
+                    doc = get_static_doc("calendar", "v3")
+                # "" = no static document, build() discovers over the network
+                _calendar_discovery_doc = doc or ""
+    return _calendar_discovery_doc or None
+
+
 def build_calendar_service(creds: Credentials):
-    return build("calendar", "v3", credentials=creds)
+    # Every request of this service goes through the Google quota governor (src/quota.py)
+    doc = _calendar_discovery_document()
+    if doc:
+        return build_from_document(doc, credentials=creds, requestBuilder=GovernedHttpRequest)
+    return build("calendar", "v3", credentials=creds, requestBuilder=GovernedHttpRequest)
+
+
+# Worker pool for per-cabin availability checks (find_available_cabins)
+AVAILABILITY_MAX_WORKERS = int(os.getenv("AVAILABILITY_MAX_WORKERS", "8"))
 
+_availability_executor = None
+_availability_executor_lock = threading.Lock()
+_thread_local = threading.local()
 
-def list_calendar_events(creds_or_service, calendar_id: str, time_min_iso: str, time_max_iso: str) -> list[dict]:
+
+def _get_availability_executor() -> ThreadPoolExecutor:
+    """
+    Shared pool, so worker threads (and their calendar services) survive between requests.
+    """
+    global _availability_executor
+    if _availability_executor is None:
+        with _availability_executor_lock:
+            if _availability_executor is None:
+                _availability_executor = ThreadPoolExecutor(
+                    max_workers=AVAILABILITY_MAX_WORKERS,
+                    thread_name_prefix="availability",
+                )
+    return _availability_executor
+
+
+def _thread_calendar_service(creds_or_service):
+    """
+    googleapiclient services share a single httplib2.Http which is not thread safe,
+    so every worker thread gets its own service built from the same credentials.
+    """
+    creds = creds_or_service
+    if hasattr(creds_or_service, "events"):
+        creds = getattr(getattr(creds_or_service, "_http", None), "credentials", None)
+        if creds is None:
+            # Unknown transport - nothing to rebuild from, use as is
+            return creds_or_service
+
+    cached = getattr(_thread_local, "calendar_service", None)
+    if cached is not None and cached[0] is creds:
+        return cached[1]
+
+    service = build_calendar_service(creds)
+    _thread_local.calendar_service = (creds, service)
+    return service
+
+
+# Fields availability code needs from each event (partial response)
+CALENDAR_EVENT_FIELDS = "id,status,summary,start,end,transparency"
+
+# events.list maximum page size
+CALENDAR_PAGE_SIZE = 2500
+
+
+def iter_calendar_events(
+    creds_or_service,
+    calendar_id: str,
+    time_min_iso: str,
+    time_max_iso: str,
+    fields: str = CALENDAR_EVENT_FIELDS,
+    page_size: int = CALENDAR_PAGE_SIZE,
+):
+    """
+    Streams events of calendar_id in [time_min_iso, time_max_iso), ordered by start.
+
+    Follows nextPageToken until the last page and asks Google only for `fields`
+    of every event, so long ranges and busy calendars are complete and small.
+    Every page is a hedged read (src/resilience.py).
+    """
+    service = _calendar_service(creds_or_service)
+
+    page_token = None
+    while True:
+        def read_page(page_token=page_token):
+            # Runs on hedge threads - use that thread's own service
+            return (
+                _thread_calendar_service(service).events()
+                .list(
+                    calendarId=calendar_id,
+                    timeMin=time_min_iso,
+                    timeMax=time_max_iso,
+                    singleEvents=True,
+                    orderBy="startTime",
+                    maxResults=page_size,
+                    pageToken=page_token,
+                    fields=f"nextPageToken,items({fields})",
+                )
+                .execute()
+            )
+
+        result = hedged_read(calendar_id, read_page)
+        yield from result.get("items", [])
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def list_calendar_events(
+    creds_or_service,
+    calendar_id: str,
+    time_min_iso: str,
+    time_max_iso: str,
+    fields: str = CALENDAR_EVENT_FIELDS,
+) -> list[dict]:
     """
     Accepts either:
     - google.oauth2.credentials.Credentials
     - googleapiclient.discovery.Resource (calendar service)
 
     This prevents mismatches like calling .events() on Credentials.
+    Returns all pages (see iter_calendar_events).
     """
-    # If it's already a Calendar API service, it has .events()
-    if hasattr(creds_or_service, "events"):
-        service = creds_or_service
-    else:
-        # Assume it's Credentials
-        service = build("calendar", "v3", credentials=creds_or_service)
-
-    result = (
-        service.events()
-        .list(
-            calendarId=calendar_id,
-            timeMin=time_min_iso,
-            timeMax=time_max_iso,
-            singleEvents=True,
-            orderBy="startTime",
-        )
-        .execute()
-    )
-    return result.get("items", [])
+    return list(iter_calendar_events(creds_or_service, calendar_id, time_min_iso, time_max_iso, fields=fields))
 
 
 def create_calendar_event(
@@ -172,10 +252,12 @@ def create_calendar_event(
     start_local: datetime,
     end_local: datetime,
     description: str = "",
+    event_id: str | None = None,
 ) -> dict:
     """
     יוצר אירוע ביומן.
     start_local/end_local חייבים להיות timezone-aware (שעון ישראל).
+    event_id (אופציונלי, base32hex): מזהה קבוע לאירוע, כך שניסיון חוזר לא יוצר כפילות (Google מחזיר 409).
     """
     if start_local.tzinfo is None:
         start_local = start_local.replace(tzinfo=ISRAEL_TZ)
@@ -194,6 +276,8 @@ def create_calendar_event(
             "timeZone": "Asia/Jerusalem",
         },
     }
+    if event_id:
+        body["id"] = event_id
 
     created = service.events().insert(calendarId=calendar_id, body=body).execute()
     return created
@@ -217,8 +301,6 @@ def delete_calendar_event(
         print(f"Error deleting calendar event {event_id}: {e}")
         return False
 
-from datetime import datetime, timedelta, timezone
-
 
 def _to_rfc3339_z(dt: datetime) -> str:
     # Ensure UTC RFC3339 with Z suffix
@@ -262,16 +344,87 @@ def _event_interval_utc(e: dict) -> tuple[datetime, datetime]:
     return start_dt, end_dt
 
 
+def _is_busy_event(e: dict) -> bool:
+    """
+    Event blocks the cabin: not cancelled and not marked "free" (transparency: transparent).
+    freeBusy leaves transparent events out, so the events and mirror paths do the same.
+    """
+    return e.get("status") != "cancelled" and e.get("transparency") != "transparent"
+
+
 def _intervals_overlap(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime) -> bool:
     # Overlap if intervals intersect: [a_start, a_end) with [b_start, b_end)
     return a_start < b_end and b_start < a_end
 
 
+# Availability backend: "freebusy" (one bulk query for many calendars) or "events" (events.list per calendar)
+AVAILABILITY_BACKEND = os.getenv("AVAILABILITY_BACKEND", "freebusy").strip().lower()
+
+# Calendar freeBusy accepts at most 50 calendars per query
+FREEBUSY_MAX_CALENDARS = 50
+
+
+def _calendar_service(creds_or_service):
+    if hasattr(creds_or_service, "events"):
+        return creds_or_service
+    return build_calendar_service(creds_or_service)
+
+
+def query_freebusy(
+    creds_or_service,
+    calendar_ids: list[str],
+    time_min_iso: str,
+    time_max_iso: str,
+) -> dict[str, dict]:
+    """
+    Busy periods for many calendars, FREEBUSY_MAX_CALENDARS per request.
+
+    Returns {calendar_id: {"busy": [(start_utc, end_utc), ...], "errors": [...]}}.
+    A calendar Google could not answer for (notFound, no access) has non empty "errors".
+    """
+    service = _calendar_service(creds_or_service)
+
+    unique_ids = list(dict.fromkeys(cid for cid in calendar_ids if cid))
+    out: dict[str, dict] = {}
+
+    for i in range(0, len(unique_ids), FREEBUSY_MAX_CALENDARS):
+        chunk = unique_ids[i:i + FREEBUSY_MAX_CALENDARS]
+        body = {
+            "timeMin": time_min_iso,
+            "timeMax": time_max_iso,
+            "timeZone": "UTC",
+            "items": [{"id": cid} for cid in chunk],
+        }
+        result = hedged_read(
+            "freebusy",
+            lambda body=body: _thread_calendar_service(service).freebusy().query(body=body).execute(),
+        )
+        calendars = result.get("calendars", {})
+
+        for cid in chunk:
+            entry = calendars.get(cid)
+            if entry is None:
+                out[cid] = {"busy": [], "errors": [{"reason": "missing"}]}
+                continue
+            busy = []
+            for period in entry.get("busy", []):
+                if period.get("start") and period.get("end"):
+                    busy.append((_parse_event_dt(period["start"]), _parse_event_dt(period["end"])))
+            out[cid] = {"busy": busy, "errors": entry.get("errors", [])}
+
+    return out
+
+
+def _busy_overlaps(busy: list[tuple[datetime, datetime]], start_utc: datetime, end_utc: datetime) -> bool:
+    return any(_intervals_overlap(start_utc, end_utc, b_start, b_end) for b_start, b_end in busy)
+
+
 def is_cabin_available(
     creds_or_service,
     calendar_id: str,
     desired_start_utc: datetime,
     desired_end_utc: datetime,
+    backend: str | None = None,
 ) -> tuple[bool, list[dict]]:
     """
     Returns:
@@ -279,14 +432,43 @@ def is_cabin_available(
     - conflicts: list of conflicting events (empty if available)
 
     creds_or_service can be Credentials or Calendar service.
+
+    backend="freebusy" answers "free" from one freeBusy query; events.list is only
+    fetched when the calendar is busy (to return conflict details) or freeBusy failed.
+    backend="mirror" answers from the local calendar mirror (src/calendar_mirror.py).
+    backend="snapshot" answers from whatever the mirror holds, without calling Google
+    (stale fallback while the Google circuit is open).
     """
+    backend = backend or AVAILABILITY_BACKEND
+
+    if backend == "mirror":
+        from src.calendar_mirror import get_calendar_mirror
+        return get_calendar_mirror().is_cabin_available(
+            creds_or_service, calendar_id, desired_start_utc, desired_end_utc
+        )
+    if backend == "snapshot":
+        from src.calendar_mirror import get_calendar_mirror
+        return get_calendar_mirror().is_cabin_available_snapshot(calendar_id, desired_start_utc, desired_end_utc)
     time_min = _to_rfc3339_z(desired_start_utc)
     time_max = _to_rfc3339_z(desired_end_utc)
 
+    if backend == "freebusy":
+        try:
+            entry = query_freebusy(creds_or_service, [calendar_id], time_min, time_max)[calendar_id]
+        except (GoogleQuotaExceeded, CircuitOpenError):
+            raise
+        except Exception:
+            entry = None
+        if entry is not None and not entry["errors"]:
+            if not _busy_overlaps(entry["busy"], desired_start_utc, desired_end_utc):
+                return True, []
+
     events = list_calendar_events(creds_or_service, calendar_id, time_min, time_max)
 
     conflicts: list[dict] = []
     for e in events:
+        if not _is_busy_event(e):
+            continue
         e_start, e_end = _event_interval_utc(e)
         if _intervals_overlap(desired_start_utc, desired_end_utc, e_start, e_end):
             conflicts.append(e)
@@ -348,15 +530,15 @@ def parse_features_arg(features: str | None) -> list[str]:
     return [p for p in parts if p]
 
 
-def cabin_has_features(cabin_features: str, wanted: list[str]) -> tuple[bool, list[str]]:
+def cabin_has_features(cabin_features: str | dict, wanted: list[str]) -> tuple[bool, list[str]]:
+    """
+    התאמה לפי מילים שלמות מול מפתחות הקטלוג (data/features_catalog.json): "pool" תואם ל-"kids_pool"
+    ול-"heated_pool", "jacuzzi" תואם ל-"private jacuzzi", אבל "ac" כבר לא תואם ל-"blackout_curtains".
+    שמות בעברית וכינויים מנורמלים למפתח הקנוני, והבדיקה עצמה היא AND על bitmask (src/features_utils.py).
+    """
     if not wanted:
         return True, []
-    existing = normalize_text(cabin_features).lower()
-    missing = []
-    for w in wanted:
-        if w.lower() not in existing:
-            missing.append(w)
-    return len(missing) == 0, missing
+    return get_feature_index().has_features(cabin_features, wanted)
 
 
 def compute_price_for_stay(cabin: dict, check_in_local: datetime, check_out_local: datetime) -> dict:
@@ -424,7 +606,10 @@ def filter_cabin(
         if normalize_text(area) != cabin_area:
             reasons.append(f"area '{area}' not match '{cabin_area}'")
 
-    ok_feat, missing = cabin_has_features(cabin.get("features", ""), wanted_features)
+    ok_feat, missing = True, []
+    if wanted_features:
+        # Catalog cabins carry a precomputed feature mask
+        ok_feat, missing = get_feature_index().cabin_has_features(cabin, wanted_features)
     if not ok_feat:
         reasons.append(f"missing features: {missing}")
 
@@ -441,6 +626,35 @@ def summarize_conflicts(conflicts: list[dict], limit: int = 3) -> list[str]:
     return out
 
 
+def cabin_matches_id(cabin: dict, cabin_id: str) -> bool:
+    """cabin_id can be cabin_id_string (ZB01), the DB cabin_id or the cabin name"""
+    wanted = normalize_text(cabin_id).lower()
+    if not wanted:
+        return False
+    return wanted in (
+        normalize_text(cabin.get("cabin_id_string")).lower(),
+        normalize_text(cabin.get("cabin_id")).lower(),
+        normalize_text(cabin.get("name")).lower(),
+    )
+
+
+# Planner cost of one cabin's calendar check (lower runs first)
+CHECK_COST_LOCAL = 0   # answered from memory (fresh mirror)
+CHECK_COST_SHARED = 1  # answered by the shared freeBusy / batch request
+CHECK_COST_REMOTE = 2  # needs its own Google call (events.list or mirror sync)
+
+
+def _check_cost(cal_id: str, backend: str, answered_by_bulk: bool) -> int:
+    if answered_by_bulk:
+        return CHECK_COST_SHARED
+    if backend == "snapshot":
+        return CHECK_COST_LOCAL
+    if backend == "mirror":
+        from src.calendar_mirror import get_calendar_mirror
+        return CHECK_COST_LOCAL if get_calendar_mirror().is_fresh(cal_id) else CHECK_COST_REMOTE
+    return CHECK_COST_REMOTE
+
+
 def find_available_cabins(
     service,
     cabins: list[dict],
@@ -451,50 +665,212 @@ def find_available_cabins(
     area: str | None = None,
     wanted_features: list[str] | None = None,
     verbose: bool = False,
+    max_workers: int | None = None,
+    backend: str | None = None,
+    batch: bool = False,
+    cabin_ids: list[str] | None = None,
+    limit: int | None = None,
+    stats: dict | None = None,
 ) -> list[dict]:
     """
     מחזיר צימרים שעוברים גם פילטרים וגם זמינות ביומן.
     לא מוחק כלום מהקיים, זו פונקציה מלאה ויציבה לשלב הבא.
+
+    בדיקות היומן רצות במקביל (max_workers, ברירת מחדל AVAILABILITY_MAX_WORKERS).
+    סדר התוצאות זהה לסדר הצימרים בקלט, ושגיאה ביומן אחד מדלגת רק על אותו צימר.
+    max_workers=1 מריץ את הבדיקות ברצף כמו קודם.
+
+    backend="freebusy" (ברירת מחדל AVAILABILITY_BACKEND) שואל את כל היומנים בשאילתת freeBusy אחת,
+    ורק יומנים ש-freeBusy לא הצליח לענות עליהם עוברים לבדיקת events.list לכל צימר.
+    backend="mirror" עונה מהעותק המקומי של היומנים (מסנכרן רק יומן שהתיישן).
+    batch=True שולח את כל קריאות events.list שנשארו בבקשת batch אחת (src/calendar_batch.py).
+
+    תכנון השאילתה: קודם כל הפילטרים בזיכרון (cabin_ids, calendar_id, קיבולת, אזור, תכונות),
+    ורק אחר כך בדיקות יומן, מהזולה ליקרה (מראה עדכנית, freeBusy משותף, קריאה ל-Google).
+    limit עוצר אחרי שנמצאו מספיק צימרים פנויים (הבדיקות הזולות רצות ראשונות).
+    stats (dict) מתמלא במספר הצימרים שנבדקו ובמספר הקריאות החיצוניות (external_calls).
     """
     wanted_features = wanted_features or []
-    available: list[dict] = []
+    backend = backend or AVAILABILITY_BACKEND
+    if max_workers is None:
+        max_workers = AVAILABILITY_MAX_WORKERS
+    pinned = [normalize_text(x) for x in (cabin_ids or []) if normalize_text(x)]
+
+    report = {
+        "cabins": len(cabins),
+        "filtered_out": 0,
+        "calendar_checks": 0,
+        "answered_locally": 0,
+        "external_calls": 0,
+        "stopped_early": False,
+    }
+    if stats is not None:
+        stats.update(report)
+        report = stats
 
+    # 1. In-memory predicates for every cabin, calendar I/O only for what is left
+    candidates: list[tuple[dict, str]] = []
     for c in cabins:
         cabin_id = c.get("cabin_id", "UNKNOWN")
         cal_id = c.get("calendar_id") or c.get("calendarId")
 
+        if pinned and not any(cabin_matches_id(c, x) for x in pinned):
+            report["filtered_out"] += 1
+            continue
+
         if not cal_id:
+            report["filtered_out"] += 1
             if verbose:
                 print(f"Cabin {cabin_id} missing calendar_id, skipping")
             continue
 
         ok_filters, reasons = filter_cabin(c, adults, kids, area, wanted_features)
         if not ok_filters:
+            report["filtered_out"] += 1
             if verbose:
                 print(f"Cabin {cabin_id} filtered out: {reasons}")
             continue
 
-        # Check availability with error handling
+        candidates.append((c, cal_id))
+
+    if not candidates:
+        return []
+
+    # 2. freeBusy: one bulk query answers every calendar it can
+    bulk: dict[str, dict] = {}
+    if backend == "freebusy":
+        unique_cal_ids = list(dict.fromkeys(cal_id for _, cal_id in candidates))
+        report["external_calls"] += -(-len(unique_cal_ids) // FREEBUSY_MAX_CALENDARS)
         try:
-            ok, conflicts = is_cabin_available(service, cal_id, check_in_utc, check_out_utc)
-            if not ok:
-                if verbose:
-                    examples = summarize_conflicts(conflicts, limit=3)
-                    print(f"Cabin {cabin_id} NOT available, conflicts={len(conflicts)}")
-                    for line in examples:
-                        print(f"  - {line}")
-                continue
+            bulk = query_freebusy(
+                service,
+                unique_cal_ids,
+                _to_rfc3339_z(check_in_utc),
+                _to_rfc3339_z(check_out_utc),
+            )
+        except (GoogleQuotaExceeded, CircuitOpenError):
+            # Falling back to one call per cabin would only spend more quota / wait on a degraded Google
+            raise
+        except Exception as e:
+            if verbose:
+                print(f"freeBusy query failed, falling back to events.list: {e}")
+            bulk = {}
+
+    def answered_by_bulk(cal_id: str) -> bool | None:
+        entry = bulk.get(cal_id)
+        if entry is None or entry["errors"]:
+            return None
+        busy = _busy_overlaps(entry["busy"], check_in_utc, check_out_utc)
+        if busy and verbose:
+            # verbose: events.list for conflict details
+            return None
+        return not busy
+
+    # batch: every events.list still needed goes out in one multipart request
+    prefetched: dict[str, dict] = {}
+    if batch and backend != "mirror":
+        pending = list(dict.fromkeys(cal_id for _, cal_id in candidates if answered_by_bulk(cal_id) is None))
+        if len(pending) > 1:
+            from src.calendar_batch import CALENDAR_BATCH_LIMIT, batch_list_events
+            report["external_calls"] += -(-len(pending) // CALENDAR_BATCH_LIMIT)
+            prefetched = batch_list_events(
+                service, pending, _to_rfc3339_z(check_in_utc), _to_rfc3339_z(check_out_utc)
+            )
+
+    def check(candidate: tuple[dict, str]) -> tuple[bool, list[dict], Exception | None, int]:
+        """(available, conflicts, error, external calls made)"""
+        _, cal_id = candidate
+        free = answered_by_bulk(cal_id)
+        if free is not None:
+            return free, [], None, 0
+        if cal_id in prefetched:
+            item = prefetched[cal_id]
+            if item["error"] is not None:
+                return False, [], item["error"], 0
+            conflicts = [
+                e for e in item["result"]
+                if _is_busy_event(e) and _intervals_overlap(check_in_utc, check_out_utc, *_event_interval_utc(e))
+            ]
+            return not conflicts, conflicts, None, 0
+        calls = 1 if _check_cost(cal_id, backend, False) == CHECK_COST_REMOTE else 0
+        try:
+            svc = service if max_workers <= 1 else _thread_calendar_service(service)
+            per_cabin_backend = "events" if backend == "freebusy" else backend
+            ok, conflicts = is_cabin_available(svc, cal_id, check_in_utc, check_out_utc, backend=per_cabin_backend)
+            return ok, conflicts, None, calls
         except Exception as e:
+            return False, [], e, calls
+
+    # 3. Cheapest checks first (stable: equal cost keeps input order)
+    order = sorted(
+        range(len(candidates)),
+        key=lambda i: _check_cost(
+            candidates[i][1], backend, answered_by_bulk(candidates[i][1]) is not None or candidates[i][1] in prefetched
+        ),
+    )
+
+    # 4. Run in waves of max_workers when a limit may stop the search early
+    wave_size = len(order) if limit is None else max(max_workers, 1)
+    results: dict[int, tuple[bool, list[dict], Exception | None, int]] = {}
+    found = 0
+    for w in range(0, len(order), wave_size):
+        wave = order[w:w + wave_size]
+        wave_candidates = [candidates[i] for i in wave]
+        if max_workers <= 1 or len(wave) == 1:
+            wave_results = [check(candidate) for candidate in wave_candidates]
+        else:
+            # Each check runs in a copy of the caller's context (quota endpoint/priority), results in input order
+            executor = _get_availability_executor()
+            futures = [executor.submit(contextvars.copy_context().run, check, c) for c in wave_candidates]
+            wave_results = [f.result() for f in futures]
+        for i, r in zip(wave, wave_results):
+            results[i] = r
+            report["calendar_checks"] += 1
+            report["external_calls"] += r[3]
+            if r[3] == 0:
+                report["answered_locally"] += 1
+            if r[0] and r[2] is None:
+                found += 1
+        if limit is not None and found >= limit:
+            report["stopped_early"] = w + wave_size < len(order)
+            break
+
+    available: list[dict] = []
+    for i, (c, cal_id) in enumerate(candidates):
+        if i not in results:
+            continue
+        ok, conflicts, error, _ = results[i]
+        cabin_id = c.get("cabin_id", "UNKNOWN")
+
+        if isinstance(error, (GoogleQuotaExceeded, CircuitOpenError)):
+            # Out of quota / Google down is not "cabin unavailable" - fail the search instead of returning a partial list
+            raise error
+
+        if error is not None:
             # If calendar_id is invalid or calendar doesn't exist, skip this cabin
             if verbose:
-                print(f"Cabin {cabin_id} calendar error (calendar_id: {cal_id[:50]}...): {e}")
+                print(f"Cabin {cabin_id} calendar error (calendar_id: {cal_id[:50]}...): {error}")
+            continue
+
+        if not ok:
+            if verbose:
+                examples = summarize_conflicts(conflicts, limit=3)
+                print(f"Cabin {cabin_id} NOT available, conflicts={len(conflicts)}")
+                for line in examples:
+                    print(f"  - {line}")
             continue
 
         c2 = dict(c)
         c2["conflicts_count"] = 0
         available.append(c2)
 
-    return available
+    if verbose:
+        print(
+            f"Availability search: {report['calendar_checks']} calendar checks, "
+            f"{report['external_calls']} external calls"
+        )
+
+    return available[:limit] if limit is not None else available
 
 
 def main_cli():
@@ -661,70 +1037,11 @@ def main_cli():
 
 def get_credentials_api():
     """
-    API credentials loader with enforced scopes.
-    Creates a separate token file for the API server to avoid conflicts.
+    API credentials with a separate token file (data/token_api.json) to avoid conflicts with the CLI.
+    Loaded once per process and refreshed in the background - see src/credentials.py.
     """
-    import os
-    from pathlib import Path
-
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-
-    base_dir = Path(__file__).resolve().parents[1]
-    data_dir = base_dir / "data"
-    data_dir.mkdir(exist_ok=True)
-
-    token_path = data_dir / "token_api.json"
-
-    # Scopes required for:
-    # - read/write Google Sheets (needs full access for gspread.open())
-    # - read Google Drive (for sheets access)
-    # - read/write Google Calendar
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.readonly",
-        "https://www.googleapis.com/auth/calendar",
-    ]
-
-    # Try load existing token
-    creds = None
-    if token_path.exists():
-        creds = Credentials.from_authorized_user_file(str(token_path), scopes=scopes)
-
-    # Refresh or re-auth if needed
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            # credentials.json must exist (usually under data/ or project root)
-            # If your project uses a different path, update here accordingly.
-            candidates = [
-                base_dir / "data" / "credentials.json",
-                base_dir / "credentials.json",
-            ]
-            cred_file = None
-            for c in candidates:
-                if c.exists():
-                    cred_file = c
-                    break
-            if not cred_file:
-                raise FileNotFoundError(
-                    "credentials.json not found. Put it in data/credentials.json or project root."
-                )
-
-            flow = InstalledAppFlow.from_client_secrets_file(str(cred_file), scopes=scopes)
-            creds = flow.run_local_server(port=0)
-
-        # Save token
-        with open(token_path, "w", encoding="utf-8") as f:
-            f.write(creds.to_json())
-
-    return creds
-
-
+    return get_credential_manager("api").get_credentials()
 
-from datetime import datetime, timezone
 
 def main():
     print("ZimmerBot - availability test start")
@@ -0,0 +1,142 @@
+"""
+Occupancy Matrix - cabins x nights boolean matrix for month / season / all-cabin queries
+
+Row = cabin calendar, column = night (local date). True means the night is booked.
+Rows are filled from each calendar's IntervalIndex (one slice assignment per busy
+block), so "which nights are free" over a month, a season or every cabin is a
+vectorized slice instead of per-day Python loops.
+"""
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.interval_index import IntervalIndex, from_epoch
+
+
+class OccupancyMatrix:
+    """
+    Booked nights of many calendars over a fixed window of days
+    """
+
+    def __init__(self, calendar_ids: List[str], start_day: date, num_days: int):
+        self.calendar_ids = list(dict.fromkeys(calendar_ids))
+        self.row_of: Dict[str, int] = {cid: i for i, cid in enumerate(self.calendar_ids)}
+        self.start_day = start_day
+        self.num_days = max(int(num_days), 0)
+        self.booked = np.zeros((len(self.calendar_ids), self.num_days), dtype=bool)
+
+    @classmethod
+    def from_indexes(
+        cls,
+        indexes: Dict[str, IntervalIndex],
+        start_day: date,
+        end_day: date,
+        tz: tzinfo,
+    ) -> "OccupancyMatrix":
+        """
+        Build for nights start_day .. end_day (inclusive) from {calendar_id: IntervalIndex}
+        """
+        matrix = cls(list(indexes.keys()), start_day, (end_day - start_day).days + 1)
+        for calendar_id, index in indexes.items():
+            matrix.fill_row(calendar_id, index, tz)
+        return matrix
+
+    def _col(self, day: date) -> int:
+        return (day - self.start_day).days
+
+    def fill_row(self, calendar_id: str, index: IntervalIndex, tz: tzinfo) -> None:
+        """(Re)build one calendar's row - call again when that calendar changes"""
+        row = self.row_of[calendar_id]
+        self.booked[row, :] = False
+        if self.num_days == 0:
+            return
+
+        # Window as UTC epoch range: local midnight of the first night .. midnight after the last
+        window_start = int(_local_midnight(self.start_day, tz).timestamp())
+        window_end = int(_local_midnight(self.start_day + timedelta(days=self.num_days), tz).timestamp())
+
+        for s, e in index.busy_blocks(window_start, window_end):
+            first = self._col(from_epoch(s).astimezone(tz).date())
+            last = self._col(from_epoch(e).astimezone(tz).date())  # exclusive: the check-out day is free
+            first, last = max(first, 0), min(last, self.num_days)
+            if first < last:
+                self.booked[row, first:last] = True
+
+    def _slice(self, start_day: Optional[date], end_day: Optional[date]) -> Tuple[int, int]:
+        """Inclusive day range -> clipped column slice"""
+        a = 0 if start_day is None else max(self._col(start_day), 0)
+        b = self.num_days if end_day is None else min(self._col(end_day) + 1, self.num_days)
+        return a, max(a, b)
+
+    def days(self, start_day: Optional[date] = None, end_day: Optional[date] = None) -> List[date]:
+        a, b = self._slice(start_day, end_day)
+        return [self.start_day + timedelta(days=i) for i in range(a, b)]
+
+    def free_nights(
+        self,
+        calendar_id: str,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None,
+    ) -> List[str]:
+        """ISO dates of free nights of one calendar in [start_day, end_day]"""
+        a, b = self._slice(start_day, end_day)
+        free_cols = np.flatnonzero(~self.booked[self.row_of[calendar_id], a:b]) + a
+        return [(self.start_day + timedelta(days=int(i))).isoformat() for i in free_cols]
+
+    def booked_nights(
+        self,
+        calendar_id: str,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None,
+    ) -> List[str]:
+        """ISO dates of booked nights of one calendar in [start_day, end_day]"""
+        a, b = self._slice(start_day, end_day)
+        booked_cols = np.flatnonzero(self.booked[self.row_of[calendar_id], a:b]) + a
+        return [(self.start_day + timedelta(days=int(i))).isoformat() for i in booked_cols]
+
+    def free_for_stay(self, check_in: date, check_out: date) -> Dict[str, bool]:
+        """Per calendar: are all nights check_in .. check_out-1 free"""
+        a, b = self._slice(check_in, check_out - timedelta(days=1))
+        free = ~self.booked[:, a:b].any(axis=1)
+        return {cid: bool(free[i]) for i, cid in enumerate(self.calendar_ids)}
+
+    def free_windows(
+        self,
+        nights: int,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None,
+    ) -> Dict[str, List[date]]:
+        """
+        Per calendar: check-in days of every run of `nights` free nights inside
+        [start_day, end_day] - one cumulative-sum pass over the whole matrix
+        """
+        a, b = self._slice(start_day, end_day)
+        nights = int(nights)
+        if nights <= 0 or b - a < nights:
+            return {cid: [] for cid in self.calendar_ids}
+
+        # booked_in_window[r, i] = booked nights among columns a+i .. a+i+nights-1
+        counts = np.zeros((len(self.calendar_ids), b - a + 1), dtype=np.int32)
+        np.cumsum(self.booked[:, a:b], axis=1, out=counts[:, 1:])
+        booked_in_window = counts[:, nights:] - counts[:, :-nights]
+
+        return {
+            cid: [self.start_day + timedelta(days=a + int(i)) for i in np.flatnonzero(booked_in_window[r] == 0)]
+            for r, cid in enumerate(self.calendar_ids)
+        }
+
+    def occupancy_by_day(self, start_day: Optional[date] = None, end_day: Optional[date] = None) -> List[float]:
+        """Fraction of calendars booked per night (heatmap row)"""
+        a, b = self._slice(start_day, end_day)
+        if not self.calendar_ids:
+            return [0.0] * (b - a)
+        return [round(float(x), 3) for x in self.booked[:, a:b].mean(axis=0)]
+
+    def packed(self) -> np.ndarray:
+        """Bit-packed copy (8 nights per byte per calendar) for storage or transfer"""
+        return np.packbits(self.booked, axis=1)
+
+
+def _local_midnight(day: date, tz: tzinfo) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=tz)
@@ -0,0 +1,314 @@
+"""
+Google Quota Governor - process-wide admission control for Google Calendar calls
+
+Every Calendar call (googleapiclient requests, batch requests, the async client)
+passes through one token bucket. Priority classes keep a reserve of the bucket for
+booking commits, so browsing bursts are throttled (and shed with 503 + Retry-After)
+before a booking ever waits. Rate-limit answers (429, 403 rateLimitExceeded) are
+retried with exponential backoff and full jitter, and halve the bucket's refill rate
+until calls succeed again. Quota spent is counted per API endpoint.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+from googleapiclient.http import HttpRequest
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+# Sustained Calendar calls per second for the whole process, and burst size
+GOOGLE_QUOTA_QPS = float(os.getenv("GOOGLE_QUOTA_QPS", "10"))
+GOOGLE_QUOTA_BURST = float(os.getenv("GOOGLE_QUOTA_BURST", "20"))
+
+# Rate-limit retries: full-jitter exponential backoff between base and cap
+GOOGLE_QUOTA_MAX_RETRIES = int(os.getenv("GOOGLE_QUOTA_MAX_RETRIES", "5"))
+GOOGLE_BACKOFF_BASE_SECONDS = float(os.getenv("GOOGLE_BACKOFF_BASE_SECONDS", "0.5"))
+GOOGLE_BACKOFF_CAP_SECONDS = float(os.getenv("GOOGLE_BACKOFF_CAP_SECONDS", "16"))
+
+# Priority classes (lower = more important)
+PRIORITY_COMMIT = 0       # /book, /hold, cancellations, payment webhooks
+PRIORITY_INTERACTIVE = 1  # agent chat
+PRIORITY_BROWSE = 2       # availability searches, calendars, heatmaps
+PRIORITY_BACKGROUND = 3   # mirror refresh, watch renewal, scripts
+
+# Part of the bucket a class may not touch (kept for the classes above it)
+PRIORITY_RESERVE = {
+    PRIORITY_COMMIT: 0.0,
+    PRIORITY_INTERACTIVE: 0.1,
+    PRIORITY_BROWSE: 0.25,
+    PRIORITY_BACKGROUND: 0.5,
+}
+
+# Longest admission wait before the call is shed
+PRIORITY_MAX_WAIT_SECONDS = {
+    PRIORITY_COMMIT: 30.0,
+    PRIORITY_INTERACTIVE: 15.0,
+    PRIORITY_BROWSE: 10.0,
+    PRIORITY_BACKGROUND: 60.0,
+}
+
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+
+# Who is spending the quota: set per request by the API server, copied into IO pool threads
+_quota_endpoint: ContextVar[str] = ContextVar("google_quota_endpoint", default="background")
+_quota_priority: ContextVar[int] = ContextVar("google_quota_priority", default=PRIORITY_BACKGROUND)
+
+
+class GoogleQuotaExceeded(Exception):
+    """
+    Calendar quota is exhausted (admission wait too long or rate-limit retries used up).
+    The API server answers it with 503 and Retry-After.
+    """
+
+    def __init__(self, retry_after: float, detail: str = "Google Calendar quota exhausted, try again shortly"):
+        self.retry_after = max(retry_after, 1.0)
+        self.detail = detail
+        super().__init__(detail)
+
+
+# Seconds each thread spent in admission waits and rate-limit backoff (not Google latency)
+_quota_waits = threading.local()
+
+
+def quota_wait_seconds() -> float:
+    """Admission wait and backoff seconds of the current thread so far (subtract a before/after pair)"""
+    return getattr(_quota_waits, "seconds", 0.0)
+
+
+def _add_quota_wait(seconds: float) -> None:
+    _quota_waits.seconds = quota_wait_seconds() + seconds
+
+
+@contextmanager
+def quota_context(endpoint: str, priority: int = PRIORITY_BROWSE):
+    """Charge Google calls made inside the block to endpoint, at priority"""
+    endpoint_token = _quota_endpoint.set(endpoint)
+    priority_token = _quota_priority.set(priority)
+    try:
+        yield
+    finally:
+        _quota_priority.reset(priority_token)
+        _quota_endpoint.reset(endpoint_token)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """429, or 403 with a rate-limit reason (googleapiclient HttpError or async client CalendarAPIError)"""
+    resp = getattr(error, "resp", None)
+    status = getattr(resp, "status", None) if resp is not None else getattr(error, "status", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+
+    reason = getattr(error, "reason", None) if resp is None else None
+    if reason is None:
+        try:
+            content = error.content.decode("utf-8") if isinstance(error.content, bytes) else error.content
+            reason = (json.loads(content).get("error", {}).get("errors") or [{}])[0].get("reason")
+        except Exception:
+            reason = None
+    return reason in RATE_LIMIT_REASONS
+
+
+class QuotaGovernor:
+    """
+    Token bucket with priority reserves and adaptive refill rate
+    """
+
+    def __init__(self, qps: float = GOOGLE_QUOTA_QPS, burst: float = GOOGLE_QUOTA_BURST):
+        self.max_rate = max(float(qps), 0.1)
+        self.rate = self.max_rate
+        self.burst = max(float(burst), 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, float]] = {}
+
+    # --- token bucket ---
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self, units: int, priority: int) -> float:
+        """Take units and return 0, or return how long to wait before trying again"""
+        reserve = PRIORITY_RESERVE.get(priority, PRIORITY_RESERVE[PRIORITY_BACKGROUND]) * self.burst
+        # A batch larger than the bucket is admitted once the usable part is full (the bucket goes into debt)
+        needed = min(units, self.burst - reserve)
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = needed - (self._tokens - reserve)
+            if missing <= 0:
+                self._tokens -= units
+                return 0.0
+            return missing / self.rate
+
+    def _admission_timeout(self, waited: float, priority: int, units: int) -> None:
+        if waited >= PRIORITY_MAX_WAIT_SECONDS.get(priority, PRIORITY_MAX_WAIT_SECONDS[PRIORITY_BACKGROUND]):
+            self._count("rejected")
+            raise GoogleQuotaExceeded(retry_after=units / self.rate)
+
+    def acquire(self, units: int = 1, priority: Optional[int] = None) -> float:
+        """Block until units are admitted; returns seconds waited"""
+        priority = _quota_priority.get() if priority is None else priority
+        started = time.monotonic()
+        while True:
+            wait = self._try_take(units, priority)
+            waited = time.monotonic() - started
+            if wait <= 0:
+                return waited
+            self._admission_timeout(waited + wait, priority, units)
+            time.sleep(min(wait, 0.5))
+
+    async def acquire_async(self, units: int = 1, priority: Optional[int] = None) -> float:
+        """acquire() for the event loop"""
+        priority = _quota_priority.get() if priority is None else priority
+        started = time.monotonic()
+        while True:
+            wait = self._try_take(units, priority)
+            waited = time.monotonic() - started
+            if wait <= 0:
+                return waited
+            self._admission_timeout(waited + wait, priority, units)
+            await asyncio.sleep(min(wait, 0.5))
+
+    # --- adaptive rate ---
+
+    def _on_rate_limited(self) -> None:
+        with self._lock:
+            self.rate = max(self.rate / 2, self.max_rate / 16)
+            self._tokens = min(self._tokens, 0.0)
+
+    def _on_success(self) -> None:
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    @staticmethod
+    def backoff_delay(attempt: int) -> float:
+        """Full jitter: uniform(0, min(cap, base * 2^attempt))"""
+        return random.uniform(0, min(GOOGLE_BACKOFF_CAP_SECONDS, GOOGLE_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    # --- metrics ---
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        endpoint = _quota_endpoint.get()
+        with self._lock:
+            counters = self._endpoints.setdefault(
+                endpoint,
+                {"calls": 0, "units": 0, "wait_ms": 0.0, "rate_limited": 0, "retries": 0, "failed": 0, "rejected": 0},
+            )
+            counters[key] += amount
+
+    def _admitted(self, units: int, waited: float) -> None:
+        self._count("calls")
+        self._count("units", units)
+        self._count("wait_ms", round(waited * 1000, 1))
+
+    def _should_retry(self, error: BaseException, attempt: int) -> bool:
+        if not is_rate_limit_error(error):
+            self._count("failed")
+            return False
+        self._count("rate_limited")
+        self._on_rate_limited()
+        if attempt >= GOOGLE_QUOTA_MAX_RETRIES:
+            self._count("failed")
+            raise GoogleQuotaExceeded(retry_after=self.backoff_delay(attempt) or 1.0) from error
+        self._count("retries")
+        return True
+
+    def retry_rate_limited(self, error: BaseException, attempt: int) -> None:
+        """
+        Back off before retrying a call that was rate limited outside call()
+        (a single call inside a batch request, whose round-trip itself succeeded).
+
+        Raises:
+            GoogleQuotaExceeded: the retries are used up
+        """
+        self._should_retry(error, attempt)
+        delay = self.backoff_delay(attempt)
+        _add_quota_wait(delay)
+        time.sleep(delay)
+
+    # --- the choke point ---
+
+    def call(self, fn: Callable[[], Any], units: int = 1) -> Any:
+        """Run a blocking Google call under admission control and rate-limit retries"""
+        for attempt in range(GOOGLE_QUOTA_MAX_RETRIES + 1):
+            waited = self.acquire(units)
+            _add_quota_wait(waited)
+            self._admitted(units, waited)
+            try:
+                result = fn()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self.backoff_delay(attempt)
+                _add_quota_wait(delay)
+                time.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]], units: int = 1) -> Any:
+        """call() for coroutine functions (async Calendar client)"""
+        for attempt in range(GOOGLE_QUOTA_MAX_RETRIES + 1):
+            self._admitted(units, await self.acquire_async(units))
+            try:
+                result = await fn()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(self.backoff_delay(attempt))
+                continue
+            self._on_success()
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate_qps": round(self.rate, 2),
+                "max_rate_qps": self.max_rate,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 2),
+                "endpoints": {name: dict(counters) for name, counters in self._endpoints.items()},
+            }
+
+
+class GovernedHttpRequest(HttpRequest):
+    """
+    googleapiclient request class (build(..., requestBuilder=GovernedHttpRequest)):
+    every execute() goes through the quota governor
+    """
+
+    def execute(self, http=None, num_retries=0):
+        return get_quota_governor().call(lambda: HttpRequest.execute(self, http=http, num_retries=num_retries))
+
+
+# Global instance
+_quota_governor: Optional[QuotaGovernor] = None
+_quota_governor_lock = threading.Lock()
+
+
+def get_quota_governor() -> QuotaGovernor:
+    """Get or create the process-wide quota governor"""
+    global _quota_governor
+    if _quota_governor is None:
+        with _quota_governor_lock:
+            if _quota_governor is None:
+                _quota_governor = QuotaGovernor()
+    return _quota_governor
@@ -0,0 +1,360 @@
+"""
+Google Calendar Resilience - hedged reads and a circuit breaker
+
+Hedging: a read that has not answered after the calendar's p95 latency gets a
+duplicate request, and the first answer wins. Hedges are capped to a small share
+of all reads so a slow Google is not hit with twice the traffic.
+
+Circuit breaker: while Google keeps failing (5xx, timeouts, slow answers) reads fail
+fast with CircuitOpenError instead of blocking. /availability then answers from the
+last mirrored calendars, flagged as stale. After a cool-down one probe read is let
+through, and its success closes the circuit again.
+
+Only time spent in Google counts: hedge pool queueing, quota admission waits and
+rate-limit backoff are our own throttling, and quota errors neither open nor close
+the circuit (the quota governor handles them).
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.quota import GoogleQuotaExceeded, is_rate_limit_error, quota_wait_seconds
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+HEDGE_ENABLED = os.getenv("CALENDAR_HEDGE_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+
+# Hedge delay = p95 of the key's recent latencies, clamped to [min, max]; default until enough samples
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("CALENDAR_HEDGE_MIN_DELAY_SECONDS", "0.15"))
+HEDGE_MAX_DELAY_SECONDS = float(os.getenv("CALENDAR_HEDGE_MAX_DELAY_SECONDS", "2.0"))
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("CALENDAR_HEDGE_DEFAULT_DELAY_SECONDS", "1.0"))
+HEDGE_MIN_SAMPLES = 20
+
+# At most this share of the reads of the last HEDGE_BUDGET_WINDOW_SECONDS may be hedged
+HEDGE_BUDGET_RATIO = float(os.getenv("CALENDAR_HEDGE_BUDGET_RATIO", "0.1"))
+HEDGE_BUDGET_WINDOW_SECONDS = 60
+HEDGE_MAX_WORKERS = int(os.getenv("CALENDAR_HEDGE_MAX_WORKERS", "32"))
+
+# Circuit opens after N failures in a row or a failure rate over the recent window
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CALENDAR_CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_FAILURE_RATE = float(os.getenv("CALENDAR_CIRCUIT_FAILURE_RATE", "0.5"))
+CIRCUIT_WINDOW = int(os.getenv("CALENDAR_CIRCUIT_WINDOW", "20"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CALENDAR_CIRCUIT_OPEN_SECONDS", "30"))
+# A read slower than this counts as a failure (Google degraded, not down)
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv("CALENDAR_CIRCUIT_SLOW_CALL_SECONDS", "5"))
+
+_LATENCY_SAMPLES = 200
+
+
+class CircuitOpenError(Exception):
+    """
+    Google Calendar is degraded and the circuit is open.
+    Endpoints without a stale fallback answer it with 503 and Retry-After (API server).
+    """
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(retry_after, 1.0)
+        self.detail = "Google Calendar is temporarily unavailable, try again shortly"
+        super().__init__(self.detail)
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """Quota exhausted or rate limited: says nothing about Google's health"""
+    return isinstance(error, GoogleQuotaExceeded) or is_rate_limit_error(error)
+
+
+def is_degradation_error(error: BaseException) -> bool:
+    """Errors that say Google is unhealthy (not that our request was wrong or over quota)"""
+    if is_quota_error(error):
+        return False
+    resp = getattr(error, "resp", None)
+    status = getattr(resp, "status", None) if resp is not None else getattr(error, "status", None)
+    try:
+        return int(status) >= 500
+    except (TypeError, ValueError):
+        # No HTTP status: timeout, connection reset, DNS...
+        return True
+
+
+class CircuitBreaker:
+    """
+    closed -> open (fail fast) -> half_open (one probe) -> closed
+    """
+
+    def __init__(self):
+        self.state = "closed"
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._window: Deque[bool] = deque(maxlen=CIRCUIT_WINDOW)
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0, "failures": 0, "successes": 0}
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go to Google now"""
+        with self._lock:
+            if self.state == "open":
+                remaining = self._opened_at + CIRCUIT_OPEN_SECONDS - time.monotonic()
+                if remaining > 0:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(retry_after=remaining)
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "half_open":
+                # A probe that never reported back (cancelled request) stops blocking after a cool-down
+                if self._probe_in_flight and time.monotonic() - self._probe_started < CIRCUIT_OPEN_SECONDS:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(retry_after=1.0)
+                self._probe_in_flight = True
+                self._probe_started = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.stats["successes"] += 1
+            self._consecutive_failures = 0
+            self._window.append(True)
+            if self.state == "half_open":
+                self.state = "closed"
+                self._window.clear()
+            self._probe_in_flight = False
+
+    def record_outcome(self, error: Optional[BaseException]) -> None:
+        """Record a finished call from its error (None = success)"""
+        if error is None:
+            self.record_success()
+        elif is_quota_error(error):
+            self.record_ignored()
+        elif is_degradation_error(error):
+            self.record_failure()
+        else:
+            # Google answered (e.g. 404 for a deleted calendar) - it is healthy
+            self.record_success()
+
+    def record_ignored(self) -> None:
+        """A call whose outcome says nothing about Google (quota): only frees the half-open probe"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.stats["failures"] += 1
+            self._consecutive_failures += 1
+            self._window.append(False)
+            failure_rate = self._window.count(False) / len(self._window)
+            window_full = len(self._window) >= CIRCUIT_WINDOW
+            if (
+                self.state == "half_open"
+                or self._consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD
+                or (window_full and failure_rate >= CIRCUIT_FAILURE_RATE)
+            ):
+                if self.state != "open":
+                    self.stats["opened"] += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._consecutive_failures,
+                "open_for_seconds": round(max(self._opened_at + CIRCUIT_OPEN_SECONDS - time.monotonic(), 0), 1)
+                if self.state == "open" else 0,
+                **self.stats,
+            }
+
+
+class HedgedReader:
+    """
+    Per-key latency tracking and hedged execution of idempotent reads
+    """
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._all_latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        # Start times of recent reads and hedges (hedge budget)
+        self._recent_reads: Deque[float] = deque()
+        self._recent_hedges: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.stats = {"reads": 0, "hedged": 0, "hedge_wins": 0, "hedges_skipped_budget": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+        return self._executor
+
+    def _record_latency(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=_LATENCY_SAMPLES)).append(seconds)
+            self._all_latencies.append(seconds)
+
+    @staticmethod
+    def _p95(samples) -> float:
+        ordered = sorted(samples)
+        return ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)]
+
+    def hedge_delay(self, key: str) -> float:
+        """p95 of this key's reads (all keys while it has few samples), clamped"""
+        with self._lock:
+            samples = self._latencies.get(key)
+            if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+                samples = self._all_latencies
+            if len(samples) < HEDGE_MIN_SAMPLES:
+                return HEDGE_DEFAULT_DELAY_SECONDS
+            p95 = self._p95(samples)
+        return min(max(p95, HEDGE_MIN_DELAY_SECONDS), HEDGE_MAX_DELAY_SECONDS)
+
+    def _take_hedge_budget(self) -> bool:
+        now = time.monotonic()
+        horizon = now - HEDGE_BUDGET_WINDOW_SECONDS
+        with self._lock:
+            for recent in (self._recent_reads, self._recent_hedges):
+                while recent and recent[0] < horizon:
+                    recent.popleft()
+            allowed = len(self._recent_hedges) < HEDGE_BUDGET_RATIO * len(self._recent_reads)
+            if allowed:
+                self._recent_hedges.append(now)
+            else:
+                self.stats["hedges_skipped_budget"] += 1
+            return allowed
+
+    def _timed(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        started: Optional[threading.Event] = None,
+    ) -> Callable[[], Tuple[Any, float]]:
+        """fn wrapped to return (result, seconds spent in Google); sets started when a worker picks it up"""
+        def run():
+            if started is not None:
+                started.set()
+            began = time.monotonic()
+            quota_before = quota_wait_seconds()
+            result = fn()
+            # Admission waits and rate-limit backoff happen on this thread but are not Calendar latency
+            elapsed = time.monotonic() - began - (quota_wait_seconds() - quota_before)
+            self._record_latency(key, elapsed)
+            return result, elapsed
+        return run
+
+    def _outcome(self, error: Optional[BaseException], elapsed: float = 0.0) -> None:
+        if error is not None:
+            self.breaker.record_outcome(error)
+        elif elapsed > CIRCUIT_SLOW_CALL_SECONDS:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def read(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run the idempotent read fn under the circuit breaker, hedging it after the key's p95.
+        fn runs on hedge worker threads, so it must build its own (thread local) Calendar service.
+        """
+        self.breaker.before_call()
+        with self._lock:
+            self.stats["reads"] += 1
+            self._recent_reads.append(time.monotonic())
+
+        if not HEDGE_ENABLED:
+            try:
+                result, elapsed = self._timed(key, fn)()
+            except Exception as e:
+                self._outcome(e)
+                raise
+            self._outcome(None, elapsed)
+            return result
+
+        executor = self._get_executor()
+        primary_started = threading.Event()
+        # Hedge threads see the caller's context (quota endpoint/priority)
+        primary = executor.submit(contextvars.copy_context().run, self._timed(key, fn, primary_started))
+        pending = {primary}
+        # The hedge delay runs from when the primary reaches Google, not from submission:
+        # a primary still queued for a hedge worker is not slow, and a hedge would queue behind it
+        primary_started.wait()
+        done, _ = wait(pending, timeout=self.hedge_delay(key))
+        hedge = None
+        if not done and self._take_hedge_budget():
+            hedge = executor.submit(contextvars.copy_context().run, self._timed(key, fn))
+            pending.add(hedge)
+            with self._lock:
+                self.stats["hedged"] += 1
+
+        # First successful answer wins; the loser finishes in the background and is ignored
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.stats["hedge_wins"] += 1
+                    result, elapsed = future.result()
+                    self._outcome(None, elapsed)
+                    return result
+                if error is None or future is primary:
+                    error = future.exception()
+
+        self._outcome(error)
+        raise error
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            p95_by_key = {
+                key: round(self._p95(samples) * 1000, 1)
+                for key, samples in self._latencies.items()
+                if samples
+            }
+            stats = dict(self.stats)
+        return {
+            "enabled": HEDGE_ENABLED,
+            **stats,
+            "p95_ms": p95_by_key,
+        }
+
+
+# Global instances
+_circuit_breaker: Optional[CircuitBreaker] = None
+_hedged_reader: Optional[HedgedReader] = None
+_globals_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get or create the Google Calendar circuit breaker"""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        with _globals_lock:
+            if _circuit_breaker is None:
+                _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
+
+
+def get_hedged_reader() -> HedgedReader:
+    """Get or create the global HedgedReader (shares the circuit breaker)"""
+    global _hedged_reader
+    if _hedged_reader is None:
+        breaker = get_circuit_breaker()
+        with _globals_lock:
+            if _hedged_reader is None:
+                _hedged_reader = HedgedReader(breaker)
+    return _hedged_reader
+
+
+def hedged_read(key: str, fn: Callable[[], Any]) -> Any:
+    """get_hedged_reader().read(key, fn) - key is usually the calendar_id"""
+    return get_hedged_reader().read(key, fn)
@@ -0,0 +1,213 @@
+"""
+Static Assets - /tools and /data served precompressed, with strong ETags
+
+PrecompressedStaticFiles is StaticFiles plus, for text files (HTML, JSON, JS, CSS, SVG):
+  * gzip and (if the brotli package is installed) brotli variants, compressed once and
+    kept in memory; a file whose size or mtime changed is recompressed in a background
+    thread, and served uncompressed (StaticFiles' own ETag) until that is done
+  * a strong ETag from the content hash, one per encoding, and 304 on If-None-Match
+  * Cache-Control: no-cache, so browsers revalidate instead of downloading again
+Other files (images, ...) are served by StaticFiles unchanged.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+load_dotenv(BASE_DIR / ".env")
+
+# Text types worth compressing
+COMPRESSIBLE_EXTENSIONS = (".html", ".htm", ".json", ".js", ".css", ".svg", ".txt")
+
+# Smaller files are sent as they are (the encoding overhead is not worth it)
+STATIC_COMPRESS_MIN_BYTES = int(os.getenv("STATIC_COMPRESS_MIN_BYTES", "1024"))
+
+# Compressed once per file version, so the slowest levels are affordable
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+# Preferred first when the client accepts several
+_ENCODINGS = ("br", "gzip")
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Codings listed in Accept-Encoding without q=0"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = params.strip().lower()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles with in-memory gzip/brotli variants and content-hash ETags
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # path -> (size, mtime_ns, content hash, {encoding: bytes})
+        self._variants: Dict[str, Tuple[int, int, str, Dict[str, bytes]]] = {}
+        # Paths being compressed in the background
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self.stats = {"compressed": 0, "encoded_responses": 0, "identity_responses": 0, "not_modified": 0}
+
+    def _compressible(self, full_path: str, stat_result: os.stat_result) -> bool:
+        return (
+            full_path.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+            and stat_result.st_size >= STATIC_COMPRESS_MIN_BYTES
+        )
+
+    def _entry(self, full_path: str, stat_result: os.stat_result) -> Optional[Tuple[str, Dict[str, bytes]]]:
+        """
+        (content hash, encoded variants) of the current version of the file, or None while
+        it is being (re)compressed - brotli at the top quality must not run on the event loop
+        """
+        key = (stat_result.st_size, stat_result.st_mtime_ns)
+        cached = self._variants.get(full_path)
+        if cached is not None and cached[:2] == key:
+            return cached[2], cached[3]
+
+        if self._claim(full_path):
+            threading.Thread(
+                target=self._compress_claimed,
+                args=(full_path,),
+                name="static-compress",
+                daemon=True,
+            ).start()
+        return None
+
+    def _claim(self, full_path: str) -> bool:
+        """Mark full_path as being compressed; False if another thread already is"""
+        with self._lock:
+            if full_path in self._pending:
+                return False
+            self._pending.add(full_path)
+            return True
+
+    def _compress_claimed(self, full_path: str) -> None:
+        try:
+            self._compress(full_path, os.stat(full_path))
+        except OSError as e:
+            print(f"Warning: Could not compress {full_path}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(full_path)
+
+    def _compress(self, full_path: str, stat_result: os.stat_result) -> None:
+        """Compress the file as it is now and keep the variants (blocking)"""
+        with open(full_path, "rb") as f:
+            content = f.read()
+        variants = {"gzip": gzip.compress(content, compresslevel=STATIC_GZIP_LEVEL, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(content, quality=STATIC_BROTLI_QUALITY)
+        # Keep a variant only when it is actually smaller
+        variants = {coding: data for coding, data in variants.items() if len(data) < len(content)}
+        content_hash = hashlib.sha256(content).hexdigest()[:32]
+        # Stat taken before the read: a write racing the read leaves a stale key, so the next request recompresses
+        self._variants[full_path] = (stat_result.st_size, stat_result.st_mtime_ns, content_hash, variants)
+        self.stats["compressed"] += 1
+
+    def precompress(self) -> int:
+        """Compress every compressible file now (startup, off the event loop); returns how many"""
+        count = 0
+        for directory in self.all_directories:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    full_path = os.path.abspath(os.path.join(root, name))
+                    try:
+                        stat_result = os.stat(full_path)
+                        if self._compressible(full_path, stat_result) and self._claim(full_path):
+                            self._compress_claimed(full_path)
+                            count += 1
+                    except OSError as e:
+                        print(f"Warning: Could not precompress {full_path}: {e}")
+        return count
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        # Error pages (html=True 404.html) and non-text files: plain StaticFiles behaviour
+        if status_code != 200 or not self._compressible(full_path, stat_result):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        entry = self._entry(full_path, stat_result)
+        if entry is None:
+            # Compressing in the background: plain file until the variants are ready
+            self.stats["identity_responses"] += 1
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers["Cache-Control"] = "no-cache"
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+
+        request_headers = Headers(scope=scope)
+        content_hash, variants = entry
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        coding = next((c for c in _ENCODINGS if c in variants and c in accepted), None)
+
+        # Strong ETags differ per representation
+        etag = f'"{content_hash}-{coding}"' if coding else f'"{content_hash}"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        if coding is None:
+            self.stats["identity_responses"] += 1
+            return FileResponse(full_path, stat_result=stat_result, headers=headers)
+
+        self.stats["encoded_responses"] += 1
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        return Response(
+            content=variants[coding],
+            media_type=media_type,
+            headers={**headers, "Content-Encoding": coding},
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "brotli": brotli is not None,
+            "compressing": len(self._pending),
+            "files": {
+                path: {
+                    "bytes": size,
+                    "etag": content_hash,
+                    **{f"{coding}_bytes": len(data) for coding, data in variants.items()},
+                }
+                for path, (size, _, content_hash, variants) in self._variants.items()
+            },
+            **self.stats,
+        }
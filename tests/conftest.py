@@ -0,0 +1,12 @@
+"""
+Unit tests for the in-memory building blocks (no server, DB, Redis or Google needed)
+
+    python -m pytest tests
+
+The end-to-end scripts against a running server stay in database/test_*.py.
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
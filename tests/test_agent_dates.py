@@ -0,0 +1,65 @@
+"""
+Agent.extract_dates: explicit dates, whole months, and a month plus a stay length
+"""
+from datetime import datetime
+
+import pytest
+
+from src.agent import Agent
+
+YEAR = datetime.now().year
+
+
+@pytest.fixture
+def agent():
+    return Agent()
+
+
+@pytest.mark.parametrize("message, month, year", [
+    ("2 לילות במרץ", 3, YEAR),
+    ("שני לילות באוגוסט", 8, YEAR),
+    ("מחפשים 3 לילות בדצמבר 2027", 12, 2027),
+    ("any 2 nights in March", 3, YEAR),
+    ("3 nights in may 2027", 5, 2027),
+    ("a weekend during july", 7, YEAR),
+])
+def test_month_with_stay_length_is_month_range(agent, message, month, year):
+    dates = agent.extract_dates(message)
+    assert dates is not None
+    assert dates["is_month_range"] is True
+    assert (dates["month"], dates["year"]) == (month, year)
+    assert dates["check_in"] == f"{year}-{month:02d}-01"
+
+
+@pytest.mark.parametrize("message", [
+    "במרץ",                  # month without a stay length
+    "2 לילות",               # stay length without a month
+    "may I book 2 nights?",  # English "may" is not the month
+])
+def test_no_month_range_without_both(agent, message):
+    assert agent.extract_dates(message) is None
+
+
+def test_whole_month_phrases(agent):
+    dates = agent.extract_dates("כל פברואר 2028")
+    assert dates["is_month_range"] is True
+    assert (dates["check_in"], dates["check_out"]) == ("2028-02-01", "2028-02-29")
+
+
+def test_explicit_days_win_over_month_range(agent):
+    assert agent.extract_dates("2 לילות 15-17 במרץ") == {
+        "check_in": f"{YEAR}-03-15",
+        "check_out": f"{YEAR}-03-17",
+    }
+    assert agent.extract_dates("2 לילות ב-15.3")["check_in"] == f"{YEAR}-03-15"
+
+
+@pytest.mark.parametrize("message, nights", [
+    ("2 לילות במרץ", 2),
+    ("any 2 nights in March", 2),
+    ("שלושה לילות", 3),
+    ('סופ"ש באפריל', 2),
+    ("לילה אחד", 1),
+])
+def test_extract_stay_nights(agent, message, nights):
+    assert agent.extract_stay_nights(message) == nights
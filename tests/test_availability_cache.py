@@ -0,0 +1,80 @@
+"""
+AvailabilityCache: invalidation by calendar and date overlap, and stale results from racing searches
+"""
+from datetime import datetime, timezone
+
+from src.availability_cache import AvailabilityCache
+
+
+def utc(day: int) -> datetime:
+    return datetime(2026, 3, day, tzinfo=timezone.utc)
+
+
+def cached(cache, start_day, end_day, calendar_ids, **key_extra):
+    key = cache.make_key(utc(start_day), utc(end_day), **key_extra)
+    cache.set(key, ["result"], utc(start_day), utc(end_day), calendar_ids)
+    return key
+
+
+def test_invalidate_overlapping_dates_of_the_calendar():
+    cache = AvailabilityCache(ttl=60)
+    key = cached(cache, 10, 12, ["cal-a", "cal-b"])
+    assert cache.invalidate("cal-a", utc(11), utc(13)) == 1
+    assert cache.get(key) is None
+
+
+def test_adjacent_dates_are_kept():
+    cache = AvailabilityCache(ttl=60)
+    key = cached(cache, 10, 12, ["cal-a"])
+    # A booking from check-out day onwards does not change the cached stay
+    assert cache.invalidate("cal-a", utc(12), utc(14)) == 0
+    assert cache.invalidate("cal-a", utc(8), utc(10)) == 0
+    assert cache.get(key) == ["result"]
+
+
+def test_other_calendars_are_kept():
+    cache = AvailabilityCache(ttl=60)
+    key = cached(cache, 10, 12, ["cal-a"])
+    assert cache.invalidate("cal-b", utc(10), utc(12)) == 0
+    assert cache.get(key) == ["result"]
+
+
+def test_invalidate_without_calendar_or_dates():
+    cache = AvailabilityCache(ttl=60)
+    first = cached(cache, 10, 12, ["cal-a"], area="north")
+    second = cached(cache, 20, 22, ["cal-b"], area="north")
+    # Any cabin, overlapping dates
+    assert cache.invalidate(None, utc(11), utc(12)) == 1
+    assert cache.get(first) is None
+    # The calendar, any dates
+    assert cache.invalidate("cal-b") == 1
+    assert cache.get(second) is None
+
+
+def test_search_that_raced_an_invalidation_is_not_cached():
+    cache = AvailabilityCache(ttl=60)
+    key = cache.make_key(utc(10), utc(12))
+    generation = cache.generation()
+    cache.invalidate("cal-a", utc(11), utc(12))
+    assert cache.set(key, ["stale"], utc(10), utc(12), ["cal-a"], generation=generation) is False
+    assert cache.get(key) is None
+
+
+def test_unrelated_invalidation_does_not_drop_the_result():
+    cache = AvailabilityCache(ttl=60)
+    key = cache.make_key(utc(10), utc(12))
+    generation = cache.generation()
+    cache.invalidate("cal-b", utc(10), utc(12))
+    cache.invalidate("cal-a", utc(12), utc(14))
+    assert cache.set(key, ["fresh"], utc(10), utc(12), ["cal-a"], generation=generation) is True
+    assert cache.get(key) == ["fresh"]
+
+
+def test_equivalent_searches_share_a_key():
+    assert AvailabilityCache.make_key(utc(10), utc(12), area=" North ", features=["Pool", "wifi"]) == \
+        AvailabilityCache.make_key(utc(10), utc(12), area="North", features=["wifi", "pool", ""])
+
+
+def test_area_key_is_case_sensitive_like_the_area_filter():
+    assert AvailabilityCache.make_key(utc(10), utc(12), area="North") != \
+        AvailabilityCache.make_key(utc(10), utc(12), area="north")
@@ -0,0 +1,83 @@
+"""
+FeatureIndex: aliases and labels, whole-word matching, precomputed cabin masks
+"""
+import pytest
+
+from src.features_utils import FeatureIndex
+
+CATALOG = {
+    "version": 1,
+    "categories": [
+        {"id": "internet", "items": [
+            {"key": "internet", "label_he": "אינטרנט"},
+            {"key": "fast_wifi", "label_he": "ווייפיי מהיר"},
+        ]},
+        {"id": "relax", "items": [
+            {"key": "jacuzzi", "label_he": "ג'קוזי"},
+            {"key": "private_jacuzzi", "label_he": "ג'קוזי פרטי"},
+            {"key": "hot_tub", "label_he": "אמבט חם"},
+            {"key": "kids_pool", "label_he": "בריכת ילדים"},
+            {"key": "heated_pool", "label_he": "בריכה מחוממת"},
+        ]},
+        {"id": "comfort", "items": [
+            {"key": "ac", "label_he": "מיזוג"},
+            {"key": "blackout_curtains", "label_he": "וילונות האפלה"},
+        ]},
+    ],
+}
+
+
+@pytest.fixture
+def index():
+    return FeatureIndex(CATALOG)
+
+
+@pytest.mark.parametrize("cabin_features, wanted", [
+    ("internet", "wifi"),
+    ("internet", "Wi-Fi"),
+    ("fast_wifi", "wifi"),
+    ("jacuzzi", "ג'קוזי"),
+    ("jacuzzi", "ג׳קוזי"),
+    ("private_jacuzzi", "ג'קוזי"),
+    ("hot_tub", "Hot Tub"),
+    ("ac", "מזגן"),
+    ("ac", "מיזוג"),
+    ("kids_pool", "pool"),
+    ("heated_pool", "pool"),
+])
+def test_wanted_feature_matches(index, cabin_features, wanted):
+    assert index.has_features(cabin_features, [wanted]) == (True, [])
+
+
+def test_no_match_inside_words(index):
+    # The old substring check found "ac" in blackout_curtains
+    assert index.has_features("blackout_curtains,internet", ["ac"]) == (False, ["ac"])
+
+
+def test_specific_key_does_not_match_general_one(index):
+    assert index.has_features("jacuzzi", ["private_jacuzzi"]) == (False, ["private_jacuzzi"])
+
+
+def test_cabin_features_outside_the_catalog(index):
+    assert index.has_features("Private Sauna, jacuzzi", ["sauna", "jacuzzi"]) == (True, [])
+    assert index.has_features({"raw": "Private Sauna"}, ["sauna"]) == (True, [])
+    assert index.has_features(["sauna_room"], ["sauna"]) == (True, [])
+
+
+def test_reports_every_missing_feature(index):
+    assert index.has_features("internet", ["wifi", "pool", "מזגן"]) == (False, ["pool", "מזגן"])
+    assert index.has_features("", ["wifi"]) == (False, ["wifi"])
+    assert index.has_features("internet", []) == (True, [])
+
+
+def test_indexed_cabins_use_the_precomputed_mask(index):
+    cabin = {"cabin_id": "ZB01", "features": "kids_pool,ac"}
+    index.index_cabins([cabin], version=3)
+    assert index.cabins_version == 3
+    assert index.cabin_has_features(cabin, ["pool", "ac"]) == (True, [])
+
+    # The mask belongs to the catalog version, not to later edits of the dict
+    cabin["features"] = "internet"
+    assert index.cabin_has_features(cabin, ["pool"]) == (True, [])
+    # A cabin dict from elsewhere is compiled as it is
+    assert index.cabin_has_features(dict(cabin), ["pool"]) == (False, ["pool"])
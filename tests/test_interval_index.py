@@ -0,0 +1,83 @@
+"""
+IntervalIndex: [start, end) overlap semantics, merged blocks and free slots
+"""
+from datetime import datetime, timedelta, timezone
+
+from src.interval_index import IntervalIndex, to_epoch
+
+DAY = 24 * 3600
+T0 = to_epoch(datetime(2026, 3, 1, tzinfo=timezone.utc))
+
+
+def index(*intervals):
+    return IntervalIndex((T0 + s, T0 + e, f"{s}-{e}") for s, e in intervals)
+
+
+def test_adjacent_intervals_do_not_overlap():
+    idx = index((0, DAY))
+    # Check-out day of one stay is the check-in day of the next
+    assert not idx.overlaps(T0 + DAY, T0 + 2 * DAY)
+    assert not idx.overlaps(T0 - DAY, T0)
+    assert idx.count_overlapping(T0 + DAY, T0 + 2 * DAY) == 0
+    assert idx.overlapping(T0 - DAY, T0) == []
+
+
+def test_touching_by_one_second_overlaps():
+    idx = index((0, DAY))
+    assert idx.overlaps(T0 + DAY - 1, T0 + 2 * DAY)
+    assert idx.overlapping(T0 - DAY, T0 + 1) == ["0-86400"]
+
+
+def test_same_day_intervals():
+    # Two short events on the same day, a gap between them
+    idx = index((10 * 3600, 12 * 3600), (14 * 3600, 16 * 3600))
+    assert idx.overlaps(T0 + 11 * 3600, T0 + 15 * 3600)
+    assert not idx.overlaps(T0 + 12 * 3600, T0 + 14 * 3600)
+    assert idx.count_overlapping(T0, T0 + DAY) == 2
+    # Neither takes a night: start and end fall on the same date
+    assert idx.booked_nights(T0, T0 + DAY) == set()
+
+
+def test_empty_and_zero_length():
+    assert not IntervalIndex().overlaps(T0, T0 + DAY)
+    # Zero-length intervals are dropped, zero-length queries match nothing
+    assert len(index((DAY, DAY))) == 0
+    assert index((0, DAY)).count_overlapping(T0 + 10, T0 + 10) == 0
+
+
+def test_adjacent_blocks_merge_for_free_slots():
+    idx = index((0, DAY), (DAY, 2 * DAY), (3 * DAY, 4 * DAY))
+    assert idx.busy_blocks(T0, T0 + 5 * DAY) == [(T0, T0 + 2 * DAY), (T0 + 3 * DAY, T0 + 4 * DAY)]
+    # One free night between the blocks, not two
+    assert idx.next_free_slot(T0, DAY) == T0 + 2 * DAY
+    assert idx.next_free_slot(T0, 2 * DAY) == T0 + 4 * DAY
+    assert idx.next_free_slot(T0, 2 * DAY, before=T0 + 5 * DAY) is None
+
+
+def test_overlapping_returns_long_interval_started_earlier():
+    # A long stay that started before a short one must still be found after it
+    idx = index((0, 10 * DAY), (DAY, 2 * DAY))
+    assert idx.overlapping(T0 + 5 * DAY, T0 + 6 * DAY) == ["0-864000"]
+
+
+def test_booked_nights_exclude_check_out_day():
+    idx = index((0, 2 * DAY))
+    assert idx.booked_nights(T0, T0 + 5 * DAY) == {"2026-03-01", "2026-03-02"}
+
+
+def test_naive_datetimes_are_utc():
+    idx = index((0, DAY))
+    start = datetime(2026, 3, 1, 12, 0)
+    assert idx.overlaps(start, start + timedelta(hours=1))
+
+
+def test_free_and_cancelled_events_do_not_block():
+    def event(event_id, **extra):
+        return {"id": event_id, "start": {"date": "2026-03-01"}, "end": {"date": "2026-03-03"}, **extra}
+
+    idx = IntervalIndex.from_events([
+        event("free", transparency="transparent"),
+        event("cancelled", status="cancelled"),
+        event("busy", transparency="opaque"),
+    ])
+    assert [e["id"] for e in idx.overlapping(T0, T0 + DAY)] == ["busy"]
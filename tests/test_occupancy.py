@@ -0,0 +1,63 @@
+"""
+OccupancyMatrix: booked nights per calendar and free N-night windows
+"""
+from datetime import date, datetime, timezone
+
+from src.interval_index import IntervalIndex, to_epoch
+from src.occupancy import OccupancyMatrix
+
+
+def stay(check_in: date, check_out: date):
+    """Busy interval of a stay, midnight to midnight UTC"""
+    return (
+        to_epoch(datetime(check_in.year, check_in.month, check_in.day, tzinfo=timezone.utc)),
+        to_epoch(datetime(check_out.year, check_out.month, check_out.day, tzinfo=timezone.utc)),
+        None,
+    )
+
+
+def matrix(stays_by_calendar, start_day=date(2026, 3, 1), end_day=date(2026, 3, 10)):
+    indexes = {cal_id: IntervalIndex(stays) for cal_id, stays in stays_by_calendar.items()}
+    return OccupancyMatrix.from_indexes(indexes, start_day, end_day, timezone.utc)
+
+
+def test_check_out_day_is_free():
+    m = matrix({"a": [stay(date(2026, 3, 3), date(2026, 3, 5))]})
+    assert m.booked_nights("a") == ["2026-03-03", "2026-03-04"]
+    assert "2026-03-05" in m.free_nights("a")
+
+
+def test_free_windows_between_adjacent_stays():
+    # 3-5 and 5-7 booked back to back, 8-9 booked: free nights 1, 2, 7, 10
+    m = matrix({"a": [
+        stay(date(2026, 3, 3), date(2026, 3, 5)),
+        stay(date(2026, 3, 5), date(2026, 3, 7)),
+        stay(date(2026, 3, 8), date(2026, 3, 10)),
+    ]})
+    assert m.free_windows(1)["a"] == [date(2026, 3, 1), date(2026, 3, 2), date(2026, 3, 7), date(2026, 3, 10)]
+    assert m.free_windows(2)["a"] == [date(2026, 3, 1)]
+    assert m.free_windows(3)["a"] == []
+
+
+def test_free_windows_per_calendar_and_range():
+    m = matrix({
+        "free": [],
+        "busy": [stay(date(2026, 3, 1), date(2026, 3, 11))],
+    })
+    windows = m.free_windows(2, date(2026, 3, 4), date(2026, 3, 6))
+    # Nights 4, 5, 6: a 2-night stay can start on the 4th or the 5th
+    assert windows == {"free": [date(2026, 3, 4), date(2026, 3, 5)], "busy": []}
+
+
+def test_free_windows_longer_than_range():
+    m = matrix({"a": []})
+    assert m.free_windows(11) == {"a": []}
+    assert m.free_windows(10)["a"] == [date(2026, 3, 1)]
+    assert m.free_windows(0) == {"a": []}
+
+
+def test_stay_outside_window_is_clipped():
+    m = matrix({"a": [stay(date(2026, 2, 25), date(2026, 3, 2))]})
+    assert m.booked_nights("a") == ["2026-03-01"]
+    assert m.free_for_stay(date(2026, 3, 2), date(2026, 3, 4)) == {"a": True}
+    assert m.free_for_stay(date(2026, 3, 1), date(2026, 3, 3)) == {"a": False}
@@ -0,0 +1,64 @@
+"""
+QuotaGovernor token bucket: each priority class leaves its reserve to the classes above it
+"""
+import pytest
+
+from src.quota import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_BROWSE,
+    PRIORITY_COMMIT,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_RESERVE,
+    GoogleQuotaExceeded,
+    QuotaGovernor,
+)
+
+BURST = 20
+
+
+@pytest.fixture
+def governor():
+    # Slowest refill, so the bucket does not change while a test runs
+    return QuotaGovernor(qps=0.1, burst=BURST)
+
+
+def drain(governor, priority):
+    """Take single units at priority until it has to wait; returns how many it got"""
+    taken = 0
+    while governor._try_take(1, priority) == 0:
+        taken += 1
+    return taken
+
+
+@pytest.mark.parametrize("priority", [PRIORITY_INTERACTIVE, PRIORITY_BROWSE, PRIORITY_BACKGROUND])
+def test_class_stops_at_its_reserve(governor, priority):
+    assert drain(governor, priority) == BURST - int(PRIORITY_RESERVE[priority] * BURST)
+
+
+def test_reserves_are_left_to_higher_priorities(governor):
+    # Background spends down to half the bucket, browsing to a quarter, interactive to a tenth
+    assert drain(governor, PRIORITY_BACKGROUND) == 10
+    assert drain(governor, PRIORITY_BROWSE) == 5
+    assert drain(governor, PRIORITY_INTERACTIVE) == 3
+    # Commits (bookings) may take the last tokens
+    assert drain(governor, PRIORITY_COMMIT) == 2
+    assert governor._try_take(1, PRIORITY_BACKGROUND) > 0
+
+
+def test_wait_is_how_long_the_refill_takes(governor):
+    drain(governor, PRIORITY_BACKGROUND)
+    # One token short of the background reserve at 0.1 tokens/s
+    assert governor._try_take(1, PRIORITY_BACKGROUND) == pytest.approx(10, rel=0.01)
+
+
+def test_batch_larger_than_the_bucket_goes_into_debt(governor):
+    assert governor._try_take(50, PRIORITY_COMMIT) == 0
+    assert governor._try_take(1, PRIORITY_COMMIT) > 0
+
+
+def test_admission_wait_over_the_class_limit_is_shed(governor):
+    # Empty the whole bucket: browse then waits for its reserve too (~60s), well over its 10s limit
+    drain(governor, PRIORITY_COMMIT)
+    with pytest.raises(GoogleQuotaExceeded):
+        governor.acquire(1, PRIORITY_BROWSE)
+    assert governor.get_stats()["endpoints"]["background"]["rejected"] == 1
@@ -0,0 +1,208 @@
+"""
+Response encoding benchmark: bytes and CPU per request for the large JSON endpoints,
+FastAPI's default path (response_model validation / jsonable_encoder + json.dumps)
+against FastJSONResponse (orjson, no re-validation), each raw and gzipped.
+
+    python tools/bench_responses.py
+    python tools/bench_responses.py --rows 500 --repeat 200
+    python tools/bench_responses.py --live http://localhost:8000
+
+Payloads are synthetic rows shaped like /admin/bookings, /admin/audit, /admin/faq/all
+and /cabins. --live additionally fetches those endpoints from a running server with and
+without Accept-Encoding: gzip and reports the bytes on the wire.
+"""
+import argparse
+import gzip
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from src.api_server import CabinInfo  # noqa: E402
+from src.fast_responses import GZIP_LEVEL, GZIP_MIN_BYTES, FastJSONResponse, orjson  # noqa: E402
+
+LIVE_PATHS = ["/cabins", "/admin/bookings", "/admin/audit", "/admin/faq/all"]
+
+
+def make_bookings(rows: int) -> list:
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    bookings = []
+    for i in range(rows):
+        check_in = date(2025, 7, 1) + timedelta(days=i % 60)
+        bookings.append({
+            "booking_id": str(uuid.uuid4()),
+            "cabin_id": str(uuid.uuid4()),
+            "cabin_name": f"צימר {i % 3}",
+            "customer_id": str(uuid.uuid4()),
+            "customer_name": "ישראל ישראלי",
+            "customer_email": f"guest{i}@example.com",
+            "customer_phone": "050-0000000",
+            "check_in": check_in,
+            "check_out": check_in + timedelta(days=2),
+            "adults": 2,
+            "kids": i % 3,
+            "status": "confirmed",
+            "total_price": Decimal("1450.00"),
+            "event_id": f"evt{i:06d}",
+            "event_link": f"https://www.google.com/calendar/event?eid=evt{i:06d}",
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+            "transactions": [{
+                "transaction_id": str(uuid.uuid4()),
+                "payment_id": f"pi_{i:010d}",
+                "amount": Decimal("1450.00"),
+                "currency": "ILS",
+                "status": "succeeded",
+                "payment_method": "card",
+                "created_at": now - timedelta(minutes=i),
+            }],
+        })
+    return bookings
+
+
+def make_audit(rows: int) -> list:
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    return [{
+        "audit_id": str(uuid.uuid4()),
+        "table_name": "bookings",
+        "record_id": str(uuid.uuid4()),
+        "action": "UPDATE",
+        "old_values": {"status": "hold", "total_price": 1450},
+        "new_values": {"status": "confirmed", "total_price": 1450},
+        "user_id": None,
+        "created_at": now - timedelta(seconds=i),
+    } for i in range(rows)]
+
+
+def make_faqs(rows: int) -> dict:
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    faqs = [{
+        "id": uuid.uuid4(),
+        "question": "האם מותר להביא כלבים?",
+        "answer": "כן, בתיאום מראש ובתוספת תשלום.",
+        "approved": i % 2 == 0,
+        "approved_at": now if i % 2 == 0 else None,
+        "suggested_question": None,
+        "suggested_answer": None,
+        "suggested_at": None,
+        "usage_count": i,
+        "created_at": now,
+        "updated_at": now,
+    } for i in range(rows)]
+    return {"faqs": faqs, "count": len(faqs)}
+
+
+def make_cabins(rows: int) -> list:
+    return [{
+        "cabin_id": f"ZB{i:02d}",
+        "name": f"צימר {i}",
+        "area": "גליל עליון",
+        "max_adults": 4,
+        "max_kids": 3,
+        "features": "jacuzzi,pool,wifi,parking",
+        "base_price_night": 650.0,
+        "weekend_price": 850.0,
+        "calendar_id": f"{uuid.uuid4().hex}@group.calendar.google.com",
+        "images_urls": [f"/img/card/ZB{i:02d}/{n}.jpg?v=0123456789ab" for n in range(6)],
+    } for i in range(rows)]
+
+
+def default_path(content) -> bytes:
+    """What FastAPI does with a plain return value"""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+_cabins_adapter = TypeAdapter(list[CabinInfo])
+
+
+def default_cabins_path(cabins: list) -> bytes:
+    """The old /cabins: CabinInfo per cabin, response_model validation, then JSONResponse"""
+    models = [CabinInfo(**cabin) for cabin in cabins]
+    value = _cabins_adapter.validate_python(models)
+    return JSONResponse(_cabins_adapter.dump_python(value, mode="json")).body
+
+
+def fast_path(content) -> bytes:
+    return FastJSONResponse(content).body
+
+
+def measure(fn, payload, repeat: int):
+    """(median CPU seconds per call, body)"""
+    body = fn(payload)
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn(payload)
+        samples.append(time.process_time() - started)
+    return statistics.median(samples), body
+
+
+def gzip_cost(body: bytes, repeat: int):
+    if len(body) < GZIP_MIN_BYTES:
+        return 0.0, len(body)
+    compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    samples = []
+    for _ in range(max(repeat // 10, 5)):
+        started = time.process_time()
+        gzip.compress(body, compresslevel=GZIP_LEVEL)
+        samples.append(time.process_time() - started)
+    return statistics.median(samples), len(compressed)
+
+
+def report(name: str, before, after, payload, repeat: int) -> None:
+    before_cpu, before_body = measure(before, payload, repeat)
+    after_cpu, after_body = measure(after, payload, repeat)
+    gzip_cpu, gzip_bytes = gzip_cost(after_body, repeat)
+    print(name)
+    print(f"  {'default':<22} {len(before_body):>10,} B   {before_cpu * 1000:8.2f} ms CPU")
+    print(f"  {'FastJSONResponse':<22} {len(after_body):>10,} B   {after_cpu * 1000:8.2f} ms CPU"
+          f"   ({before_cpu / after_cpu if after_cpu else float('inf'):.1f}x)")
+    print(f"  {'  + gzip':<22} {gzip_bytes:>10,} B   {(after_cpu + gzip_cpu) * 1000:8.2f} ms CPU")
+    print()
+
+
+def live(base_url: str) -> None:
+    import requests
+
+    print(f"Live: {base_url}")
+    for path in LIVE_PATHS:
+        sizes = {}
+        for encoding in ("identity", "gzip"):
+            # stream=True keeps requests from decoding, so raw bytes are what was sent
+            response = requests.get(base_url.rstrip("/") + path, headers={"Accept-Encoding": encoding}, stream=True)
+            sizes[encoding] = (len(response.raw.read(decode_content=False)), response.headers.get("content-encoding"))
+        print(f"  {path:<18} identity {sizes['identity'][0]:>10,} B   "
+              f"gzip {sizes['gzip'][0]:>10,} B ({sizes['gzip'][1] or 'not encoded'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ZimmerBot response encoding benchmark")
+    parser.add_argument("--rows", type=int, default=100, help="Rows per synthetic payload")
+    parser.add_argument("--repeat", type=int, default=100, help="Encodings per measurement")
+    parser.add_argument("--live", help="Base URL of a running server, e.g. http://localhost:8000")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}, orjson {'yes' if orjson else 'no (json fallback)'}, "
+          f"{args.rows} rows, gzip level {GZIP_LEVEL} above {GZIP_MIN_BYTES} B\n")
+
+    report("/admin/bookings", default_path, fast_path, make_bookings(args.rows), args.repeat)
+    report("/admin/audit", default_path, fast_path, make_audit(args.rows), args.repeat)
+    report("/admin/faq/all", default_path, fast_path, make_faqs(args.rows), args.repeat)
+    report("/cabins", default_cabins_path, fast_path, make_cabins(args.rows), args.repeat)
+
+    if args.live:
+        live(args.live)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Startup benchmark: import time of src.api_server, Calendar service build time
+and app startup + first request latency, each in a fresh interpreter.
+
+    python tools/bench_startup.py
+    python tools/bench_startup.py --runs 10 --path /cabins
+
+Compare runs with STARTUP_WARMUP / CALENDAR_DISCOVERY_PATH set differently.
+First-request numbers use FastAPI's TestClient (no network server); paths that
+need Google, Postgres or Redis include their connection time.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+# Modules that should stay unloaded until first use
+LAZY_MODULES = ["stripe", "gspread", "smtplib"]
+
+IMPORT_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import src.api_server
+elapsed = time.perf_counter() - t
+print(json.dumps({"import_s": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+BUILD_PROBE = """
+import json, time
+from google.oauth2.credentials import Credentials
+from src.main import build_calendar_service
+creds = Credentials(token="bench")
+t = time.perf_counter()
+build_calendar_service(creds)
+first = time.perf_counter() - t
+t = time.perf_counter()
+build_calendar_service(creds)
+second = time.perf_counter() - t
+print(json.dumps({"first_build_s": first, "next_build_s": second}))
+"""
+
+FIRST_REQUEST_PROBE = """
+import json, time
+t = time.perf_counter()
+from fastapi.testclient import TestClient
+from src.api_server import app
+with TestClient(app) as client:
+    ready = time.perf_counter() - t
+    started = time.perf_counter()
+    response = client.get(%r)
+    first = time.perf_counter() - started
+    started = time.perf_counter()
+    client.get(%r)
+    second = time.perf_counter() - started
+print(json.dumps({"status": response.status_code, "ready_s": ready, "first_request_s": first, "second_request_s": second}))
+"""
+
+
+def run_probe(code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=str(BASE_DIR),
+        capture_output=True,
+        text=True,
+    )
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe failed")
+    return json.loads(lines[-1])
+
+
+def summarize(name: str, values: list) -> None:
+    values_ms = [v * 1000 for v in values]
+    print(
+        f"  {name:<20} median {statistics.median(values_ms):8.1f} ms   "
+        f"min {min(values_ms):8.1f} ms   max {max(values_ms):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ZimmerBot startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--path", default="/", help="Path of the first request")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}, {args.runs} runs each\n")
+
+    print("Import src.api_server")
+    imports = [run_probe(IMPORT_PROBE % LAZY_MODULES) for _ in range(args.runs)]
+    summarize("import", [r["import_s"] for r in imports])
+    loaded = sorted({m for r in imports for m in r["loaded"]})
+    print(f"  eagerly loaded optional modules: {', '.join(loaded) if loaded else 'none'}\n")
+
+    print("build_calendar_service")
+    builds = [run_probe(BUILD_PROBE) for _ in range(args.runs)]
+    summarize("first build", [r["first_build_s"] for r in builds])
+    summarize("next build", [r["next_build_s"] for r in builds])
+    print()
+
+    print(f"Startup + GET {args.path}")
+    try:
+        requests_ = [run_probe(FIRST_REQUEST_PROBE % (args.path, args.path)) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"  skipped: {e}")
+        return
+    summarize("ready", [r["ready_s"] for r in requests_])
+    summarize("first request", [r["first_request_s"] for r in requests_])
+    summarize("second request", [r["second_request_s"] for r in requests_])
+    print(f"  status: {requests_[-1]['status']}")
+
+
+if __name__ == "__main__":
+    main()